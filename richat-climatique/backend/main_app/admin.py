@@ -283,17 +283,16 @@ class Command(BaseCommand):
 
     def create_sync_notification(self, total_processed):
         """Crée une notification pour informer de la synchronisation"""
+        from main_app.notifications import notify_users
+
         try:
-            # Trouver les admins
-            admins = CustomUser.objects.filter(is_superuser=True)
-            
-            for admin in admins:
-                Notification.objects.create(
-                    type='info',
-                    title='Synchronisation des données terminée',
-                    message=f'Synchronisation réussie: {total_processed} projets traités depuis les fichiers scrapés.',
-                    consultant=admin
-                )
+            # Notifier les superutilisateurs en un seul INSERT
+            notify_users(
+                CustomUser.objects.filter(is_superuser=True).values_list('pk', flat=True),
+                'info',
+                'Synchronisation des données terminée',
+                f'Synchronisation réussie: {total_processed} projets traités depuis les fichiers scrapés.'
+            )
                 
         except Exception as e:
             logger.warning(f"Impossible de créer la notification: {e}")
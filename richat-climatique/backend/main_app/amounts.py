@@ -0,0 +1,208 @@
+"""
+Lecture des montants de financement ("USD 12.5 million", "9,000,000",
+"3,5 M EUR", "5-10 mn FCFA", ...)
+
+Un seul analyseur, piloté par des tables (devises, unités), utilisé par la
+collection (total_funding -> funding_amount/currency) et pour les colonnes
+"(USD mn)" des fonds climatiques :
+- séparateurs : "9,000,000", "1.234.567,89", "1 234 567" ; un seul
+  séparateur suivi de 3 chiffres est un séparateur de milliers ("161,450"),
+  sauf devant une unité ("2.125 million", "2,125 millions") ;
+- unités : k/thousand, m/mn/million, bn/billion/milliard/mrd, éventuellement
+  collées à la devise ("2 MEUR", "3 M€") ;
+- intervalles ("5-10 million", "5 to 10 M") : borne basse, le montant acquis ;
+- devises : USD, EUR, XOF (et MRU), converties dans la devise de référence
+  (FUNDING_BASE_CURRENCY) avec les taux statiques de FUNDING_FX_RATES.
+
+Quand un texte contient plusieurs nombres, le premier accompagné d'une
+devise ou d'une unité l'emporte, sinon le premier nombre.
+"""
+import re
+from collections import namedtuple
+from decimal import Decimal, InvalidOperation
+
+import pandas as pd
+from django.conf import settings
+
+# Code ISO -> écritures reconnues (expressions régulières, insensibles à la casse)
+CURRENCIES = {
+    'USD': [r'US\$', r'USD', r'\$', r'DOLLARS?\b'],
+    'EUR': [r'EUR\b', r'€', r'EUROS?\b'],
+    'XOF': [r'XOF\b', r'F\s?CFA\b', r'CFA\b'],
+    'MRU': [r'MRU\b', r'MRO\b', r'OUGUIYAS?\b'],
+}
+# Unité -> puissance de 10
+UNITS = {
+    3: [r'K', r'THOUSANDS?', r'MILLE'],
+    6: [r'MN', r'MIO', r'MLN', r'MILLIONS?', r'M'],
+    9: [r'BN', r'BILLIONS?', r'MILLIARDS?', r'MDS?', r'MRDS?'],
+}
+DEFAULT_FX_RATES = {'USD': 1, 'EUR': 1.08, 'XOF': 0.00165, 'MRU': 0.025}
+EMPTY_TEXTS = {'', 'nan', 'none', 'null', '-', 'n/a'}
+
+Amount = namedtuple('Amount', 'value currency')
+
+_NUMBER = r"\d{1,3}(?:[ \u00a0\u202f']\d{3})+(?:[.,]\d+)?|\d+(?:[.,]\d+)*"
+_SPACES = re.compile(r"[ \u00a0\u202f']")
+
+
+def _build_pattern():
+    currencies = '|'.join(f'(?:{"|".join(patterns)})' for patterns in CURRENCIES.values())
+    units = '|'.join(f'(?:{"|".join(patterns)})' for patterns in UNITS.values())
+    # Une unité est un mot entier ("M", pas le début de "Mission"), ou collée à une devise ("MEUR")
+    unit_end = rf"(?:(?![^\W\d_])|(?=(?:{currencies})))"
+    return re.compile(
+        rf"(?P<currency_before>{currencies})?\s*"
+        rf"(?P<number>{_NUMBER})\s*"
+        rf"(?:(?P<unit_low>{units}){unit_end})?"
+        rf"(?:\s*(?:-|–|—|\bTO\b|\bÀ\b)\s*(?:{currencies})?\s*(?P<high>{_NUMBER}))?\s*"
+        rf"(?:(?P<unit>{units}){unit_end})?\s*"
+        rf"(?:(?:DE\s+|D['’]\s?)?(?P<currency_after>{currencies}))?",
+        re.IGNORECASE
+    )
+
+
+AMOUNT_PATTERN = _build_pattern()
+_CURRENCY_LOOKUP = [
+    (re.compile(rf'^(?:{"|".join(patterns)})$', re.IGNORECASE), code) for code, patterns in CURRENCIES.items()
+]
+_UNIT_LOOKUP = [
+    (re.compile(rf'^(?:{"|".join(patterns)})$', re.IGNORECASE), power) for power, patterns in UNITS.items()
+]
+
+
+def currency_code(text):
+    """'€' -> 'EUR', 'F CFA' -> 'XOF' ; None si inconnue"""
+    text = (text or '').strip()
+    for pattern, code in _CURRENCY_LOOKUP:
+        if pattern.match(text):
+            return code
+    return None
+
+
+def unit_power(text):
+    """'mn' -> 6, 'bn' -> 9 ; 0 sans unité"""
+    text = (text or '').strip()
+    for pattern, power in _UNIT_LOOKUP:
+        if pattern.match(text):
+            return power
+    return 0
+
+
+def header_defaults(header):
+    """Devise et unité indiquées par un en-tête de colonne : 'Pledge (USD mn)' -> ('USD', 6)"""
+    currency, power = None, 0
+    for token in re.findall(r'[^\W\d_]+|[$€]', str(header)):
+        currency = currency or currency_code(token)
+        power = power or unit_power(token)
+    return currency, power
+
+
+def to_decimal(number, before_unit=False):
+    """
+    Nombre écrit avec séparateurs -> Decimal ; None si l'écriture est
+    incohérente ("1,2,3")
+    """
+    number = _SPACES.sub('', number)
+    dots, commas = number.count('.'), number.count(',')
+    if dots and commas:
+        decimal_sep = '.' if number.rfind('.') > number.rfind(',') else ','
+        thousands_sep = ',' if decimal_sep == '.' else '.'
+        if number.count(decimal_sep) > 1:
+            return None
+        integer, fraction = number.split(decimal_sep)
+        groups = integer.split(thousands_sep)
+        if any(len(group) != 3 for group in groups[1:]):
+            return None
+        number = ''.join(groups) + '.' + fraction
+    elif dots or commas:
+        separator = '.' if dots else ','
+        parts = number.split(separator)
+        if len(parts) > 2:
+            if any(len(part) != 3 for part in parts[1:]):
+                return None
+            number = ''.join(parts)
+        elif len(parts[1]) == 3 and parts[0].strip('0') and not before_unit:
+            number = ''.join(parts)
+        else:
+            number = parts[0] + '.' + parts[1]
+    try:
+        return Decimal(number)
+    except InvalidOperation:
+        return None
+
+
+def parse_amount(value, currency=None, unit=0):
+    """
+    Montant d'un texte (ou d'un nombre) dans sa devise : Amount(value, currency),
+    None si aucun montant. currency et unit (puissance de 10) s'appliquent
+    quand le texte ne les précise pas (en-têtes "(USD mn)").
+    """
+    if value is None:
+        return None
+    if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+        if pd.isna(value):
+            return None
+        return Amount(Decimal(str(value)).scaleb(unit), currency or 'USD')
+
+    text = str(value).strip()
+    if text.lower() in EMPTY_TEXTS:
+        return None
+
+    fallback = None
+    for match in AMOUNT_PATTERN.finditer(text):
+        explicit_unit = match.group('unit') or match.group('unit_low')
+        explicit_currency = match.group('currency_before') or match.group('currency_after')
+        number = to_decimal(match.group('number'), before_unit=bool(explicit_unit or unit))
+        if number is None:
+            continue
+        amount = Amount(
+            number.scaleb(unit_power(explicit_unit) if explicit_unit else unit),
+            currency_code(explicit_currency) or currency or 'USD'
+        )
+        if explicit_unit or explicit_currency:
+            return amount
+        fallback = fallback or amount
+    return fallback
+
+
+def format_amount(amount):
+    """Texte d'un montant, relu à l'identique par parse_amount : 'USD 382.34 Million', 'USD 1,500'"""
+    if amount.value >= 10 ** 6:
+        return f"{amount.currency} {amount.value.scaleb(-6).normalize():f} Million"
+    return f"{amount.currency} {amount.value:,.0f}"
+
+
+def fx_rates():
+    return getattr(settings, 'FUNDING_FX_RATES', DEFAULT_FX_RATES)
+
+
+def base_currency():
+    return getattr(settings, 'FUNDING_BASE_CURRENCY', 'USD')
+
+
+def convert(amount, to=None):
+    """Montant converti dans la devise de référence (Decimal à 2 décimales), None sans taux connu"""
+    to = to or base_currency()
+    rates = fx_rates()
+    if amount.currency not in rates or to not in rates:
+        return None
+    value = amount.value * Decimal(str(rates[amount.currency])) / Decimal(str(rates[to]))
+    return value.quantize(Decimal('0.01'))
+
+
+def funding_amount(value, currency=None, unit=0):
+    """Montant d'un texte de financement dans la devise de référence, None si aucun"""
+    amount = parse_amount(value, currency, unit)
+    return convert(amount) if amount is not None else None
+
+
+def funding_amounts(series):
+    """
+    funding_amount de chaque valeur d'une colonne (chaque texte distinct
+    n'est analysé qu'une fois) : Series de float, NaN si aucun montant
+    """
+    codes, uniques = pd.factorize(series.astype(object), use_na_sentinel=True)
+    parsed = [funding_amount(value) for value in uniques]
+    values = pd.Series([float(amount) if amount is not None else float('nan') for amount in parsed] + [float('nan')])
+    return pd.Series(values.to_numpy()[codes], index=series.index)
@@ -0,0 +1,120 @@
+"""
+Exécution des tâches en arrière-plan
+
+Les effets de bord lents des requêtes HTTP (emails, envoi groupé des
+notifications, nettoyage) sont déclarés avec @background_task et lancés avec
+.delay(...), après le commit de la transaction en cours. Le moteur est choisi
+par BACKGROUND_TASKS_BACKEND :
+- 'celery' : file Celery (richat_funding/celery.py), retries gérés par Celery ;
+  choisi par défaut si Celery est installé et CELERY_BROKER_URL défini
+  explicitement (REDIS_URL ne suffit pas) ;
+- 'thread' : pool de threads du processus, avec retries, pour un seul serveur
+  sans broker ;
+- 'eager' : exécution immédiate et synchrone (tests), les erreurs remontent.
+
+Une tâche reste appelable directement (exécution synchrone) : task(...).
+"""
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import update_wrapper
+
+from django.conf import settings
+from django.db import connections, transaction
+
+try:
+    from celery import shared_task
+except ImportError:  # Celery est optionnel (déploiement mono-serveur)
+    shared_task = None
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def get_backend():
+    """Moteur d'exécution configuré"""
+    backend = getattr(settings, 'BACKGROUND_TASKS_BACKEND', '')
+    if backend:
+        return backend
+    if shared_task is not None and getattr(settings, 'CELERY_BROKER_URL', ''):
+        return 'celery'
+    return 'thread'
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'BACKGROUND_TASKS_THREADS', 2),
+            thread_name_prefix='background'
+        )
+    return _executor
+
+
+class BackgroundTask:
+    """Tâche exécutable en arrière-plan avec retries"""
+
+    def __init__(self, func, name=None, max_retries=3, retry_delay=30):
+        self.func = func
+        self.name = name or f'{func.__module__}.{func.__name__}'
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.celery_task = None
+        if shared_task is not None:
+            self.celery_task = shared_task(
+                name=self.name,
+                autoretry_for=(Exception,),
+                max_retries=max_retries,
+                retry_backoff=retry_delay,
+            )(func)
+        update_wrapper(self, func)
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def delay(self, *args, **kwargs):
+        """Programme la tâche (arguments sérialisables en JSON : identifiants plutôt qu'instances)"""
+        backend = get_backend()
+        if backend == 'eager':
+            return self.func(*args, **kwargs)
+
+        if backend == 'celery':
+            if self.celery_task is None:
+                raise RuntimeError("BACKGROUND_TASKS_BACKEND='celery' mais Celery n'est pas installé")
+            transaction.on_commit(lambda: self.celery_task.apply_async(args, kwargs))
+        elif backend == 'thread':
+            transaction.on_commit(lambda: get_executor().submit(self.run_in_thread, args, kwargs))
+        else:
+            raise ValueError(f"Moteur de tâches inconnu: {backend}")
+        return None
+
+    def run_in_thread(self, args, kwargs):
+        try:
+            return self.run_with_retries(args, kwargs)
+        finally:
+            # Connexions ouvertes par ce thread du pool
+            connections.close_all()
+
+    def run_with_retries(self, args, kwargs):
+        """Retries avec délai exponentiel, puis abandon journalisé"""
+        for attempt in range(self.max_retries + 1):
+            try:
+                return self.func(*args, **kwargs)
+            except Exception:
+                if attempt >= self.max_retries:
+                    logger.exception(f"Tâche {self.name} abandonnée après {attempt + 1} tentative(s)")
+                    return None
+                delay = self.retry_delay * 2 ** attempt
+                logger.warning(f"Tâche {self.name} en échec, nouvelle tentative dans {delay}s", exc_info=True)
+                time.sleep(delay)
+
+
+def background_task(func=None, *, name=None, max_retries=3, retry_delay=30):
+    """Décorateur : @background_task ou @background_task(max_retries=5, retry_delay=60)"""
+    def decorator(function):
+        return BackgroundTask(function, name=name, max_retries=max_retries, retry_delay=retry_delay)
+
+    if func is not None:
+        return decorator(func)
+    return decorator
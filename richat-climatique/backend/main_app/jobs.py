@@ -0,0 +1,153 @@
+"""
+Tâches planifiées : scraping, collection et maintenance des alertes
+
+Les tâches sont décrites dans settings.SCHEDULED_JOBS et lancées soit par la
+commande run_scheduler (un processus, sans dépendance), soit par Celery beat
+(richat_funding/celery.py) ; dans les deux cas par run_job(), qui :
+- prend le verrou de la tâche (JobLock, en base) : deux exécutions d'une même
+  tâche ne se chevauchent jamais, même depuis plusieurs serveurs ;
+- enregistre l'exécution dans ScrapingSession (fin, compteurs, erreurs).
+
+Une tâche est soit une commande de gestion ('command' + 'options'), qui peut
+renseigner ses compteurs dans self.run_stats, soit une tâche de tasks.py
+('task', chemin de la fonction), exécutée de façon synchrone.
+"""
+import logging
+import os
+import socket
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management import call_command, load_command_class, get_commands
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import JobLock, ScrapingSession
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LOCK_TIMEOUT = 60 * 60
+
+# Source enregistrée dans ScrapingSession selon l'option --source du scraper
+SCRAPING_SOURCES = {'gef': 'GEF', 'gcf': 'GCF'}
+
+
+def get_jobs():
+    return getattr(settings, 'SCHEDULED_JOBS', {})
+
+
+def get_job(name):
+    jobs = get_jobs()
+    if name not in jobs:
+        raise KeyError(f"Tâche planifiée inconnue: {name}")
+    return jobs[name]
+
+
+def parse_time(value):
+    """'HH:MM' -> (heure, minute)"""
+    hour, minute = value.split(':')
+    return int(hour), int(minute)
+
+
+def last_run(name):
+    return ScrapingSession.objects.filter(job=name).order_by('-started_at').values_list(
+        'started_at', flat=True
+    ).first()
+
+
+def is_due(name, job, now=None):
+    """
+    La tâche doit-elle être lancée ? 'every' : intervalle depuis le dernier
+    démarrage ; 'at' : une fois par jour, à partir de l'heure indiquée.
+    """
+    now = now or timezone.now()
+    last = last_run(name)
+    if 'at' in job:
+        hour, minute = parse_time(job['at'])
+        local_now = timezone.localtime(now)
+        slot = local_now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        if slot > local_now:
+            slot -= timedelta(days=1)
+        return last is None or last < slot
+    return last is None or last + timedelta(seconds=job['every']) <= now
+
+
+def session_source(job):
+    if job.get('command') == 'scraping':
+        return SCRAPING_SOURCES.get(job.get('options', {}).get('source', 'all'), 'OTHER')
+    if job.get('command') == 'collection' and job.get('options', {}).get('climate_funds_only'):
+        return 'CLIMATE_FUND'
+    return 'OTHER'
+
+
+def run_command(job, session, stdout=None):
+    """Exécute la commande de gestion de la tâche et reporte ses compteurs"""
+    options = dict(job.get('options', {}))
+    command = load_command_class(get_commands()[job['command']], job['command'])
+    if stdout is not None:
+        options['stdout'] = stdout
+    call_command(command, **options)
+
+    stats = getattr(command, 'run_stats', {})
+    session.projects_found = stats.get('found', 0)
+    session.projects_saved = stats.get('saved', 0)
+    session.projects_updated = stats.get('updated', 0)
+    return stats.get('errors', [])
+
+
+def run_job(name, force=True, stdout=None):
+    """
+    Exécute une tâche planifiée sous verrou et l'enregistre dans
+    ScrapingSession. force=False ne la lance que si elle est due (vérifié
+    après la prise du verrou). Retourne la session, None si la tâche n'a pas
+    été lancée (verrou détenu ailleurs ou tâche pas encore due).
+    """
+    job = get_job(name)
+    owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+    if not JobLock.acquire(name, owner, job.get('lock_timeout', DEFAULT_LOCK_TIMEOUT)):
+        logger.info(f"Tâche {name} déjà en cours ailleurs, ignorée")
+        return None
+
+    try:
+        if not force and not is_due(name, job):
+            return None
+
+        options = job.get('options', {})
+        session = ScrapingSession.objects.create(
+            job=name,
+            source=session_source(job),
+            max_pages=options.get('max_pages'),
+            headless_mode=bool(options.get('headless', False)),
+        )
+        errors = []
+        try:
+            if 'command' in job:
+                errors = run_command(job, session, stdout)
+            else:
+                import_string(job['task'])()
+        except Exception as e:
+            logger.exception(f"Tâche planifiée {name} en échec")
+            errors.append(f"{type(e).__name__}: {e}")
+
+        session.success = not errors
+        session.error_message = "\n".join(errors)
+        session.completed_at = timezone.now()
+        session.save()
+        return session
+    finally:
+        JobLock.release(name, owner)
+
+
+def next_run(name, job, now=None):
+    """Prochaine échéance indicative d'une tâche (affichage)"""
+    now = now or timezone.now()
+    if is_due(name, job, now):
+        return now
+    if 'at' in job:
+        hour, minute = parse_time(job['at'])
+        local_now = timezone.localtime(now)
+        slot = local_now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        return slot if slot > local_now else slot + timedelta(days=1)
+    return last_run(name) + timedelta(seconds=job['every'])
+
@@ -0,0 +1,197 @@
+"""
+Chargement des fichiers sources de la collection (commande collection)
+
+Un chargeur par source (GEF, GCF, OECD, Climate Funds), enregistré avec
+@register_loader : il connaît son classeur Excel (produit par le scraper),
+les exports plus rapides à lire qui ont le même contenu (CSV/JSON), et
+ramène ces exports aux colonnes du classeur. Pour ajouter une source, il
+suffit d'écrire et d'enregistrer son chargeur.
+
+Fichier lu pour une source : le premier export présent et au moins aussi
+récent que le classeur, sinon le classeur lui-même (moteur calamine si
+python-calamine est installé, sinon openpyxl).
+
+La lecture des fichiers se fait en parallèle dans un pool de processus
+(read_files) ; ce module n'importe pas Django pour que les processus du
+pool démarrent vite, y compris sous Windows (spawn).
+"""
+import hashlib
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    import python_calamine  # noqa: F401
+    EXCEL_ENGINE = 'calamine'
+except ImportError:  # moteur Rust optionnel, beaucoup plus rapide qu'openpyxl
+    EXCEL_ENGINE = 'openpyxl'
+
+# En-têtes des classeurs produits par le scraper (voir scraping.py)
+SCRAPER_COLUMNS = [
+    'Titre', 'Type', 'Document', 'nom_site', 'Organisation', 'Lien', 'Description', 'Cofinancement Total'
+]
+HASH_CHUNK_SIZE = 1024 * 1024
+
+LOADERS = {}
+
+
+def register_loader(cls):
+    """Décorateur : enregistre un chargeur sous cls.name"""
+    LOADERS[cls.name] = cls
+    return cls
+
+
+def get_loaders(data_dir, names=None):
+    """Instances des chargeurs enregistrés (tous, ou ceux de names), dans l'ordre d'enregistrement"""
+    return [cls(data_dir) for name, cls in LOADERS.items() if names is None or name in names]
+
+
+def excel_value(value):
+    """
+    Valeur d'un export (CSV/JSON) typée comme openpyxl la lit dans le
+    classeur : nombres entiers en int ("43.0" -> 43), flottants sans les
+    erreurs d'arrondi de la sérialisation JSON, texte inchangé ('-')
+    """
+    if isinstance(value, str):
+        try:
+            value = float(value)
+        except ValueError:
+            return value
+    if isinstance(value, float) and not math.isnan(value):
+        value = round(value, 9)
+        if value.is_integer():
+            return int(value)
+    return value
+
+
+def file_hash(path):
+    """Empreinte SHA-256 du contenu d'un fichier"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class SourceLoader:
+    """Chargeur d'une source : choix du fichier, lecture et mise au format du classeur"""
+    name = ''
+    source = 'OTHER'          # valeur de ScrapedProject.source
+    workbook = ''             # classeur Excel écrit par le scraper
+    siblings = ()             # exports de même contenu, par ordre de préférence
+    climate_funds = False
+
+    def __init__(self, data_dir):
+        self.data_dir = Path(data_dir)
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {self.name}>"
+
+    @property
+    def workbook_path(self):
+        return self.data_dir / self.workbook
+
+    def resolve(self):
+        """Fichier à lire, None si aucun n'existe"""
+        workbook = self.workbook_path
+        workbook_mtime = workbook.stat().st_mtime if workbook.exists() else None
+        for name in self.siblings:
+            path = self.data_dir / name
+            # Un export plus ancien que le classeur vient d'une exécution précédente du scraper
+            if path.exists() and (workbook_mtime is None or path.stat().st_mtime >= workbook_mtime):
+                return path
+        return workbook if workbook_mtime is not None else None
+
+    def read(self, path):
+        """Lit le fichier et le ramène aux colonnes du classeur"""
+        suffix = path.suffix.lower()
+        if suffix == '.csv':
+            df = pd.read_csv(path, encoding='utf-8')
+        elif suffix == '.json':
+            df = pd.read_json(path, orient='records')
+        else:
+            df = pd.read_excel(path, engine=EXCEL_ENGINE)
+        if suffix != '.xlsx':
+            df = self.from_export(df)
+        return df
+
+    def from_export(self, df):
+        """Colonnes d'un export (CSV/JSON) -> colonnes du classeur ; identiques par défaut"""
+        return df
+
+
+@register_loader
+class GEFLoader(SourceLoader):
+    name = 'gef'
+    source = 'GEF'
+    workbook = 'GEF_Mauritanie_Projects.xlsx'
+
+
+@register_loader
+class GCFLoader(SourceLoader):
+    name = 'gcf'
+    source = 'GCF'
+    workbook = 'GCF_Mauritanie_Projects.xlsx'
+
+
+@register_loader
+class OECDLoader(SourceLoader):
+    name = 'oecd'
+    source = 'OTHER'  # OECD classé comme OTHER
+    workbook = 'OECD_Mauritanie_Projects.xlsx'
+    siblings = ('oecd_mauritania.csv',)
+
+    # Colonnes de save_oecd_csv (scraping.py) -> en-têtes du classeur
+    CSV_COLUMNS = {'title': 'Titre', 'url': 'Lien', 'tag': 'Type', 'snippet': 'Description'}
+
+    def from_export(self, df):
+        df = df.rename(columns=self.CSV_COLUMNS)
+        # Valeurs fixes des projets OECD dans le classeur (scrape_oecd_mauritania_projects)
+        df['Document'] = df['Lien']
+        df['nom_site'] = 'oecd.org'
+        df['Organisation'] = 'OECD'
+        df['Cofinancement Total'] = ''
+        return df[SCRAPER_COLUMNS]
+
+
+@register_loader
+class ClimateFundsLoader(SourceLoader):
+    name = 'climate_funds'
+    source = 'CLIMATE_FUND'
+    workbook = 'climate_funds_global.xlsx'
+    siblings = ('climate_funds_global.csv', 'climate_funds_global.json')
+    climate_funds = True
+
+    # Colonnes textuelles ; les autres (montants, nombre de projets) sont retypées
+    TEXT_COLUMNS = ('Fund Name', 'Fund URL', 'Fund Type', 'Fund focus')
+
+    def from_export(self, df):
+        for col in df.columns:
+            if col not in self.TEXT_COLUMNS:
+                df[col] = df[col].astype(object).map(excel_value)
+        return df
+
+
+def read_file(loader, path):
+    """Lecture d'un fichier dans un processus du pool : (DataFrame, None) ou (None, erreur)"""
+    try:
+        return loader.read(Path(path)), None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+
+def read_files(jobs, workers=None):
+    """
+    Lit en parallèle les fichiers [(chargeur, chemin), ...] ; retourne les
+    résultats de read_file dans le même ordre. Un seul fichier (ou workers=1)
+    est lu dans le processus courant.
+    """
+    workers = min(len(jobs), workers or os.cpu_count() or 1)
+    if workers <= 1:
+        return [read_file(loader, path) for loader, path in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(read_file, loader, str(path)) for loader, path in jobs]
+        return [future.result() for future in futures]
@@ -0,0 +1,69 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from main_app.models import Document
+
+
+class Command(BaseCommand):
+    help = 'Renseigner la taille, le type et l\'empreinte SHA-256 des documents déjà uploadés'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=200,
+            help='Nombre de documents mis à jour par requête (défaut: 200)'
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Recalculer aussi les documents qui ont déjà leurs métadonnées'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Afficher ce qui serait fait sans rien écrire'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options['batch_size'])
+        dry_run = options['dry_run']
+
+        documents = Document.objects.exclude(file='').only('id', 'file', 'file_size', 'file_type', 'checksum')
+        if not options['force']:
+            documents = documents.filter(Q(file_size__isnull=True) | Q(checksum=''))
+
+        total = documents.count()
+        self.stdout.write(f"📄 {total} document(s) à traiter{' (simulation)' if dry_run else ''}")
+
+        updated = 0
+        missing = []
+        batch = []
+        for document in documents.iterator(chunk_size=batch_size):
+            try:
+                document.compute_file_metadata()
+            except (FileNotFoundError, OSError, ValueError) as e:
+                missing.append((document.id, document.file.name, str(e)))
+                continue
+
+            batch.append(document)
+            if len(batch) >= batch_size:
+                updated += self.save_batch(batch, dry_run)
+                batch = []
+                self.stdout.write(f"   ✅ {updated}/{total} documents traités...")
+
+        updated += self.save_batch(batch, dry_run)
+
+        self.stdout.write(self.style.SUCCESS(f"✅ {updated} document(s) mis à jour"))
+        if missing:
+            self.stdout.write(self.style.WARNING(f"⚠️ {len(missing)} fichier(s) introuvable(s):"))
+            for document_id, name, error in missing[:20]:
+                self.stdout.write(f"   • Document #{document_id}: {name} ({error})")
+            if len(missing) > 20:
+                self.stdout.write(f"   ... et {len(missing) - 20} autres")
+
+    def save_batch(self, batch, dry_run):
+        """Écrit un lot de métadonnées en une requête"""
+        if batch and not dry_run:
+            Document.objects.bulk_update(batch, ['file_size', 'file_type', 'checksum'])
+        return len(batch)
@@ -5,12 +5,21 @@ import sys
 import re
 import pandas as pd
 from datetime import datetime, timedelta
-from sqlalchemy import create_engine, text
+from decimal import Decimal, InvalidOperation
 from pathlib import Path
 from django.conf import settings
-from django.core.mail import send_mail
 from django.core.management.base import BaseCommand
+from django.db import connection, models, transaction
+from django.db.models import Avg, Count
 from django.utils import timezone
+from main_app import search
+from main_app.amounts import (
+    base_currency, convert, format_amount, funding_amount, funding_amounts, header_defaults, parse_amount
+)
+from main_app.loaders import SCRAPER_COLUMNS, file_hash, get_loaders, read_files
+from main_app.models import ImportedFile, ProjectRequest, ScrapedProject
+from main_app.stats import invalidate_stats
+from main_app.tasks import send_email
 import hashlib
 from typing import Dict, List, Any
 from difflib import SequenceMatcher
@@ -21,28 +30,207 @@ import warnings
 warnings.filterwarnings('ignore', category=FutureWarning)
 warnings.filterwarnings('ignore', category=UserWarning)
 
+EMPTY_TEXTS = ['', 'nan', 'none', 'null']
+REVIEW_GENERIC_TITLES = ['projet', 'project', 'untitled']
+REVIEW_SUSPICIOUS_KEYWORDS = ['test', 'draft', 'template', 'example', 'sample']
+
+
+def column_values(df, column, default=''):
+    """Colonne du DataFrame, ou valeur par défaut (comme row.get(column, default))"""
+    if column in df.columns:
+        return df[column]
+    return pd.Series([default] * len(df), index=df.index, dtype=object)
+
+
+def as_text(series):
+    """str(v) de chaque valeur, y compris 'nan' et 'None' (quel que soit le dtype)"""
+    if pd.api.types.infer_dtype(series, skipna=False) == 'string' and not series.isna().any():
+        return series  # que des chaînes : rien à convertir
+    return series.astype(object).map(str)
+
+
+def is_truthy(series):
+    """bool(v) de chaque valeur (NaN est vrai, None, '', 0 et False sont faux)"""
+    return pd.Series(series.to_numpy(dtype=object).astype(bool), index=series.index)
+
+
+def filled_mask(series, min_length):
+    """Équivalent colonne de : bool(v) and len(str(v).strip()) > min_length"""
+    return is_truthy(series) & (as_text(series).str.strip().str.len() > min_length)
+
+
+class DuplicateIndex:
+    """
+    Index de détection des doublons utilisé pendant l'importation.
+
+    Reproduit exactement les décisions de Command.is_truly_duplicate sans
+    parcourir toute la table à chaque projet :
+    - les liens sont regroupés par (source, lien exact) ;
+    - les titres sont regroupés par (source, organisation normalisée), puis
+      filtrés par longueur et par un index de trigrammes avant le calcul
+      SequenceMatcher, qui reste le juge final.
+    L'ordre d'insertion est conservé pour renvoyer le même premier doublon
+    (et donc le même motif) que le parcours ligne à ligne.
+    """
+
+    NGRAM_SIZE = 3
+    MIN_LINK_LENGTH = 20
+    MIN_TITLE_LENGTH = 10
+
+    def __init__(self, normalize, similarity_threshold=0.98):
+        self.normalize = normalize
+        self.similarity_threshold = similarity_threshold
+        self.hashes = set()
+        self.link_buckets = {}
+        self.title_buckets = {}
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    @staticmethod
+    def _source_key(value):
+        return str(value).strip().upper()
+
+    @staticmethod
+    def _link_key(value):
+        return str(value).strip()
+
+    def _ngram_tokens(self, title):
+        """Trigrammes positionnels : (trigramme, n-ième occurrence)"""
+        seen = {}
+        tokens = []
+        for i in range(len(title) - self.NGRAM_SIZE + 1):
+            gram = title[i:i + self.NGRAM_SIZE]
+            occurrence = seen.get(gram, 0)
+            seen[gram] = occurrence + 1
+            tokens.append((gram, occurrence))
+        return tokens
+
+    def add(self, project):
+        """Ajoute un projet (dict, Series ou namedtuple converti) à l'index"""
+        position = self.size
+        self.size += 1
+
+        unique_hash = project.get('unique_hash')
+        if unique_hash is not None:
+            self.hashes.add(unique_hash)
+
+        source = self._source_key(project.get('source', ''))
+        link = self._link_key(project.get('additional_links', ''))
+        if len(link) > self.MIN_LINK_LENGTH:
+            self.link_buckets.setdefault((source, link), []).append(position)
+
+        org = self.normalize(project.get('organization', ''))
+        title = self.normalize(project.get('title', ''))
+        if not org or not title:
+            return
+
+        bucket = self.title_buckets.get((source, org))
+        if bucket is None:
+            bucket = {'entries': [], 'postings': {}}
+            self.title_buckets[(source, org)] = bucket
+
+        entry_id = len(bucket['entries'])
+        bucket['entries'].append((position, title))
+        for token in self._ngram_tokens(title):
+            bucket['postings'].setdefault(token, []).append(entry_id)
+
+    def add_dataframe(self, df):
+        """Indexe toutes les lignes d'un DataFrame de projets existants"""
+        columns = [c for c in ['title', 'source', 'additional_links', 'organization', 'unique_hash'] if c in df.columns]
+        for record in df[columns].to_dict('records'):
+            self.add(record)
+
+    def contains_hash(self, unique_hash):
+        return unique_hash in self.hashes
+
+    def _title_candidates(self, bucket, title, max_position):
+        """Retourne les entrées pouvant atteindre le seuil, triées par ordre d'insertion"""
+        threshold = self.similarity_threshold
+        entries = bucket['entries']
+        length = len(title)
+
+        if threshold <= 0:
+            return [entry for entry in entries if entry[0] < max_position]
+        if threshold > 1:
+            return []
+
+        # ratio = 2*M/(la+lb) <= 2*min(la,lb)/(la+lb) : fenêtre de longueurs admissibles
+        min_length = length * threshold / (2 - threshold) - 1e-9
+        max_length = length * (2 - threshold) / threshold + 1e-9
+
+        # Nombre maximal de caractères non appariés (dans les deux titres) compatible avec le seuil
+        max_unmatched = int((1 - threshold) * (length + int(max_length)) + 1e-9)
+        tokens = self._ngram_tokens(title)
+        required = len(tokens) - self.NGRAM_SIZE * max_unmatched
+
+        if required <= 0:
+            candidate_ids = range(len(entries))
+        else:
+            # Filtrage par préfixe : un candidat partage au moins un des
+            # (n - required + 1) trigrammes les plus rares du titre
+            postings = bucket['postings']
+            tokens.sort(key=lambda token: len(postings.get(token, ())))
+            candidate_ids = set()
+            for token in tokens[:len(tokens) - required + 1]:
+                candidate_ids.update(postings.get(token, ()))
+
+        candidates = []
+        for entry_id in candidate_ids:
+            position, existing_title = entries[entry_id]
+            if position < max_position and min_length <= len(existing_title) <= max_length:
+                candidates.append((position, existing_title))
+        candidates.sort()
+        return candidates
+
+    def find_duplicate(self, project):
+        """Retourne (True, motif) si le projet est un doublon évident, sinon (False, None)"""
+        if not self.size:
+            return False, None
+
+        source = self._source_key(project.get('source', ''))
+        link = self._link_key(project.get('additional_links', ''))
+
+        link_position = float('inf')
+        if link and len(link) > self.MIN_LINK_LENGTH:
+            positions = self.link_buckets.get((source, link))
+            if positions:
+                link_position = positions[0]
+
+        title = self.normalize(project.get('title', ''))
+        org = self.normalize(project.get('organization', ''))
+        if org and title and len(title) > self.MIN_TITLE_LENGTH:
+            bucket = self.title_buckets.get((source, org))
+            if bucket:
+                for _, existing_title in self._title_candidates(bucket, title, link_position):
+                    matcher = SequenceMatcher(None, title, existing_title)
+                    if matcher.quick_ratio() < self.similarity_threshold:
+                        continue
+                    title_similarity = matcher.ratio()
+                    if title_similarity >= self.similarity_threshold:
+                        return True, f"Titre très similaire ({title_similarity:.1%}) même source/org: '{existing_title[:50]}...'"
+
+        if link_position != float('inf'):
+            return True, f"Lien identique pour même source: {link[:50]}..."
+
+        return False, None
+
+
 class Command(BaseCommand):
     help = "Importation complète des projets GEF, GCF, OECD et Climate Funds Global dans le modèle Django ScrapedProject"
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        # Base et table issues de la configuration Django (plus de connexion séparée)
         self.DB_CONFIG = {
-            'user': 'root',
-            'password': '',
-            'host': 'localhost',
-            'port': '3306',
-            'database': 'richat_funding_db',
-            'main_table': 'main_app_scrapedproject',
-            'notification_table': 'main_app_projectalert'
+            'database': settings.DATABASES['default'].get('NAME', ''),
+            'main_table': ScrapedProject._meta.db_table,
         }
 
         self.SCRAPED_DATA_DIR = Path(settings.BASE_DIR) / 'scraped_data'
-        self.FICHIERS_PROJETS = [
-            self.SCRAPED_DATA_DIR / 'GEF_Mauritanie_Projects.xlsx',
-            self.SCRAPED_DATA_DIR / 'GCF_Mauritanie_Projects.xlsx',
-            self.SCRAPED_DATA_DIR / 'OECD_Mauritanie_Projects.xlsx',
-            self.SCRAPED_DATA_DIR / 'climate_funds_global.xlsx',
-        ]
+        # Fichiers sources : un chargeur par source (main_app/loaders.py)
+        self.LOADERS = get_loaders(self.SCRAPED_DATA_DIR)
 
         # Colonnes exactes du modèle Django ScrapedProject
         self.COLUMNS_IN_DB = [
@@ -55,6 +243,22 @@ class Command(BaseCommand):
             'unique_hash'
         ]
 
+        # Colonnes produites par le scraper (en-têtes des fichiers Excel) et sources associées
+        self.SCRAPER_COLUMNS = SCRAPER_COLUMNS
+        self.SCRAPER_SOURCES = {
+            'GEF': 'GEF',
+            'GCF': 'GCF',
+            'OECD': 'OTHER',  # OECD classé comme OTHER
+        }
+
+        # Champs mis à jour quand un hash existe déjà (upsert)
+        self.UPSERT_UPDATE_FIELDS = [
+            c for c in self.COLUMNS_IN_DB if c not in ('unique_hash', 'scraped_at')
+        ]
+
+        # Compteurs de la dernière exécution (enregistrés dans ScrapingSession par main_app/jobs.py)
+        self.run_stats = {'found': 0, 'saved': 0, 'updated': 0, 'errors': []}
+
     def add_arguments(self, parser):
         parser.add_argument(
             '--email-recipients',
@@ -73,6 +277,23 @@ class Command(BaseCommand):
             action='store_true',
             help='Forcer l\'importation même si des doublons sont détectés'
         )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            help='Nombre de projets écrits par requête INSERT (bulk upsert)',
+            default=500
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            help='Nombre de processus pour lire les fichiers en parallèle (défaut: nombre de CPU)',
+            default=None
+        )
+        parser.add_argument(
+            '--all-files',
+            action='store_true',
+            help='Relire aussi les fichiers inchangés depuis la dernière importation réussie'
+        )
         parser.add_argument(
             '--dry-run',
             action='store_true',
@@ -98,6 +319,10 @@ class Command(BaseCommand):
         dry_run = options.get('dry_run', False)
         skip_climate_funds = options.get('skip_climate_funds', False)
         climate_funds_only = options.get('climate_funds_only', False)
+        batch_size = options.get('batch_size', 500) or 500
+        workers = options.get('workers')
+        all_files = options.get('all_files', False)
+        self.run_stats = {'found': 0, 'saved': 0, 'updated': 0, 'errors': []}
         
         # Déterminer les sources à inclure
         include_climate_funds = not skip_climate_funds
@@ -135,41 +360,41 @@ class Command(BaseCommand):
             self.stdout.write(self.style.WARNING("⚠️ MODE FORCE - Importation même avec doublons"))
         self.stdout.write("=" * 90)
 
-        # Déterminer les fichiers à traiter
-        fichiers_a_traiter = []
-        
+        # Déterminer les sources à traiter
         if climate_funds_only:
-            # Seulement climate_funds_global.xlsx
-            fichiers_a_traiter = [f for f in self.FICHIERS_PROJETS if 'climate_funds_global' in f.name]
+            loaders = [loader for loader in self.LOADERS if loader.climate_funds]
         elif skip_climate_funds:
-            # Tous sauf climate_funds_global.xlsx
-            fichiers_a_traiter = [f for f in self.FICHIERS_PROJETS if 'climate_funds_global' not in f.name]
+            loaders = [loader for loader in self.LOADERS if not loader.climate_funds]
         else:
-            # Tous les fichiers
-            fichiers_a_traiter = self.FICHIERS_PROJETS.copy()
+            loaders = list(self.LOADERS)
 
-        # Afficher les chemins de fichiers pour debug
+        # Fichier retenu par source (export CSV/JSON s'il est à jour, sinon classeur Excel)
         self.stdout.write(f"📁 Répertoire de données: {self.SCRAPED_DATA_DIR}")
-        files_status = []
-        
-        for fichier in fichiers_a_traiter:
-            if fichier.exists():
-                size_mb = fichier.stat().st_size / (1024*1024)
-                status = f"✅ EXISTE ({size_mb:.1f}MB)"
-                files_status.append(True)
-            else:
-                status = "❌ MANQUANT"
-                files_status.append(False)
-            self.stdout.write(f"   • {fichier.name}: {status}")
+        fichiers_a_traiter = []
+        for loader in loaders:
+            fichier = loader.resolve()
+            if fichier is None:
+                self.stdout.write(f"   • {loader.workbook}: ❌ MANQUANT")
+                continue
+            size_mb = fichier.stat().st_size / (1024*1024)
+            self.stdout.write(f"   • {loader.workbook}: ✅ {fichier.name} ({size_mb:.1f}MB)")
+            fichiers_a_traiter.append((loader, fichier))
 
-        if not any(files_status):
+        if not fichiers_a_traiter:
             self.stdout.write(self.style.ERROR("❌ Aucun fichier source trouvé"))
+            self.run_stats['errors'].append("Aucun fichier source trouvé")
             return
 
         # Étape 1: Chargement et validation des fichiers
-        dfs = self.load_and_validate_files(fichiers_a_traiter)
+        dfs = self.load_and_validate_files(fichiers_a_traiter, workers=workers, all_files=all_files)
         if not dfs:
+            if self.unchanged_files and len(self.unchanged_files) == len(fichiers_a_traiter):
+                self.stdout.write(self.style.SUCCESS(
+                    "✅ Aucun fichier modifié depuis la dernière importation (--all-files pour tout relire)"
+                ))
+                return
             self.stdout.write(self.style.ERROR("❌ Aucun fichier valide trouvé"))
+            self.run_stats['errors'].append("Aucun fichier valide trouvé")
             return
 
         # Étape 2: Traitement des données avec gestion des DataFrames vides
@@ -177,12 +402,16 @@ class Command(BaseCommand):
             df_final = self.process_data(pd.concat(dfs, ignore_index=True))
         else:
             df_final = self.process_data(dfs[0])
+        self.run_stats['found'] = len(df_final)
         
         # Étape 3: Importation intelligente sans perte
         if dry_run:
             self.simulate_import(df_final, similarity_threshold)
         else:
-            new_projects = self.import_data_without_losing_projects(df_final, similarity_threshold, force_import)
+            errors_before = len(self.run_stats['errors'])
+            new_projects = self.import_data_without_losing_projects(df_final, similarity_threshold, force_import, batch_size)
+            if len(self.run_stats['errors']) == errors_before:
+                self.record_imported_files()
             
             # Étape 4: Notifications
             if new_projects > 0:
@@ -190,39 +419,54 @@ class Command(BaseCommand):
 
         self.stdout.write(self.style.SUCCESS("🎉 Collection terminée avec succès!"))
 
-    def load_and_validate_files(self, fichiers_a_traiter):
-        """Charge et valide les fichiers Excel avec support spécial pour Climate Funds"""
-        dfs = []
-        
-        for file_path in fichiers_a_traiter:
+    def load_and_validate_files(self, fichiers_a_traiter, workers=None, all_files=False):
+        """
+        Charge et valide les fichiers [(chargeur, chemin), ...] : les fichiers
+        inchangés depuis la dernière importation réussie sont ignorés (sauf
+        all_files), les autres sont lus en parallèle par read_files
+        """
+        self.loaded_files = []
+        self.unchanged_files = []
+
+        hashes = {}
+        for loader, file_path in fichiers_a_traiter:
             try:
-                if not file_path.exists():
-                    self.stdout.write(f"⚠️ Fichier introuvable: {file_path.name}")
-                    continue
+                hashes[file_path.name] = file_hash(file_path)
+            except OSError as e:
+                self.stdout.write(self.style.ERROR(f"❌ Erreur avec {file_path.name}: {str(e)}"))
+                self.run_stats['errors'].append(f"{file_path.name}: {e}")
 
-                self.stdout.write(f"📖 Lecture de {file_path.name}...")
-                
-                # Lire le fichier Excel
-                df = pd.read_excel(file_path, engine='openpyxl')
-                
+        imported = dict(ImportedFile.objects.filter(file_name__in=hashes).values_list('file_name', 'content_hash'))
+        a_lire = []
+        for loader, file_path in fichiers_a_traiter:
+            if file_path.name not in hashes:
+                continue
+            if not all_files and imported.get(file_path.name) == hashes[file_path.name]:
+                self.stdout.write(f"⏭️ {file_path.name} inchangé depuis la dernière importation, ignoré")
+                self.unchanged_files.append(file_path.name)
+                continue
+            a_lire.append((loader, file_path))
+
+        if not a_lire:
+            return None
+
+        self.stdout.write(f"📖 Lecture de {len(a_lire)} fichier(s)...")
+        dfs = []
+        for (loader, file_path), (df, error) in zip(a_lire, read_files(a_lire, workers)):
+            if error:
+                self.stdout.write(self.style.ERROR(f"❌ Erreur avec {file_path.name}: {error}"))
+                self.run_stats['errors'].append(f"{file_path.name}: {error}")
+                continue
+            try:
                 if df.empty:
                     self.stdout.write(f"⚠️ Fichier vide: {file_path.name}")
                     continue
 
-                # Déterminer la source et traitement spécial pour Climate Funds
-                if 'climate_funds_global' in file_path.name.lower():
-                    source = 'CLIMATE_FUND'
+                # Traitement spécial pour Climate Funds
+                if loader.climate_funds:
                     df = self.process_climate_funds_data(df)
-                elif 'GEF' in file_path.name.upper():
-                    source = 'GEF'
-                elif 'GCF' in file_path.name.upper():
-                    source = 'GCF'
-                elif 'OECD' in file_path.name.upper():
-                    source = 'OTHER'  # OECD classé comme OTHER
-                else:
-                    source = 'OTHER'  # Par défaut
-                    
-                df['source'] = source
+
+                df['source'] = loader.source
                 df['scraping_source'] = file_path.name
 
                 # Afficher les colonnes disponibles pour debug
@@ -230,16 +474,27 @@ class Command(BaseCommand):
 
                 df = self.prepare_dataframe(df)
                 dfs.append(df)
+                self.loaded_files.append((loader, file_path, hashes[file_path.name], len(df)))
                 self.stdout.write(self.style.SUCCESS(
-                    f"✅ {file_path.name} chargé ({len(df)} lignes) - Source: {source}"
+                    f"✅ {file_path.name} chargé ({len(df)} lignes) - Source: {loader.source}"
                 ))
 
             except Exception as e:
                 self.stdout.write(self.style.ERROR(f"❌ Erreur avec {file_path.name}: {str(e)}"))
+                self.run_stats['errors'].append(f"{file_path.name}: {e}")
                 continue
 
         return dfs if dfs else None
 
+    def record_imported_files(self):
+        """Enregistre l'empreinte des fichiers importés avec succès"""
+        now = timezone.now()
+        for loader, file_path, content_hash, rows in self.loaded_files:
+            ImportedFile.objects.update_or_create(
+                file_name=file_path.name,
+                defaults={'loader': loader.name, 'content_hash': content_hash, 'rows': rows, 'imported_at': now}
+            )
+
     def process_climate_funds_data(self, df):
         """Traitement spécial pour les données Climate Funds Global"""
         self.stdout.write("   🌍 Traitement spécial des fonds climatiques globaux...")
@@ -296,23 +551,14 @@ class Command(BaseCommand):
             
             amounts = []
             for col in amount_columns:
-                if col in row and pd.notna(row[col]) and str(row[col]).strip() != '':
-                    amount_str = str(row[col])
-                    # Chercher des patterns de montants
-                    amount_match = re.search(r'(\d+(?:[\.,]\d+)*)', amount_str.replace(',', ''))
-                    if amount_match:
-                        try:
-                            amounts.append((float(amount_match.group(1)), col))
-                        except ValueError:
-                            continue
+                # Devise et unité données par l'en-tête : "Pledge (USD mn)"
+                currency, unit = header_defaults(col)
+                amount = parse_amount(row.get(col), currency, unit)
+                if amount is not None:
+                    amounts.append(amount)
             
             if amounts:
-                max_amount, source_col = max(amounts, key=lambda x: x[0])
-                # Déterminer l'unité (millions ou unités)
-                if 'mn' in source_col.lower() or 'million' in source_col.lower():
-                    return f"USD {max_amount} Million"
-                else:
-                    return f"USD {max_amount:,.0f}"
+                return format_amount(max(amounts, key=lambda amount: convert(amount) or 0))
             return ""
         
         df['total_funding'] = df.apply(get_total_funding, axis=1)
@@ -446,56 +692,60 @@ class Command(BaseCommand):
         # Traitement spécial pour les montants de financement
         df = self.extract_funding_amount(df)
 
-        # Calculer le score de complétude
-        df['data_completeness_score'] = df.apply(self.calculate_completeness_score, axis=1)
+        # Calculer le score de complétude (par colonnes, voir calculate_completeness_score)
+        df['data_completeness_score'] = self.completeness_scores(df)
 
         # Déterminer si révision nécessaire
-        df['needs_review'] = df.apply(self.needs_review_check, axis=1)
+        df['needs_review'] = self.needs_review_flags(df)
 
         return df
 
     def extract_funding_amount(self, df):
-        """Extrait le montant numérique du financement à partir du texte"""
-        def parse_amount(funding_text):
-            if not funding_text or str(funding_text).lower() in ['', 'nan', 'none', 'null']:
-                return None
-            
-            # Nettoyer le texte
-            text = str(funding_text).upper()
-            
-            # Chercher des montants avec des patterns courants
-            patterns = [
-                r'(\d+(?:[\.,]\d+)*)\s*MILLION',  # X.X million
-                r'(\d+(?:[\.,]\d+)*)\s*M\s*USD',  # X.X M USD
-                r'(\d+(?:[\.,]\d+)*)\s*MUS',      # X.X MUS
-                r'USD\s*(\d+(?:[\.,]\d+)*)',      # USD X.X
-                r'\$\s*(\d+(?:[\.,]\d+)*)',       # $X.X
-                r'(\d+(?:[\.,]\d+)*)\s*USD',      # X.X USD
-                r'(\d+(?:[\.,]\d+)*)',            # Juste un nombre
-            ]
-            
-            for pattern in patterns:
-                match = re.search(pattern, text)
-                if match:
-                    try:
-                        amount_str = match.group(1).replace(',', '.')
-                        amount = float(amount_str)
-                        
-                        # Si le texte contient "million", multiplier par 1M
-                        if 'MILLION' in text or ' M ' in text:
-                            amount *= 1000000
-                        
-                        return amount
-                    except ValueError:
-                        continue
-            
-            return None
-
-        df['funding_amount'] = df['total_funding'].apply(parse_amount)
+        """
+        Extrait le montant numérique du financement à partir du texte, converti
+        dans la devise de référence (main_app/amounts.py), qui devient la devise
+        du projet : funding_amount et currency restent cohérents entre sources
+        """
+        df['funding_amount'] = self.parse_funding_amounts(df['total_funding'])
+        df['currency'] = base_currency()
         return df
 
+    def parse_funding_amounts(self, funding):
+        """Montants d'une colonne (chaque texte distinct n'est analysé qu'une fois), NaN si aucun"""
+        return funding_amounts(funding)
+
+    def parse_funding_amount(self, funding_text):
+        """Montant d'un texte de financement dans la devise de référence, None si aucun"""
+        amount = funding_amount(funding_text)
+        return float(amount) if amount is not None else None
+
+    def completeness_scores(self, df):
+        """
+        Scores de complétude de toutes les lignes, calculés par colonnes.
+        Même résultat que calculate_completeness_score ligne par ligne.
+        """
+        def filled_count(fields):
+            return sum(filled_mask(column_values(df, field, None), 3).astype(int) for field in fields)
+
+        required_count = filled_count(['title', 'description', 'organization', 'source'])
+        scores = (
+            np.where(column_values(df, 'source', None) == 'CLIMATE_FUND', 20, 0)
+            + required_count * 12.5
+            + filled_count(['total_funding', 'project_type', 'source_url']) * 10
+            + filled_count(['document_url', 'additional_links']) * 10
+        ).clip(upper=100)
+        if not required_count.any():
+            # Aucun champ obligatoire rempli : la version ligne à ligne ne produit que des entiers
+            return scores.astype('int64')
+        return scores.astype(float)
+
     def calculate_completeness_score(self, row):
-        """Calcule un score de complétude basé sur les champs remplis"""
+        """
+        Calcule un score de complétude basé sur les champs remplis.
+
+        Version de référence (ligne à ligne) : prepare_dataframe passe par
+        completeness_scores, qui doit donner exactement le même résultat.
+        """
         # Score de base plus élevé pour les fonds climatiques globaux
         if row.get('source') == 'CLIMATE_FUND':
             base_score = 20  # Les fonds globaux partent avec un bonus
@@ -526,8 +776,26 @@ class Command(BaseCommand):
         total_score = base_score + required_score + important_score + optional_score
         return min(total_score, 100)
 
+    def needs_review_flags(self, df):
+        """Version colonne de needs_review_check, même résultat"""
+        title = as_text(column_values(df, 'title')).str.strip()
+        lower_title = title.str.lower()
+        organization = column_values(df, 'organization')
+        review = (
+            (column_values(df, 'data_completeness_score', 0) < 40)
+            | (title.str.len() < 10)
+            | lower_title.isin(REVIEW_GENERIC_TITLES)
+            | ~(is_truthy(organization) & (as_text(organization).str.strip().str.len() >= 3))
+            | lower_title.str.contains('|'.join(REVIEW_SUSPICIOUS_KEYWORDS), regex=True)
+        )
+        return (review & (column_values(df, 'source', None) != 'CLIMATE_FUND')).astype(bool)
+
     def needs_review_check(self, row):
-        """Détermine si le projet nécessite une révision manuelle"""
+        """
+        Détermine si le projet nécessite une révision manuelle.
+
+        Version de référence (ligne à ligne), voir needs_review_flags.
+        """
         # Les fonds climatiques globaux nécessitent rarement une révision
         if row.get('source') == 'CLIMATE_FUND':
             return False
@@ -539,7 +807,7 @@ class Command(BaseCommand):
         
         # 2. Titre trop court ou générique
         title = str(row.get('title', '')).strip()
-        if len(title) < 10 or title.lower() in ['projet', 'project', 'untitled']:
+        if len(title) < 10 or title.lower() in REVIEW_GENERIC_TITLES:
             return True
         
         # 3. Pas d'organisation
@@ -547,15 +815,14 @@ class Command(BaseCommand):
             return True
         
         # 4. Mots-clés suspects dans le titre
-        suspicious_keywords = ['test', 'draft', 'template', 'example', 'sample']
-        if any(keyword in title.lower() for keyword in suspicious_keywords):
+        if any(keyword in title.lower() for keyword in REVIEW_SUSPICIOUS_KEYWORDS):
             return True
         
         return False
 
     def normalize_text_gentle(self, text):
         """Normalise le texte de manière douce pour comparaison"""
-        if not text or str(text).lower() in ['', 'nan', 'none', 'null']:
+        if not text or str(text).lower() in EMPTY_TEXTS:
             return ''
         
         text = str(text).strip().lower()
@@ -564,8 +831,36 @@ class Command(BaseCommand):
         text = re.sub(r'[^\w\s]', '', text)
         return text
 
+    def normalize_text_column(self, series):
+        """Version colonne de normalize_text_gentle"""
+        text = as_text(series)
+        empty = ~is_truthy(series) | text.str.lower().isin(EMPTY_TEXTS)
+        text = (
+            text.str.strip().str.lower()
+            .str.replace(r'\s+', ' ', regex=True)
+            .str.replace(r'[^\w\s]', '', regex=True)
+        )
+        return text.mask(empty, '')
+
+    def smart_hashes(self, df):
+        """
+        Hash de toutes les lignes (generate_smart_hash) : les clés sont
+        construites par colonnes, seul le MD5 reste calculé ligne à ligne
+        """
+        keys = self.normalize_text_column(column_values(df, 'title')).str.cat([
+            as_text(column_values(df, 'source')).str.strip().str.upper(),
+            self.normalize_text_column(column_values(df, 'organization')),
+            as_text(column_values(df, 'additional_links')).str.strip().str[:100],
+        ], sep='|')
+        return pd.Series(
+            [hashlib.md5(key.encode('utf-8')).hexdigest() for key in keys], index=df.index
+        )
+
     def generate_smart_hash(self, row):
-        """Génère un hash intelligent basé sur les champs les plus discriminants"""
+        """
+        Génère un hash intelligent basé sur les champs les plus discriminants
+        (un projet ; pour un DataFrame, smart_hashes donne le même résultat)
+        """
         # Utiliser les champs les plus fiables pour le hash
         key_fields = [
             self.normalize_text_gentle(row.get('title', '')),
@@ -578,8 +873,19 @@ class Command(BaseCommand):
         unique_string = '|'.join(key_fields)
         return hashlib.md5(unique_string.encode('utf-8')).hexdigest()
 
+    def build_duplicate_index(self, existing_projects_df, similarity_threshold=0.98):
+        """Construit l'index de doublons à partir des projets déjà en base"""
+        duplicate_index = DuplicateIndex(self.normalize_text_gentle, similarity_threshold)
+        duplicate_index.add_dataframe(existing_projects_df)
+        return duplicate_index
+
     def is_truly_duplicate(self, new_project, existing_projects_df, similarity_threshold=0.98):
-        """Vérifie si c'est un VRAI doublon avec seuil très strict"""
+        """
+        Vérifie si c'est un VRAI doublon avec seuil très strict.
+
+        Version de référence (parcours complet) : l'importation passe par
+        DuplicateIndex, qui doit rendre exactement les mêmes décisions.
+        """
         if existing_projects_df.empty:
             return False, None
         
@@ -638,7 +944,7 @@ class Command(BaseCommand):
                 df[col] = df[col].fillna('')
 
         # Générer le hash unique pour chaque projet/fonds
-        df['unique_hash'] = df.apply(self.generate_smart_hash, axis=1)
+        df['unique_hash'] = self.smart_hashes(df)
 
         # Ajouter les timestamps
         df['scraped_at'] = datetime.now()
@@ -675,27 +981,11 @@ class Command(BaseCommand):
         self.stdout.write("-" * 50)
         
         try:
-            # Connexion à la base de données
-            engine = create_engine(
-                f"mysql+pymysql://{self.DB_CONFIG['user']}:{self.DB_CONFIG['password']}@"
-                f"{self.DB_CONFIG['host']}:{self.DB_CONFIG['port']}/{self.DB_CONFIG['database']}"
-            )
-
             # Récupérer les projets existants
-            with engine.connect() as conn:
-                try:
-                    result = conn.execute(text(f"""
-                        SELECT title, source, organization, unique_hash 
-                        FROM {self.DB_CONFIG['main_table']}
-                        LIMIT 100
-                    """))
-                    
-                    columns = ['title', 'source', 'organization', 'unique_hash']
-                    existing_projects = pd.DataFrame(result.fetchall(), columns=columns)
-                except Exception:
-                    existing_projects = pd.DataFrame(columns=['title', 'source', 'organization', 'unique_hash'])
+            existing_projects = self.load_existing_projects()
 
             self.stdout.write(f"📋 {len(existing_projects)} projets déjà en base")
+            duplicate_index = self.build_duplicate_index(existing_projects, similarity_threshold)
             
             # Analyser les doublons potentiels par source
             new_count_by_source = {'GEF': 0, 'GCF': 0, 'OTHER': 0, 'CLIMATE_FUND': 0}
@@ -704,10 +994,10 @@ class Command(BaseCommand):
             for idx, (_, row) in enumerate(df.iterrows()):
                 source = row.get('source', 'OTHER')
                 
-                if row['unique_hash'] in existing_projects['unique_hash'].values:
+                if duplicate_index.contains_hash(row['unique_hash']):
                     duplicate_count_by_source[source] += 1
                 else:
-                    is_duplicate, _ = self.is_truly_duplicate(row, existing_projects, similarity_threshold)
+                    is_duplicate, _ = duplicate_index.find_duplicate(row)
                     if is_duplicate:
                         duplicate_count_by_source[source] += 1
                     else:
@@ -737,35 +1027,35 @@ class Command(BaseCommand):
         except Exception as e:
             self.stdout.write(self.style.ERROR(f"❌ Erreur simulation: {str(e)}"))
     
-    def create_project_alerts(self, new_projects_df):
-        """Créer des alertes pour les nouveaux projets"""
-        alerts_created = 0
-        high_priority_alerts = 0
-    
+    def create_alerts_for_projects(self, new_projects_df, batch_size=500):
+        """Crée en masse les alertes des projets importés qui n'en ont pas encore"""
+        from main_app.models import ProjectAlert
+
+        hashes = [h for h in new_projects_df['unique_hash'].dropna().unique().tolist() if h]
+
+        # Projets importés sans alerte, récupérés par lots de hash
+        scraped_projects = []
+        for i in range(0, len(hashes), batch_size):
+            scraped_projects.extend(
+                ScrapedProject.objects.filter(
+                    unique_hash__in=hashes[i:i + batch_size],
+                    alert__isnull=True
+                )
+            )
+
+        return ProjectAlert.create_from_scraped_projects(scraped_projects, batch_size=batch_size)
+
+    def create_project_alerts(self, new_projects_df, batch_size=500):
+        """Créer des alertes pour les nouveaux projets (requêtes groupées)"""
         try:
-            from main_app.models import ProjectAlert, ScrapedProject
-        
-            for _, row in new_projects_df.iterrows():
-                try:
-                    # Récupérer le projet scrapé depuis la base
-                    scraped_project = ScrapedProject.objects.get(unique_hash=row['unique_hash'])
-                
-                    # Vérifier qu'il n'y a pas déjà d'alerte pour ce projet
-                    if not hasattr(scraped_project, 'alert'):
-                        # Créer l'alerte
-                        alert = ProjectAlert.create_from_scraped_project(scraped_project)
-                        alerts_created += 1
-                    
-                        if alert.priority_level in ['high', 'urgent']:
-                            high_priority_alerts += 1
-                    
-                        self.stdout.write(f"   🔔 Alerte créée: {alert.title[:50]}... (Priorité: {alert.priority_level})")
-                
-                except ScrapedProject.DoesNotExist:
-                    continue
-                except Exception as e:
-                    self.stdout.write(f"   ⚠️ Erreur création alerte: {e}")
-                    continue
+            alerts = self.create_alerts_for_projects(new_projects_df, batch_size)
+            alerts_created = len(alerts)
+            high_priority_alerts = sum(1 for alert in alerts if alert.priority_level in ['high', 'urgent'])
+
+            for alert in alerts[:10]:
+                self.stdout.write(f"   🔔 Alerte créée: {alert.title[:50]}... (Priorité: {alert.priority_level})")
+            if alerts_created > 10:
+                self.stdout.write(f"   ... et {alerts_created - 10} autres alertes")
         
             if alerts_created > 0:
                 self.stdout.write(self.style.SUCCESS(f"✅ {alerts_created} alertes créées ({high_priority_alerts} haute priorité)"))
@@ -780,160 +1070,261 @@ class Command(BaseCommand):
             return 0
 
     def send_project_alerts_email(self, total_alerts, high_priority_count):
-        """Envoyer un email de notification pour les nouvelles alertes"""
+        """Programmer l'email de notification des nouvelles alertes (tâche en arrière-plan)"""
         try:
-            from django.core.mail import send_mail
-            from django.conf import settings
-            from main_app.models import ProjectAlert, CustomUser
-        
-            # Récupérer les alertes récentes
-            recent_alerts = ProjectAlert.objects.filter(
-                status='active',
-                alert_created_at__gte=timezone.now() - timedelta(hours=1)
-            ).order_by('-priority_level', '-alert_created_at')[:10]
-        
-            # Construire le message email
-            subject = f"🔔 {total_alerts} nouveau{'x' if total_alerts > 1 else ''} projet{'s' if total_alerts > 1 else ''} de financement climatique détecté{'s' if total_alerts > 1 else ''}"
-        
-            message_parts = [
-                "🌍 NOUVELLES OPPORTUNITÉS DE FINANCEMENT CLIMATIQUE",
-                "=" * 60,
-                f"📊 Total nouveaux projets: {total_alerts}",
-                f"🔥 Haute priorité: {high_priority_count}",
-                f"📅 Détectés le: {timezone.now().strftime('%d/%m/%Y à %H:%M')}",
-                "",
-                "📋 APERÇU DES NOUVEAUX PROJETS:",
-                "-" * 40
-            ]
+            from main_app.tasks import send_project_alerts_email
+
+            send_project_alerts_email.delay(total_alerts, high_priority_count)
+            self.stdout.write("📧 Email d'alerte programmé")
+        except Exception as e:
+            self.stdout.write(f"⚠️ Erreur envoi email alertes: {e}")
+
+    def load_existing_projects(self):
+        """Charge les champs utiles à la détection des doublons via l'ORM"""
+        columns = ['title', 'source', 'additional_links', 'organization', 'unique_hash']
+        rows = ScrapedProject.objects.values_list(*columns).iterator(chunk_size=5000)
+        return pd.DataFrame.from_records(list(rows), columns=columns)
+
+    def build_scraped_project(self, record):
+        """Convertit une ligne du DataFrame en instance ScrapedProject (non sauvegardée)"""
+        values = {}
+        for name in self.COLUMNS_IN_DB:
+            if name not in record or name in ('scraped_at', 'last_updated'):
+                continue
+
+            field = ScrapedProject._meta.get_field(name)
+            value = record[name]
+            if value is None or (not isinstance(value, str) and pd.isna(value)):
+                values[name] = None if field.null else field.get_default()
+                continue
+
+            if isinstance(field, models.DecimalField):
+                try:
+                    value = Decimal(str(value)).quantize(Decimal('0.01'))
+                except (InvalidOperation, ValueError):
+                    value = None
+                # Hors limites de la colonne: on garde le texte brut dans total_funding
+                if value is not None and abs(value) >= Decimal(10) ** (field.max_digits - field.decimal_places):
+                    value = None
+            elif isinstance(field, models.BooleanField):
+                if isinstance(value, str):
+                    value = value.strip().lower() in ('true', '1', 'yes', 'oui')
+                else:
+                    value = bool(value)
+            elif isinstance(field, models.IntegerField):
+                try:
+                    value = int(value)
+                except (TypeError, ValueError):
+                    value = field.get_default()
+            else:
+                value = str(value)
+                if field.max_length:
+                    value = value[:field.max_length]
+
+            values[name] = value
+
+        return ScrapedProject(**values)
+
+    def bulk_upsert_projects(self, projects_df, batch_size=500):
+        """
+        Écrit les projets avec bulk_create(update_conflicts=True) sur unique_hash,
+        par lots de `batch_size`, dans une seule transaction.
+
+        Retourne le nombre de lignes insérées, mises à jour et ignorées.
+        """
+        # Un même hash ne peut être écrit qu'une fois par requête: on garde la dernière version
+        objects_by_hash = {}
+        skipped = 0
+        for record in projects_df.to_dict('records'):
+            project = self.build_scraped_project(record)
+            if not project.unique_hash:
+                skipped += 1
+                continue
+            if project.unique_hash in objects_by_hash:
+                skipped += 1
+            objects_by_hash[project.unique_hash] = project
+
+        objects = list(objects_by_hash.values())
+        if not objects:
+            return {'inserted': 0, 'updated': 0, 'skipped': skipped}
+
+        update_fields = [
+            f for f in self.UPSERT_UPDATE_FIELDS
+            if f == 'last_updated' or f in projects_df.columns
+        ]
+        # MySQL (ON DUPLICATE KEY UPDATE) n'accepte pas de colonnes cibles explicites
+        unique_fields = ['unique_hash'] if connection.features.supports_update_conflicts_with_target else None
+        # Les demandes qui contiennent un projet mis à jour voient leurs agrégats recalculés
+        refresh_requests = bool({'funding_amount', 'data_completeness_score'} & set(update_fields))
+
+        inserted = updated = 0
+        with transaction.atomic():
+            for i in range(0, len(objects), batch_size):
+                batch = objects[i:i + batch_size]
+                hashes = [p.unique_hash for p in batch]
+                existing = set(
+                    ScrapedProject.objects.filter(unique_hash__in=hashes).values_list('unique_hash', flat=True)
+                )
+
+                ScrapedProject.objects.bulk_create(
+                    batch,
+                    update_conflicts=True,
+                    unique_fields=unique_fields,
+                    update_fields=update_fields,
+                )
+                # bulk_create ne déclenche pas les signaux : index de recherche mis à jour ici
+                search.index_queryset(ScrapedProject.objects.filter(unique_hash__in=hashes))
+                if existing and refresh_requests:
+                    linked = ProjectRequest.objects.filter(projects__unique_hash__in=existing).distinct()
+                    for project_request in linked:
+                        project_request.refresh_project_aggregates()
+                updated += len(existing)
+                inserted += len(batch) - len(existing)
+                self.stdout.write(f"   ✅ {i + len(batch)}/{len(objects)} éléments écrits...")
+
+        return {'inserted': inserted, 'updated': updated, 'skipped': skipped}
+
+    def split_new_projects(self, df, duplicate_index, force_import=False):
+        """
+        Sépare les nouveaux projets des doublons évidents. Les projets retenus
+        sont ajoutés à l'index pour éviter les doublons internes au lot.
+
+        Retourne (nouveaux projets, doublons (titre, motif, source), stats par source).
+        """
+        truly_new_projects = []
+        potential_duplicates = []
+        stats_by_source = {'GEF': {'new': 0, 'duplicate': 0}, 'GCF': {'new': 0, 'duplicate': 0}, 
+                         'OTHER': {'new': 0, 'duplicate': 0}, 'CLIMATE_FUND': {'new': 0, 'duplicate': 0}}
         
-            for i, alert in enumerate(recent_alerts[:5], 1):
-                priority_indicator = {
-                    'urgent': '🚨',
-                    'high': '🔥',
-                    'medium': '📋',
-                    'low': '📝'
-                }.get(alert.priority_level, '📋')
+        self.stdout.write("🔍 Analyse des doublons par source...")
+        for idx, (_, row) in enumerate(df.iterrows()):
+            source = row.get('source', 'OTHER')
+            stats = stats_by_source.setdefault(source, {'new': 0, 'duplicate': 0})
             
-                message_parts.extend([
-                    f"{i}. {priority_indicator} [{alert.get_source_display()}] {alert.title[:80]}",
-                    f"   💰 Financement: {alert.total_funding}",
-                    f"   🏢 Organisation: {alert.organization}",
-                    f"   📊 Score qualité: {alert.data_completeness_score}%",
-                    f"   🎯 Priorité: {alert.get_priority_level_display()}",
-                    ""
-                ])
-        
-            if len(recent_alerts) > 5:
-                message_parts.append(f"... et {len(recent_alerts) - 5} autres projets")
-        
-            message_parts.extend([
-                "",
-                "🎯 ACTIONS RECOMMANDÉES:",
-                "• Consulter les nouvelles alertes dans l'interface admin",
-                "• Évaluer les opportunités haute priorité en premier",
-                "• Vérifier les critères d'éligibilité pour la Mauritanie",
-                "• Préparer les dossiers de candidature",
-                "",
-                "💻 ACCÈS RAPIDE:",
-                "• Interface admin: /admin/main_app/projectalert/",
-                "• Page alertes: /suivez-appels",
-                "• API alertes: /api/project-alerts/",
-                "",
-                f"Système automatique de veille - {timezone.now().strftime('%d/%m/%Y %H:%M')}",
-                "Pour modifier vos préférences de notification, contactez l'administrateur."
-            ])
-        
-            full_message = "\n".join(message_parts)
-        
-            # Récupérer les destinataires (tous les admins actifs)
-            recipients = list(CustomUser.objects.filter(
-                role='admin', 
-                actif=True,
-                email__isnull=False
-            ).exclude(email='').values_list('email', flat=True))
-        
-            if recipients:
-                send_mail(
-                    subject=subject,
-                    message=full_message,
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=recipients,
-                    fail_silently=False
-                )
+            # Vérification 1: Hash identique (très fiable)
+            if not force_import and duplicate_index.contains_hash(row['unique_hash']):
+                potential_duplicates.append((row['title'][:50], "Hash identique", source))
+                stats['duplicate'] += 1
+                continue
             
-                # Marquer les alertes comme ayant été envoyées par email
-                recent_alerts.update(
-                    email_sent=True,
-                    email_sent_at=timezone.now()
-                )
+            # Vérification 2: Doublon VRAIMENT évident
+            if not force_import:
+                is_duplicate, reason = duplicate_index.find_duplicate(row)
+                if is_duplicate:
+                    potential_duplicates.append((row['title'][:50], reason, source))
+                    stats['duplicate'] += 1
+                    continue
             
-                self.stdout.write(f"📧 Email d'alerte envoyé à {len(recipients)} destinataire(s)")
-        
-        except Exception as e:
-            self.stdout.write(f"⚠️ Erreur envoi email alertes: {e}")
-        
-    def import_data_without_losing_projects(self, df, similarity_threshold, force_import=False):
-        """Importe les données en évitant les doublons SANS perdre de projets légitimes"""
-        try:
-            # Connexion à la base de données
-            engine = create_engine(
-                f"mysql+pymysql://{self.DB_CONFIG['user']}:{self.DB_CONFIG['password']}@"
-                f"{self.DB_CONFIG['host']}:{self.DB_CONFIG['port']}/{self.DB_CONFIG['database']}"
+            # Si aucune preuve claire de doublon, on garde le projet
+            truly_new_projects.append(row)
+            stats['new'] += 1
+            
+            # Ajouter à l'index pour éviter les doublons internes au lot
+            duplicate_index.add(row)
+            
+            # Afficher le progrès
+            if (idx + 1) % 50 == 0:
+                self.stdout.write(f"   🔍 Vérifié {idx + 1}/{len(df)} éléments...")
+
+        return truly_new_projects, potential_duplicates, stats_by_source
+
+    def records_to_dataframe(self, records):
+        """
+        Convertit des enregistrements du scraper (colonnes Titre, Lien, ...
+        comme dans les fichiers Excel) en DataFrame préparé, source par source,
+        exactement comme load_and_validate_files le ferait après lecture du fichier.
+        """
+        records_by_source = {}
+        for record in records:
+            records_by_source.setdefault(str(record.get('source', '')).upper(), []).append(record)
+
+        dfs = []
+        for scraper_source, source_records in records_by_source.items():
+            df = pd.DataFrame(source_records)
+            df = df[[c for c in self.SCRAPER_COLUMNS if c in df.columns]]
+            df['source'] = self.SCRAPER_SOURCES.get(scraper_source, 'OTHER')
+            df['scraping_source'] = f"{scraper_source}_Mauritanie_Projects.xlsx"
+            dfs.append(self.prepare_dataframe(df))
+
+        return pd.concat(dfs, ignore_index=True) if dfs else pd.DataFrame()
+
+    def import_project_records(self, record_batches, similarity_threshold=0.98, force_import=False, batch_size=500):
+        """
+        Pipeline direct scraper → base, sans fichier Excel intermédiaire.
+
+        Chaque lot d'enregistrements passe par les mêmes étapes que les fichiers
+        (préparation, score, doublons, upsert, alertes) dès sa réception ; l'index
+        des doublons est construit une fois et conservé d'un lot à l'autre.
+        """
+        from main_app.models import ProjectAlert
+
+        self.stdout.write(f"\n💾 Import direct dans la base Django: {self.DB_CONFIG['database']} ({connection.vendor})")
+        existing_projects = self.load_existing_projects()
+        self.stdout.write(f"🔍 {len(existing_projects)} projets existants dans la base")
+        duplicate_index = self.build_duplicate_index(existing_projects, similarity_threshold)
+
+        totals = {'received': 0, 'inserted': 0, 'updated': 0, 'skipped': 0, 'duplicates': 0, 'alerts': 0, 'high_priority': 0}
+        for records in record_batches:
+            if not records:
+                continue
+            totals['received'] += len(records)
+
+            df = self.process_data(self.records_to_dataframe(records))
+            new_rows, duplicates, _ = self.split_new_projects(df, duplicate_index, force_import)
+            totals['duplicates'] += len(duplicates)
+            if not new_rows:
+                continue
+
+            new_projects_df = pd.DataFrame(new_rows)
+            try:
+                write_stats = self.bulk_upsert_projects(new_projects_df, batch_size)
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f"❌ Lot annulé: {str(e)}"))
+                self.run_stats['errors'].append(f"Lot annulé: {e}")
+                totals['skipped'] += len(new_projects_df)
+                continue
+            for key in ('inserted', 'updated', 'skipped'):
+                totals[key] += write_stats[key]
+
+            alerts = self.create_alerts_for_projects(new_projects_df, batch_size)
+            totals['alerts'] += len(alerts)
+            totals['high_priority'] += sum(1 for alert in alerts if alert.priority_level in ['high', 'urgent'])
+
+            self.stdout.write(
+                f"   📥 Lot importé: {write_stats['inserted']} insérés, {write_stats['updated']} mis à jour, "
+                f"{len(duplicates)} doublons évités"
             )
 
-            self.stdout.write(f"\n💾 Connexion à la base de données: {self.DB_CONFIG['database']}")
+        self.stdout.write(f"\n📊 RAPPORT IMPORT DIRECT:")
+        self.stdout.write(f"   📦 Reçus du scraper: {totals['received']}")
+        self.stdout.write(f"   🆕 Insérés: {totals['inserted']} | 🔄 Mis à jour: {totals['updated']} | ⏭️ Ignorés: {totals['skipped'] + totals['duplicates']}")
+        self.stdout.write(f"   🔔 Alertes créées: {totals['alerts']} ({totals['high_priority']} haute priorité)")
+
+        if totals['alerts'] > 0:
+            self.send_project_alerts_email(totals['alerts'], totals['high_priority'])
+        if totals['inserted'] + totals['updated'] > 0:
+            self.generate_import_statistics(totals['inserted'] + totals['updated'], totals['alerts'])
+
+        # Les écritures en masse ne déclenchent pas les signaux: invalider le cache des tableaux de bord
+        invalidate_stats()
+
+        return totals
+
+    def import_data_without_losing_projects(self, df, similarity_threshold, force_import=False, batch_size=500):
+        """Importe les données en évitant les doublons SANS perdre de projets légitimes"""
+        try:
+            self.stdout.write(f"\n💾 Base de données Django: {self.DB_CONFIG['database']} ({connection.vendor})")
 
             # Récupérer tous les projets existants
-            with engine.connect() as conn:
-                try:
-                    result = conn.execute(text(f"""
-                        SELECT title, source, additional_links, organization, unique_hash 
-                        FROM {self.DB_CONFIG['main_table']}
-                    """))
-                    
-                    columns = ['title', 'source', 'additional_links', 'organization', 'unique_hash']
-                    existing_projects = pd.DataFrame(result.fetchall(), columns=columns)
-                except Exception as e:
-                    self.stdout.write(f"⚠️ Table {self.DB_CONFIG['main_table']} vide ou problème: {e}")
-                    existing_projects = pd.DataFrame(columns=['title', 'source', 'additional_links', 'organization', 'unique_hash'])
+            existing_projects = self.load_existing_projects()
 
             self.stdout.write(f"🔍 {len(existing_projects)} projets existants dans la base")
+            duplicate_index = self.build_duplicate_index(existing_projects, similarity_threshold)
 
             # Analyser chaque projet pour déterminer s'il est nouveau
-            truly_new_projects = []
-            potential_duplicates = []
-            stats_by_source = {'GEF': {'new': 0, 'duplicate': 0}, 'GCF': {'new': 0, 'duplicate': 0}, 
-                             'OTHER': {'new': 0, 'duplicate': 0}, 'CLIMATE_FUND': {'new': 0, 'duplicate': 0}}
-            
-            self.stdout.write("🔍 Analyse des doublons par source...")
-            for idx, (_, row) in enumerate(df.iterrows()):
-                source = row.get('source', 'OTHER')
-                
-                # Vérification 1: Hash identique (très fiable)
-                if not force_import and row['unique_hash'] in existing_projects['unique_hash'].values:
-                    potential_duplicates.append((row['title'][:50], "Hash identique", source))
-                    stats_by_source[source]['duplicate'] += 1
-                    continue
-                
-                # Vérification 2: Doublon VRAIMENT évident
-                if not force_import:
-                    is_duplicate, reason = self.is_truly_duplicate(row, existing_projects, similarity_threshold)
-                    if is_duplicate:
-                        potential_duplicates.append((row['title'][:50], reason, source))
-                        stats_by_source[source]['duplicate'] += 1
-                        continue
-                
-                # Si aucune preuve claire de doublon, on garde le projet
-                truly_new_projects.append(row)
-                stats_by_source[source]['new'] += 1
-                
-                # Ajouter temporairement à la liste pour éviter doublons internes
-                new_row_df = pd.DataFrame([row[['title', 'source', 'additional_links', 'organization', 'unique_hash']]])
-                existing_projects = pd.concat([existing_projects, new_row_df], ignore_index=True)
-                
-                # Afficher le progrès
-                if (idx + 1) % 50 == 0:
-                    self.stdout.write(f"   🔍 Vérifié {idx + 1}/{len(df)} éléments...")
+            truly_new_projects, potential_duplicates, stats_by_source = self.split_new_projects(
+                df, duplicate_index, force_import
+            )
             
             # Afficher les résultats de l'analyse par source
             self.stdout.write(f"\n📊 RÉSULTATS PAR SOURCE:")
@@ -1001,54 +1392,25 @@ class Command(BaseCommand):
                     if len(source_df) > 3:
                         self.stdout.write(f"   ... et {len(source_df) - 3} autres éléments")
 
-            # Préparer les colonnes pour l'insertion
-            cols_to_insert = [c for c in self.COLUMNS_IN_DB if c in new_projects_df.columns]
-            df_to_insert = new_projects_df[cols_to_insert]
-
-            self.stdout.write(f"\n💾 Importation de {len(df_to_insert)} éléments...")
+            self.stdout.write(f"\n💾 Importation de {len(new_projects_df)} éléments (lots de {batch_size})...")
 
-            # Insérer tous les nouveaux éléments par batches pour optimiser
-            success_count = 0
+            # Écriture groupée (upsert sur unique_hash) dans une seule transaction
             errors = []
-            batch_size = 10
-
-            for i in range(0, len(df_to_insert), batch_size):
-                batch = df_to_insert.iloc[i:i+batch_size]
-                
-                try:
-                    # Insérer le batch
-                    batch.to_sql(
-                        name=self.DB_CONFIG['main_table'],
-                        con=engine,
-                        if_exists='append',
-                        index=False,
-                        method='multi'
-                    )
-                    success_count += len(batch)
-                    
-                    if success_count % 20 == 0:
-                        self.stdout.write(f"   ✅ {success_count}/{len(df_to_insert)} éléments importés...")
-
-                except Exception as e:
-                    # Si le batch échoue, essayer individuellement
-                    for idx, (_, row) in batch.iterrows():
-                        try:
-                            row.to_frame().T.to_sql(
-                                name=self.DB_CONFIG['main_table'],
-                                con=engine,
-                                if_exists='append',
-                                index=False
-                            )
-                            success_count += 1
-                        except Exception as individual_error:
-                            error_msg = f"Élément '{row.get('title', 'UNKNOWN')[:30]}...': {str(individual_error)}"
-                            errors.append(error_msg)
+            try:
+                write_stats = self.bulk_upsert_projects(new_projects_df, batch_size)
+            except Exception as e:
+                errors.append(f"Transaction annulée: {str(e)}")
+                write_stats = {'inserted': 0, 'updated': 0, 'skipped': len(new_projects_df)}
+            success_count = write_stats['inserted'] + write_stats['updated']
+            self.run_stats['saved'] = write_stats['inserted']
+            self.run_stats['updated'] = write_stats['updated']
+            self.run_stats['errors'].extend(errors)
 
             # Créer des alertes pour les nouveaux projets importés
             alerts_created = 0
             if success_count > 0:
                 try:
-                    alerts_created = self.create_project_alerts(new_projects_df)
+                    alerts_created = self.create_project_alerts(new_projects_df, batch_size)
                 except Exception as e:
                     self.stdout.write(f"⚠️ Erreur lors de la création des alertes: {e}")
 
@@ -1058,6 +1420,7 @@ class Command(BaseCommand):
             total_duplicates = len(potential_duplicates)
             
             self.stdout.write(f"   ✅ Éléments collectés avec succès: {success_count}")
+            self.stdout.write(f"   🆕 Insérés: {write_stats['inserted']} | 🔄 Mis à jour: {write_stats['updated']} | ⏭️ Ignorés: {write_stats['skipped'] + total_duplicates}")
             self.stdout.write(f"   ⚠️ Doublons évidents évités: {total_duplicates}")
             self.stdout.write(f"   🔔 Alertes créées: {alerts_created}")
             self.stdout.write(f"   📈 Taux de réussite: {success_count}/{total_processed} ({success_count/total_processed*100:.1f}%)")
@@ -1083,57 +1446,51 @@ class Command(BaseCommand):
 
             # Statistiques finales
             if success_count > 0:
-                self.generate_import_statistics(engine, success_count, alerts_created)
+                self.generate_import_statistics(success_count, alerts_created)
+
+            # Les écritures en masse ne déclenchent pas les signaux: invalider le cache des tableaux de bord
+            invalidate_stats()
 
-            return success_count
+            return write_stats['inserted']
 
         except Exception as e:
             self.stdout.write(self.style.ERROR(f"❌ Erreur de collection: {str(e)}"))
+            self.run_stats['errors'].append(f"Erreur de collection: {e}")
             import traceback
             traceback.print_exc()
             return 0
 
-    def generate_import_statistics(self, engine, new_count, alerts_count=0):
+    def generate_import_statistics(self, new_count, alerts_count=0):
         """Génère des statistiques après importation avec alertes"""
         try:
-            with engine.connect() as conn:
-                # Statistiques globales
-                result = conn.execute(text(f"SELECT COUNT(*) FROM {self.DB_CONFIG['main_table']}"))
-                total_count = result.fetchone()[0]
-            
-                # Par source avec noms explicites
-                result = conn.execute(text(f"""
-                    SELECT source, COUNT(*) as count, AVG(data_completeness_score) as avg_score
-                    FROM {self.DB_CONFIG['main_table']} 
-                    GROUP BY source
-                    """))
-                source_stats = result.fetchall()
-            
-                # Projets récents (dernières 24h)
-                result = conn.execute(text(f"""
-                    SELECT COUNT(*) FROM {self.DB_CONFIG['main_table']} 
-                    WHERE scraped_at >= DATE_SUB(NOW(), INTERVAL 24 HOUR)
-                    """))
-                recent_count = result.fetchone()[0]
-            
-                # Statistiques spéciales pour Climate Funds
-                result = conn.execute(text(f"""
-                    SELECT COUNT(*) FROM {self.DB_CONFIG['main_table']} 
-                    WHERE source = 'CLIMATE_FUND'
-                    """))
-                climate_funds_count = result.fetchone()[0]
-            
-                # Statistiques des alertes si le modèle existe
-                try:
-                    from main_app.models import ProjectAlert
-                    active_alerts = ProjectAlert.objects.filter(status='active').count()
-                    high_priority_alerts = ProjectAlert.objects.filter(
-                        status='active',
-                        priority_level__in=['high', 'urgent']
-                    ).count()
-                except:
-                    active_alerts = 0
-                    high_priority_alerts = 0
+            # Statistiques globales
+            total_count = ScrapedProject.objects.count()
+
+            # Par source avec noms explicites
+            source_stats = ScrapedProject.objects.values_list('source').annotate(
+                count=Count('id'),
+                avg_score=Avg('data_completeness_score')
+            ).order_by('source')
+
+            # Projets récents (dernières 24h)
+            recent_count = ScrapedProject.objects.filter(
+                scraped_at__gte=timezone.now() - timedelta(hours=24)
+            ).count()
+
+            # Statistiques spéciales pour Climate Funds
+            climate_funds_count = ScrapedProject.objects.filter(source='CLIMATE_FUND').count()
+
+            # Statistiques des alertes si le modèle existe
+            try:
+                from main_app.models import ProjectAlert
+                active_alerts = ProjectAlert.objects.filter(status='active').count()
+                high_priority_alerts = ProjectAlert.objects.filter(
+                    status='active',
+                    priority_level__in=['high', 'urgent']
+                ).count()
+            except:
+                active_alerts = 0
+                high_priority_alerts = 0
 
             self.stdout.write(f"\n📈 STATISTIQUES POST-IMPORTATION:")
             self.stdout.write(f"   📊 Total en base: {total_count} éléments")
@@ -1166,30 +1523,17 @@ class Command(BaseCommand):
             
             # Récupérer quelques statistiques pour l'email
             try:
-                engine = create_engine(
-                    f"mysql+pymysql://{self.DB_CONFIG['user']}:{self.DB_CONFIG['password']}@"
-                    f"{self.DB_CONFIG['host']}:{self.DB_CONFIG['port']}/{self.DB_CONFIG['database']}"
+                total_count = ScrapedProject.objects.count()
+
+                source_counts = dict(
+                    ScrapedProject.objects.filter(
+                        scraped_at__gte=timezone.now() - timedelta(hours=24)
+                    ).values_list('source').annotate(count=Count('id')).order_by('source')
                 )
-                
-                with engine.connect() as conn:
-                    result = conn.execute(text(f"SELECT COUNT(*) FROM {self.DB_CONFIG['main_table']}"))
-                    total_count = result.fetchone()[0]
-                    
-                    result = conn.execute(text(f"""
-                        SELECT source, COUNT(*) as count 
-                        FROM {self.DB_CONFIG['main_table']} 
-                        WHERE scraped_at >= DATE_SUB(NOW(), INTERVAL 24 HOUR)
-                        GROUP BY source
-                    """))
-                    source_counts = dict(result.fetchall())
-                    
-                    # Compter spécifiquement les Climate Funds
-                    result = conn.execute(text(f"""
-                        SELECT COUNT(*) FROM {self.DB_CONFIG['main_table']} 
-                        WHERE source = 'CLIMATE_FUND'
-                    """))
-                    climate_funds_total = result.fetchone()[0]
-                    
+
+                # Compter spécifiquement les Climate Funds
+                climate_funds_total = ScrapedProject.objects.filter(source='CLIMATE_FUND').count()
+
             except Exception:
                 total_count = "N/A"
                 source_counts = {}
@@ -1284,15 +1628,10 @@ Date: {datetime.now().strftime('%d/%m/%Y %H:%M')}
 Base: {self.DB_CONFIG['database']} - Table: {self.DB_CONFIG['main_table']}
                 """
 
-            send_mail(
-                subject=subject,
-                message=message,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=recipients,
-                fail_silently=False
-            )
+            # Envoi SMTP en arrière-plan, avec retries
+            send_email.delay(subject, message, list(recipients))
             
-            self.stdout.write(f"📧 Email envoyé à {len(recipients)} destinataire(s)")
+            self.stdout.write(f"📧 Email programmé pour {len(recipients)} destinataire(s)")
             
         except Exception as e:
             self.stdout.write(f"⚠️ Échec envoi email: {str(e)}")
@@ -1356,6 +1695,168 @@ def run_climate_funds_only():
     options = MockOptions()
     command.handle(options=options)
 
+def run_dedupe_benchmark(sizes=(1000, 10000, 100000), incoming=1000, similarity_threshold=0.98, verify=True, seed=42):
+    """
+    Mesure le temps de détection des doublons selon la taille de la base.
+
+    Génère des projets synthétiques (quelques organisations par source, titres
+    proches, liens partagés), puis chronomètre la construction de l'index et
+    l'analyse de `incoming` nouveaux projets. Avec verify=True, les décisions
+    sont comparées à is_truly_duplicate sur la plus petite taille.
+    """
+    import random
+    import time
+
+    rng = random.Random(seed)
+    command = Command()
+    vocabulary = [
+        'climate', 'resilience', 'adaptation', 'mauritania', 'water', 'energy', 'solar',
+        'sahel', 'coastal', 'nouakchott', 'agriculture', 'drought', 'programme', 'fund',
+        'biodiversity', 'forest', 'management', 'community', 'renewable', 'capacity',
+    ]
+    sources = ['GEF', 'GCF', 'OTHER', 'CLIMATE_FUND']
+    organizations = [f'Organisation {i}' for i in range(20)]
+
+    def random_project(i):
+        title = ' '.join(rng.choice(vocabulary) for _ in range(rng.randint(4, 10)))
+        return {
+            'title': f'{title} {i}',
+            'source': rng.choice(sources),
+            'organization': rng.choice(organizations),
+            'additional_links': f'https://example.org/projects/{i}',
+        }
+
+    def with_hash(project):
+        project['unique_hash'] = command.generate_smart_hash(project)
+        return project
+
+    def near_copy(project):
+        copy = dict(project)
+        title = copy['title']
+        position = rng.randrange(len(title))
+        copy['title'] = title[:position] + rng.choice('abcdefghij') + title[position + 1:]
+        copy['additional_links'] = ''
+        return with_hash(copy)
+
+    print(f"⏱️ Benchmark doublons ({incoming} nouveaux projets, seuil {similarity_threshold})")
+    results = []
+    for size in sizes:
+        existing = [with_hash(random_project(i)) for i in range(size)]
+        new_projects = []
+        for j in range(incoming):
+            kind = rng.random()
+            if kind < 0.3:
+                new_projects.append(near_copy(rng.choice(existing)))
+            elif kind < 0.4:
+                link_copy = dict(rng.choice(existing))
+                link_copy['title'] = f"renamed {link_copy['title']}"
+                new_projects.append(with_hash(link_copy))
+            else:
+                new_projects.append(with_hash(random_project(size + j)))
+
+        existing_df = pd.DataFrame(existing)
+        started = time.perf_counter()
+        duplicate_index = command.build_duplicate_index(existing_df, similarity_threshold)
+        build_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        decisions = []
+        for project in new_projects:
+            if duplicate_index.contains_hash(project['unique_hash']):
+                decisions.append((True, 'Hash identique'))
+                continue
+            decision = duplicate_index.find_duplicate(project)
+            decisions.append(decision)
+            if not decision[0]:
+                duplicate_index.add(project)
+        lookup_time = time.perf_counter() - started
+
+        duplicates = sum(1 for is_duplicate, _ in decisions if is_duplicate)
+        print(f"   • {size:>7} existants: index {build_time:.2f}s, analyse {lookup_time:.2f}s, {duplicates} doublons")
+        results.append({'existing': size, 'build_seconds': build_time, 'lookup_seconds': lookup_time, 'duplicates': duplicates})
+
+        if verify and size == min(sizes):
+            reference_df = existing_df.copy()
+            mismatches = 0
+            for project, decision in zip(new_projects, decisions):
+                if project['unique_hash'] in reference_df['unique_hash'].values:
+                    expected = (True, 'Hash identique')
+                else:
+                    expected = command.is_truly_duplicate(project, reference_df, similarity_threshold)
+                if expected != decision:
+                    mismatches += 1
+                if not expected[0]:
+                    reference_df = pd.concat([reference_df, pd.DataFrame([project])], ignore_index=True)
+            print(f"   ✅ Vérification contre is_truly_duplicate: {mismatches} divergence(s)")
+
+    return results
+
+def run_prepare_benchmark(rows=100000, verify=True, seed=42):
+    """
+    Mesure, sur `rows` projets synthétiques, le temps des étapes de
+    prepare_dataframe/process_data ligne à ligne (apply) et par colonnes :
+    montants, score de complétude, révision et hash. Avec verify=True, les
+    résultats des deux versions sont comparés (valeurs et dtype).
+    """
+    import random
+    import time
+    from pandas.testing import assert_series_equal
+
+    rng = random.Random(seed)
+    command = Command()
+    vocabulary = [
+        'climate', 'resilience', 'adaptation', 'mauritania', 'water', 'energy', 'solar',
+        'sahel', 'coastal', 'nouakchott', 'agriculture', 'drought', 'programme', 'draft',
+    ]
+    fundings = [
+        '', 'USD {a}.{b} million', '{a},{b} M USD', '$ {a},{b}00', '{a},{b}34,567 USD', 'USD {a},234,567',
+        '{a} MUS', 'Co-financing: {a}.{b} M EUR', 'N/A', 'nan', '{a}{b}000',
+    ]
+    df = pd.DataFrame([{
+        'title': ' '.join(rng.choice(vocabulary) for _ in range(rng.randint(1, 10))) + f' {i}',
+        'description': rng.choice(['', 'Projet de résilience climatique', 'n/a']),
+        'organization': rng.choice(['', 'UN', 'UNDP', 'FAO', 'OECD', 'Banque mondiale']),
+        'source': rng.choice(['GEF', 'GCF', 'OTHER', 'CLIMATE_FUND']),
+        'total_funding': rng.choice(fundings).format(a=rng.randint(1, 999), b=rng.randint(0, 99)),
+        'project_type': rng.choice(['', 'Report', 'Project']),
+        'source_url': rng.choice(['', 'thegef.org', 'greenclimate.fund']),
+        'document_url': rng.choice(['', f'https://example.org/docs/{i}.pdf']),
+        'additional_links': rng.choice(['', f'https://example.org/projects/{i}']),
+    } for i in range(rows)])
+
+    steps = [
+        ('montants', lambda: df['total_funding'].map(command.parse_funding_amount).astype(float),
+         lambda: command.parse_funding_amounts(df['total_funding'])),
+        ('complétude', lambda: df.apply(command.calculate_completeness_score, axis=1),
+         lambda: command.completeness_scores(df)),
+        ('révision', lambda: df.apply(command.needs_review_check, axis=1),
+         lambda: command.needs_review_flags(df)),
+        ('hash', lambda: df.apply(command.generate_smart_hash, axis=1),
+         lambda: command.smart_hashes(df)),
+    ]
+
+    print(f"⏱️ Benchmark prepare_dataframe ({rows} lignes)")
+    results = []
+    for name, row_wise, column_wise in steps:
+        started = time.perf_counter()
+        expected = row_wise()
+        row_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        result = column_wise()
+        column_time = time.perf_counter() - started
+
+        if name == 'complétude':
+            df['data_completeness_score'] = result
+        if verify:
+            assert_series_equal(expected, result, check_names=False)
+        print(f"   • {name:<11} ligne à ligne {row_time:.2f}s, par colonnes {column_time:.2f}s (x{row_time / column_time:.1f})")
+        results.append({'step': name, 'row_seconds': row_time, 'column_seconds': column_time})
+
+    if verify:
+        print("   ✅ Résultats identiques (valeurs et dtype)")
+    return results
+
 if __name__ == "__main__":
     # Collection complète par défaut (projets + fonds climatiques)
     print("🚀 Lancement de la collection GEF-GCF-OECD + Climate Funds...")
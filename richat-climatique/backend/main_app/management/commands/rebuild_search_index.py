@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from main_app import search
+
+
+class Command(BaseCommand):
+    help = 'Reconstruire l\'index de recherche plein texte des projets scrapés et des alertes'
+
+    def handle(self, *args, **options):
+        backend = search.get_backend()
+        if backend != 'fts5':
+            self.stdout.write(f"ℹ️ Moteur de recherche '{backend}' : index maintenu par la base, rien à reconstruire")
+            return
+
+        for model in search.indexed_models():
+            self.stdout.write(f"🔎 Indexation de {model._meta.verbose_name_plural}...")
+            count = search.rebuild_index(model)
+            self.stdout.write(self.style.SUCCESS(f"✅ {count} ligne(s) indexée(s) dans {search.fts_table(model)}"))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from main_app.models import NotificationCounter
+
+
+class Command(BaseCommand):
+    help = 'Recalculer les compteurs de notifications non lues à partir des notifications'
+
+    def handle(self, *args, **options):
+        self.stdout.write("🔄 Réconciliation des compteurs de notifications non lues...")
+
+        fixed = NotificationCounter.reconcile()
+
+        if not fixed:
+            self.stdout.write(self.style.SUCCESS("✅ Tous les compteurs sont à jour"))
+            return
+
+        self.stdout.write(self.style.WARNING(f"⚠️ {len(fixed)} compteur(s) corrigé(s):"))
+        for user_id, old, new in fixed[:20]:
+            self.stdout.write(f"   • Utilisateur #{user_id}: {old} → {new}")
+        if len(fixed) > 20:
+            self.stdout.write(f"   ... et {len(fixed) - 20} autres")
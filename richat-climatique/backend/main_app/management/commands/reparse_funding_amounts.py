@@ -0,0 +1,103 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from main_app.amounts import base_currency, funding_amount
+from main_app.models import ProjectAlert, ProjectRequest, ScrapedProject
+from main_app.stats import invalidate_stats_for_model
+
+
+class Command(BaseCommand):
+    help = 'Relire le montant (funding_amount) et la devise des projets déjà importés avec main_app/amounts.py'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Nombre de lignes mises à jour par requête (défaut: 500)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Afficher ce qui serait fait sans rien écrire'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options['batch_size'])
+        dry_run = options['dry_run']
+        currency = base_currency()
+        self.stdout.write(f"💰 Relecture des montants en {currency}{' (simulation)' if dry_run else ''}")
+
+        with transaction.atomic():
+            changed_projects = self.reparse_projects(currency, batch_size, dry_run)
+            changed_alerts = self.reparse_alerts(batch_size, dry_run)
+
+            requests = ProjectRequest.objects.filter(projects__in=changed_projects).distinct()
+            refreshed = 0
+            for project_request in requests.iterator(chunk_size=batch_size):
+                if not dry_run:
+                    project_request.refresh_project_aggregates()
+                refreshed += 1
+
+        if not dry_run:
+            # bulk_update et les agrégats des demandes (UPDATE direct) ne déclenchent pas les signaux
+            for model, count in ((ScrapedProject, len(changed_projects)), (ProjectAlert, changed_alerts),
+                                 (ProjectRequest, refreshed)):
+                if count:
+                    invalidate_stats_for_model(model)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {len(changed_projects)} projet(s), {changed_alerts} alerte(s) et "
+            f"{refreshed} demande(s) mis à jour"
+        ))
+
+    def reparse_projects(self, currency, batch_size, dry_run):
+        """Met à jour les projets dont le montant ou la devise change ; retourne leurs ids"""
+        projects = ScrapedProject.objects.only('id', 'total_funding', 'funding_amount', 'currency')
+        changed = []
+        batch = []
+        for project in projects.iterator(chunk_size=batch_size):
+            amount = funding_amount(project.total_funding)
+            if amount == project.funding_amount and project.currency == currency:
+                continue
+            project.funding_amount = amount
+            project.currency = currency
+            changed.append(project.id)
+            batch.append(project)
+            if len(batch) >= batch_size:
+                self.save_batch(ScrapedProject, batch, ['funding_amount', 'currency'], dry_run)
+                batch = []
+        self.save_batch(ScrapedProject, batch, ['funding_amount', 'currency'], dry_run)
+        return changed
+
+    def reparse_alerts(self, batch_size, dry_run):
+        """
+        Met à jour le montant des alertes ; la priorité n'est recalculée que si
+        elle était la priorité automatique (pas modifiée à la main)
+        """
+        alerts = ProjectAlert.objects.only(
+            'id', 'source', 'total_funding', 'funding_amount', 'data_completeness_score', 'priority_level'
+        )
+        changed = 0
+        batch = []
+        for alert in alerts.iterator(chunk_size=batch_size):
+            amount = funding_amount(alert.total_funding)
+            if amount == alert.funding_amount:
+                continue
+            automatic = alert.priority_level == alert.calculate_priority()
+            alert.funding_amount = amount
+            if automatic:
+                alert.priority_level = alert.calculate_priority()
+            changed += 1
+            batch.append(alert)
+            if len(batch) >= batch_size:
+                self.save_batch(ProjectAlert, batch, ['funding_amount', 'priority_level'], dry_run)
+                batch = []
+        self.save_batch(ProjectAlert, batch, ['funding_amount', 'priority_level'], dry_run)
+        return changed
+
+    def save_batch(self, model, batch, fields, dry_run):
+        """Écrit un lot en une requête"""
+        if batch and not dry_run:
+            model.objects.bulk_update(batch, fields)
+        return len(batch)
@@ -0,0 +1,34 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from main_app.stats import rollup_document_processing
+
+
+class Command(BaseCommand):
+    help = 'Agréger par jour les temps de traitement des documents (tâche planifiée quotidienne)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=2,
+            help='Nombre de jours récents à recalculer, aujourd\'hui inclus (défaut: 2)'
+        )
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Recalculer tout l\'historique'
+        )
+
+    def handle(self, *args, **options):
+        if options['full']:
+            start = None
+            self.stdout.write("📊 Agrégation de tout l'historique des documents traités...")
+        else:
+            start = timezone.localdate() - timedelta(days=max(1, options['days']) - 1)
+            self.stdout.write(f"📊 Agrégation des documents traités depuis le {start:%d/%m/%Y}...")
+
+        rows = rollup_document_processing(start=start)
+        self.stdout.write(self.style.SUCCESS(f"✅ {rows} ligne(s) d'agrégat écrite(s)"))
@@ -0,0 +1,79 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.utils import timezone
+
+from main_app.jobs import get_jobs, is_due, next_run, run_job
+
+
+class Command(BaseCommand):
+    help = 'Planificateur des tâches périodiques (SCHEDULED_JOBS) : scraping, collection, maintenance des alertes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--run',
+            type=str,
+            help='Lancer immédiatement une tâche (sous verrou) puis quitter',
+            default=None
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Lancer les tâches dues puis quitter (pour cron ou le Planificateur de tâches Windows)'
+        )
+        parser.add_argument(
+            '--list',
+            action='store_true',
+            help='Afficher les tâches et leur prochaine échéance'
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            help='Secondes entre deux vérifications des échéances (défaut: 30)',
+            default=30
+        )
+
+    def handle(self, *args, **options):
+        jobs = get_jobs()
+
+        if options['list']:
+            for name, job in jobs.items():
+                when = f"tous les jours à {job['at']}" if 'at' in job else f"toutes les {job['every']}s"
+                self.stdout.write(
+                    f"🗓️ {name}: {when} - prochaine exécution {timezone.localtime(next_run(name, job)):%d/%m/%Y %H:%M}"
+                )
+            return
+
+        if options['run']:
+            if options['run'] not in jobs:
+                raise CommandError(f"Tâche inconnue: {options['run']} (disponibles: {', '.join(jobs)})")
+            self.run(options['run'], force=True)
+            return
+
+        self.stdout.write(self.style.SUCCESS(f"🚀 Planificateur démarré ({len(jobs)} tâches)"))
+        self.stdout.write("Appuyez sur Ctrl+C pour arrêter")
+        try:
+            while True:
+                close_old_connections()
+                for name, job in jobs.items():
+                    if is_due(name, job):
+                        self.run(name, force=False)
+                if options['once']:
+                    return
+                time.sleep(max(1, options['interval']))
+        except KeyboardInterrupt:
+            self.stdout.write("\n🛑 Planificateur arrêté")
+
+    def run(self, name, force):
+        self.stdout.write(f"\n▶️ {timezone.localtime():%d/%m/%Y %H:%M} - Tâche {name}")
+        session = run_job(name, force=force, stdout=self.stdout)
+        if session is None:
+            self.stdout.write(self.style.WARNING(f"⏭️ {name}: déjà en cours ailleurs ou plus due, ignorée"))
+        elif session.success:
+            self.stdout.write(self.style.SUCCESS(
+                f"✅ {name} terminée en {session.duration}: {session.projects_found} trouvés, "
+                f"{session.projects_saved} sauvegardés, {session.projects_updated} mis à jour"
+            ))
+        else:
+            self.stdout.write(self.style.ERROR(f"❌ {name} en échec: {session.error_message}"))
@@ -1,6 +1,8 @@
 import re
 import requests
 import csv
+import hashlib
+import json
 from bs4 import BeautifulSoup
 from pathlib import Path
 import html
@@ -13,7 +15,12 @@ from datetime import datetime
 import time
 import socket
 import logging
+import queue
+import threading
 import traceback
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
@@ -36,6 +43,143 @@ from typing import List, Dict, Optional
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+
+class HostRateLimiter:
+    """Limiteur de débit par hôte, partagé entre les threads de téléchargement"""
+
+    def __init__(self, requests_per_second=None):
+        self.min_interval = 1.0 / requests_per_second if requests_per_second else 0.0
+        self.next_slot = {}
+        self.lock = threading.Lock()
+
+    def wait(self, url):
+        """Bloque jusqu'au prochain créneau disponible pour l'hôte de l'URL"""
+        if not self.min_interval:
+            return
+        host = urlparse(url).netloc
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot.get(host, now))
+            self.next_slot[host] = slot + self.min_interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+class HttpCache:
+    """
+    Cache HTTP sur disque, une entrée par URL : corps de la page, ETag,
+    Last-Modified et empreinte SHA-256 du contenu. Permet d'envoyer des
+    requêtes conditionnelles (If-None-Match / If-Modified-Since).
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return self.directory / f'{key}.json', self.directory / f'{key}.html'
+
+    def get(self, url):
+        """Retourne l'entrée en cache (métadonnées + 'content') ou None"""
+        meta_path, body_path = self._paths(url)
+        try:
+            entry = json.loads(meta_path.read_text(encoding='utf-8'))
+            entry['content'] = body_path.read_bytes()
+            return entry
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def conditional_headers(entry):
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def store(self, url, response):
+        """Enregistre la réponse (écriture atomique) et retourne ses métadonnées"""
+        meta_path, body_path = self._paths(url)
+        content = response.content
+        entry = {
+            'url': url,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'sha256': hashlib.sha256(content).hexdigest(),
+            'fetched_at': datetime.now().isoformat(),
+        }
+        tmp_body = body_path.with_suffix('.html.tmp')
+        tmp_body.write_bytes(content)
+        tmp_body.replace(body_path)
+        tmp_meta = meta_path.with_suffix('.json.tmp')
+        tmp_meta.write_text(json.dumps(entry), encoding='utf-8')
+        tmp_meta.replace(meta_path)
+        return entry
+
+
+class ScrapingState:
+    """
+    État persistant d'une source (scraped_data/scraping_state/<SOURCE>.json) :
+    URLs et identifiants déjà vus, plus le projet le plus récent du dernier
+    passage. Sert au mode --incremental pour arrêter la pagination dès que
+    la liste n'apporte plus de projet nouveau.
+    """
+
+    def __init__(self, directory, source):
+        self.path = Path(directory) / f'{source}.json'
+        self.source = source
+        self.seen_urls = set()
+        self.seen_ids = set()
+        self.newest = {}
+        try:
+            data = json.loads(self.path.read_text(encoding='utf-8'))
+            self.seen_urls = set(data.get('seen_urls', []))
+            self.seen_ids = set(data.get('seen_ids', []))
+            self.newest = data.get('newest', {})
+        except (OSError, ValueError):
+            pass
+
+    @staticmethod
+    def project_id(project):
+        return project.get('gef_project_id') or project.get('source_id') or ''
+
+    def is_known(self, project):
+        if project.get('Lien') and project['Lien'] in self.seen_urls:
+            return True
+        project_id = self.project_id(project)
+        return bool(project_id) and project_id in self.seen_ids
+
+    def remember(self, projects):
+        """Ajoute les projets (ordre de la liste: le premier est le plus récent) et sauvegarde"""
+        projects = list(projects)
+        if projects:
+            self.newest = {
+                'url': projects[0].get('Lien', ''),
+                'source_id': self.project_id(projects[0]),
+                'title': projects[0].get('Titre', ''),
+            }
+        for project in projects:
+            if project.get('Lien'):
+                self.seen_urls.add(project['Lien'])
+            if self.project_id(project):
+                self.seen_ids.add(self.project_id(project))
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.json.tmp')
+        tmp_path.write_text(json.dumps({
+            'source': self.source,
+            'updated_at': datetime.now().isoformat(),
+            'newest': self.newest,
+            'seen_urls': sorted(self.seen_urls),
+            'seen_ids': sorted(self.seen_ids),
+        }, ensure_ascii=False, indent=2), encoding='utf-8')
+        tmp_path.replace(self.path)
+
+
 class Command(BaseCommand):
     help = 'Scraper intégré GEF, GCF et OECD pour les projets de Mauritanie - FORMAT COMPATIBLE'
 
@@ -48,6 +192,86 @@ class Command(BaseCommand):
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
         })
+        self.configure_http(self.DEFAULT_CONCURRENCY, self.DEFAULT_RATE_LIMIT)
+        self.gef_details_mode = 'http'
+        self.driver_pool_size = self.DEFAULT_DRIVER_POOL
+        self.incremental = False
+        self.http_cache = None
+        self.http_stats = {'downloaded': 0, 'unchanged': 0, 'not_modified': 0}
+        self.http_stats_lock = threading.Lock()
+        # Compteurs de la dernière exécution (enregistrés dans ScrapingSession par main_app/jobs.py)
+        self.run_stats = {'found': 0, 'saved': 0, 'updated': 0, 'errors': []}
+
+    # Requêtes HTTP parallèles (GCF, détails GEF) : threads et requêtes/seconde par hôte
+    DEFAULT_CONCURRENCY = 8
+    DEFAULT_RATE_LIMIT = 10.0
+    # Navigateurs headless pour les pages GEF qui exigent le rendu JavaScript
+    DEFAULT_DRIVER_POOL = 2
+    GEF_DETAILS_SELECTOR = ".field, .project-details"
+    # Taille des lots transmis au pipeline (enrichissement GCF, import direct en base)
+    STREAM_BATCH_SIZE = 50
+    # Colonnes communes à toutes les sources (en-têtes des fichiers Excel)
+    PROJECT_COLUMNS = [
+        "Titre",
+        "Type",
+        "Document",
+        "nom_site",
+        "Organisation",
+        "Lien",
+        "Description",
+        "Cofinancement Total"
+    ]
+
+    def configure_http(self, concurrency=None, rate_limit=None):
+        """Configure le pool de connexions, les tentatives avec backoff et le débit par hôte"""
+        self.concurrency = max(1, concurrency or 1)
+        self.rate_limiter = HostRateLimiter(rate_limit)
+
+        retry = Retry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(['GET', 'HEAD']),
+            respect_retry_after_header=True,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=self.concurrency,
+            pool_maxsize=self.concurrency,
+            max_retries=retry,
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def fetch_pages(self, urls):
+        """Télécharge plusieurs pages en parallèle (ordre conservé, None en cas d'échec)"""
+        if self.concurrency <= 1 or len(urls) <= 1:
+            return [self.get_page_content(url) for url in urls]
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            return list(executor.map(self.get_page_content, urls))
+
+    def get_scraped_data_dir(self):
+        """Répertoire des fichiers produits (Excel, cache HTTP, état incrémental)"""
+        return Path.cwd() / 'scraped_data'
+
+    def load_scraping_state(self, source):
+        return ScrapingState(self.get_scraped_data_dir() / 'scraping_state', source)
+
+    def filter_new_projects(self, state, page_projects, source_label):
+        """
+        Mode incrémental: retire les projets déjà connus. Retourne (nouveaux, stop)
+        où stop indique que la page ne contient plus que des projets connus.
+        """
+        if not self.incremental:
+            return page_projects, False
+        new_projects = [project for project in page_projects if not state.is_known(project)]
+        known_count = len(page_projects) - len(new_projects)
+        if known_count:
+            self.stdout.write(f"♻️ {source_label}: {known_count} projets déjà connus ignorés")
+        return new_projects, not new_projects
+
+    def count_http(self, key):
+        with self.http_stats_lock:
+            self.http_stats[key] += 1
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -75,12 +299,72 @@ class Command(BaseCommand):
             help='Nombre maximum de projets à enrichir en détail (pour GCF)',
             default=None
         )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            help='Nombre de requêtes HTTP simultanées (pages GCF et détails GEF)',
+            default=self.DEFAULT_CONCURRENCY
+        )
+        parser.add_argument(
+            '--rate-limit',
+            type=float,
+            help='Requêtes par seconde maximum par hôte (0 = illimité)',
+            default=self.DEFAULT_RATE_LIMIT
+        )
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            help='Arrêter la pagination aux projets déjà vus lors des passages précédents',
+            default=False
+        )
+        parser.add_argument(
+            '--no-cache',
+            action='store_true',
+            help='Désactiver le cache HTTP disque (requêtes conditionnelles ETag/Last-Modified)',
+            default=False
+        )
+        parser.add_argument(
+            '--gef-details',
+            type=str,
+            choices=['http', 'selenium'],
+            help='Pages détail GEF: http (parallèle, Selenium en secours) ou selenium (un onglet par projet)',
+            default='http'
+        )
+        parser.add_argument(
+            '--driver-pool',
+            type=int,
+            help='Nombre de navigateurs headless pour les pages GEF nécessitant JavaScript (0 = désactivé)',
+            default=self.DEFAULT_DRIVER_POOL
+        )
+        parser.add_argument(
+            '--sink',
+            type=str,
+            choices=['excel', 'db', 'both'],
+            help='Destination des projets: fichiers Excel, import direct en base (par lots) ou les deux',
+            default='excel'
+        )
+        parser.add_argument(
+            '--similarity-threshold',
+            type=float,
+            help='Seuil de similarité des titres pour la détection des doublons (sink db)',
+            default=0.98
+        )
 
     def handle(self, *args, **options):
         source = options.get('source', 'all')
         max_pages = options.get('max_pages', 50)
         headless = options.get('headless', False)
         max_details = options.get('max_details', None)
+        self.configure_http(
+            options.get('concurrency', self.DEFAULT_CONCURRENCY),
+            options.get('rate_limit', self.DEFAULT_RATE_LIMIT)
+        )
+        self.gef_details_mode = options.get('gef_details', 'http') or 'http'
+        self.driver_pool_size = max(0, options.get('driver_pool', self.DEFAULT_DRIVER_POOL) or 0)
+        self.incremental = options.get('incremental', False)
+        self.http_cache = None if options.get('no_cache', False) else HttpCache(self.get_scraped_data_dir() / 'http_cache')
+        sink = options.get('sink', 'excel') or 'excel'
+        similarity_threshold = options.get('similarity_threshold', 0.98)
         
         self.stdout.write("🚀 SCRAPER INTÉGRÉ GEF-GCF-OECD MAURITANIE")
         self.stdout.write("=" * 75)
@@ -90,43 +374,54 @@ class Command(BaseCommand):
         self.stdout.write("   - OECD: Organisation for Economic Co-operation and Development")
         self.stdout.write(f"📊 SOURCE SÉLECTIONNÉE: {source.upper()}")
         self.stdout.write("💾 FORMAT: Compatible entre toutes les sources")
+        if self.incremental:
+            self.stdout.write("♻️ MODE INCRÉMENTAL: seuls les nouveaux projets sont récupérés")
+        self.stdout.write(f"🗄️ CACHE HTTP: {'activé' if self.http_cache else 'désactivé'}")
+        self.stdout.write(f"📤 DESTINATION: {sink}")
         self.stdout.write("=" * 75)
         
+        all_projects = []
+        self.run_stats = {'found': 0, 'saved': 0, 'updated': 0, 'errors': []}
         try:
-            all_projects = []
-            
-            if source in ['gef', 'all']:
-                self.stdout.write("\n🌍 === SCRAPING GEF MAURITANIE ===")
-                self.setup_driver(headless)
-                gef_projects = self.scrape_gef_mauritania_projects(max_pages)
-                all_projects.extend(gef_projects)
-                self.cleanup_driver()
+            batches = self.iter_project_batches(source, max_pages, headless, max_details)
             
-            if source in ['gcf', 'all']:
-                self.stdout.write("\n🌱 === SCRAPING GCF MAURITANIE ===")
-                gcf_projects = self.scrape_gcf_mauritania_projects(max_details)
-                all_projects.extend(gcf_projects)
-            
-            if source in ['oecd', 'all']:
-                self.stdout.write("\n📊 === SCRAPING OECD MAURITANIE ===")
-                self.setup_driver(headless)
-                oecd_projects = self.scrape_oecd_mauritania_projects(max_pages)
-                all_projects.extend(oecd_projects)
-                self.cleanup_driver()
+            if sink in ['db', 'both']:
+                # Chaque lot est importé en base dès qu'il est scrapé
+                totals = self.import_batches_into_database(batches, all_projects, similarity_threshold)
+                self.run_stats['saved'] = totals['inserted']
+                self.run_stats['updated'] = totals['updated']
+            else:
+                for batch in batches:
+                    all_projects.extend(batch)
             
             # Sauvegarde séparée par source
-            if all_projects:
+            if all_projects and sink in ['excel', 'both']:
                 self.save_projects_by_source(all_projects, source)
                 
         except Exception as e:
             self.stdout.write(self.style.ERROR(f"❌ Erreur générale: {e}"))
             traceback.print_exc()
+            self.run_stats['errors'].append(f"Erreur générale: {e}")
         finally:
             self.cleanup_driver()
+        self.run_stats['found'] = len(all_projects)
+
+        self.stdout.write(
+            f"\n🗄️ Requêtes HTTP: {self.http_stats['downloaded']} téléchargées, "
+            f"{self.http_stats['unchanged']} inchangées, {self.http_stats['not_modified']} non modifiées (304)"
+        )
+        
+        if sink == 'db':
+            self.stdout.write(self.style.SUCCESS(
+                f"\n🎉 SCRAPING TERMINÉ!\n"
+                f"📊 Total projets scrapés: {len(all_projects)}\n"
+                f"💾 Projets importés directement dans la base (aucun fichier Excel)"
+            ))
+            return
         
         self.stdout.write(self.style.SUCCESS(
             f"\n🎉 SCRAPING TERMINÉ!\n"
-            f"📊 Total projets scrapés: {len(all_projects) if 'all_projects' in locals() else 0}\n"
+            f"📊 Total projets scrapés: {len(all_projects)}\n"
             f"📁 Fichiers de sortie:\n"
             f"   - GEF_Mauritanie_Projects.xlsx (projets GEF)\n"
             f"   - GCF_Mauritanie_Projects.xlsx (projets GCF)\n"
@@ -134,6 +429,62 @@ class Command(BaseCommand):
             f"✅ Sauvegarde séparée par source!"
         ))
 
+    def iter_project_batches(self, source, max_pages, headless=False, max_details=None):
+        """
+        Générateur: produit les projets de chaque source par lots, au fil du
+        scraping (le driver Selenium est ouvert et fermé autour de chaque source)
+        """
+        if source in ['gef', 'all']:
+            self.stdout.write("\n🌍 === SCRAPING GEF MAURITANIE ===")
+            self.setup_driver(headless)
+            try:
+                yield from self.iter_gef_mauritania_projects(max_pages)
+            finally:
+                self.cleanup_driver()
+        
+        if source in ['gcf', 'all']:
+            self.stdout.write("\n🌱 === SCRAPING GCF MAURITANIE ===")
+            yield from self.iter_gcf_mauritania_projects(max_details)
+        
+        if source in ['oecd', 'all']:
+            self.stdout.write("\n📊 === SCRAPING OECD MAURITANIE ===")
+            self.setup_driver(headless)
+            try:
+                yield from self.iter_oecd_mauritania_projects(max_pages)
+            finally:
+                self.cleanup_driver()
+
+    def normalize_project_record(self, project):
+        """Réduit un projet scrapé aux colonnes communes (format des fichiers Excel) + source"""
+        record = {column: project.get(column, '') for column in self.PROJECT_COLUMNS}
+        record['source'] = str(project.get('source', '')).upper()
+        return record
+
+    def import_batches_into_database(self, batches, all_projects, similarity_threshold=0.98):
+        """
+        Importe les lots directement dans ScrapedProject via le pipeline de la
+        commande collection (préparation, doublons, upsert, alertes), sans
+        passer par les fichiers Excel. Les projets sont aussi ajoutés à all_projects.
+        """
+        from main_app.management.commands.collection import Command as CollectionCommand
+
+        importer = CollectionCommand(stdout=self.stdout, stderr=self.stderr)
+        importer.style = self.style
+
+        def records():
+            for batch in batches:
+                all_projects.extend(batch)
+                normalized = [self.normalize_project_record(project) for project in batch if project.get('Titre')]
+                if normalized:
+                    yield normalized
+
+        totals = importer.import_project_records(records(), similarity_threshold=similarity_threshold)
+        self.run_stats['errors'].extend(importer.run_stats['errors'])
+        self.stdout.write(self.style.SUCCESS(
+            f"💾 Import direct: {totals['inserted']} nouveaux projets, {totals['updated']} mis à jour"
+        ))
+        return totals
+
     def clean_text(self, text):
         """Nettoyer le texte des espaces excessifs et caractères spéciaux"""
         if not text:
@@ -149,6 +500,10 @@ class Command(BaseCommand):
 
     def setup_driver(self, headless=False):
         """Configuration du driver Chrome pour GEF et OECD"""
+        self.driver = self.build_driver(headless)
+
+    def build_driver(self, headless=False):
+        """Crée un driver Chrome configuré (driver principal ou pool de rendu GEF)"""
         try:
             options = Options()
             options.add_argument("--start-maximized")
@@ -169,12 +524,13 @@ class Command(BaseCommand):
                 options.add_argument("--headless")
             
             service = Service(ChromeDriverManager().install())
-            self.driver = webdriver.Chrome(service=service, options=options)
-            self.driver.implicitly_wait(15)
+            driver = webdriver.Chrome(service=service, options=options)
+            driver.implicitly_wait(15)
             
-            self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+            driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
             
             logger.info("✅ Driver Chrome configuré")
+            return driver
             
         except Exception as e:
             logger.error(f"❌ Erreur configuration driver: {e}")
@@ -188,9 +544,14 @@ class Command(BaseCommand):
                 logger.info("🔒 Driver fermé")
             except Exception as e:
                 logger.warning(f"⚠ Erreur fermeture driver: {e}")
+            self.driver = None
 
     def scrape_gef_mauritania_projects(self, max_pages):
         """Scraper principal pour les projets GEF Mauritanie"""
+        return [project for batch in self.iter_gef_mauritania_projects(max_pages) for project in batch]
+
+    def iter_gef_mauritania_projects(self, max_pages):
+        """Générateur: produit les projets GEF enrichis page par page"""
         base_url = "https://www.thegef.org/projects-operations/database?f%5B0%5D=project_country_national%3A105"
         
         try:
@@ -213,6 +574,7 @@ class Command(BaseCommand):
             
             page_num = 1
             projects = []
+            state = self.load_scraping_state('GEF')
             
             while page_num <= max_pages:
                 self.stdout.write(f"\n📄 TRAITEMENT PAGE GEF {page_num}")
@@ -222,15 +584,25 @@ class Command(BaseCommand):
                 if not page_projects:
                     self.stdout.write("❌ Aucun projet GEF trouvé sur cette page")
                     break
+
+                page_projects, reached_known = self.filter_new_projects(state, page_projects, 'GEF')
+                if reached_known:
+                    self.stdout.write("📌 Projets GEF déjà connus atteints, arrêt de la pagination")
+                    break
                 
-                for project_basic in page_projects:
-                    project_enriched = self.enrich_gef_project_details(project_basic)
+                if self.gef_details_mode == 'selenium':
+                    page_enriched = [self.enrich_gef_project_details(project_basic) for project_basic in page_projects]
+                else:
+                    # Selenium ne sert qu'à la liste paginée, les détails sont récupérés en HTTP
+                    page_enriched = self.enrich_gef_projects_details(page_projects)
+
+                for project_enriched in page_enriched:
                     projects.append(project_enriched)
-                    
                     if len(projects) <= 5 or len(projects) % 5 == 0:
                         self.stdout.write(f"✅ Projet GEF #{len(projects)}: {project_enriched['Titre'][:50]}...")
                 
                 self.stdout.write(f"📊 Page GEF {page_num}: {len(page_projects)} projets extraits")
+                yield page_enriched
                 
                 if not self.navigate_to_next_page():
                     self.stdout.write("📄 Dernière page GEF atteinte")
@@ -238,14 +610,14 @@ class Command(BaseCommand):
                 
                 page_num += 1
                 time.sleep(2)
+
+            state.remember(projects)
             
             self.stdout.write(f"✅ GEF terminé: {len(projects)} projets extraits")
-            return projects
             
         except Exception as e:
             self.stdout.write(f"❌ Erreur lors du scraping GEF: {e}")
             traceback.print_exc()
-            return []
 
     def extract_gef_projects_from_page(self):
         """Extraire tous les projets GEF de la page actuelle"""
@@ -320,8 +692,77 @@ class Command(BaseCommand):
             logger.error(f"Erreur extraction données projet GEF: {e}")
             return None
 
+    def enrich_gef_projects_details(self, projects):
+        """
+        Enrichit les projets GEF en parallèle via HTTP, puis via un pool de
+        navigateurs headless pour les pages dont le HTML statique ne contient
+        pas les blocs attendus (rendu JavaScript nécessaire).
+        """
+        enriched_projects = [project.copy() for project in projects]
+        with_link = [project for project in enriched_projects if project.get('Lien')]
+        if not with_link:
+            return enriched_projects
+
+        self.stdout.write(f"🔍 Enrichissement GEF de {len(with_link)} projets en HTTP ({self.concurrency} connexions)")
+        started = time.monotonic()
+
+        needs_browser = []
+        soups = self.fetch_pages([project['Lien'] for project in with_link])
+        for project, soup in zip(with_link, soups):
+            if soup is not None and soup.select_one(self.GEF_DETAILS_SELECTOR):
+                self.extract_gef_project_page_details(soup, project)
+            else:
+                needs_browser.append(project)
+
+        if needs_browser:
+            if self.driver_pool_size > 0:
+                self.stdout.write(f"🌐 {len(needs_browser)} pages GEF à rendre avec {min(self.driver_pool_size, len(needs_browser))} navigateur(s)")
+                self.enrich_gef_with_driver_pool(needs_browser)
+            else:
+                self.stdout.write(f"⚠ {len(needs_browser)} pages GEF non enrichies (pool de navigateurs désactivé)")
+
+        self.stdout.write(f"⏱️ Enrichissement GEF terminé en {time.monotonic() - started:.1f}s")
+        return enriched_projects
+
+    def enrich_gef_with_driver_pool(self, projects):
+        """Rend les pages GEF avec un pool de drivers headless (modifie les projets en place)"""
+        pool_size = min(self.driver_pool_size, len(projects))
+        drivers = queue.Queue()
+        created = []
+
+        def render(project):
+            driver = drivers.get()
+            try:
+                driver.get(project['Lien'])
+                WebDriverWait(driver, 15).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, self.GEF_DETAILS_SELECTOR))
+                )
+                soup = BeautifulSoup(driver.page_source, 'html.parser')
+                self.extract_gef_project_page_details(soup, project)
+            except Exception as e:
+                self.stdout.write(f"⚠ Erreur enrichissement GEF: {e}")
+            finally:
+                drivers.put(driver)
+
+        try:
+            for _ in range(pool_size):
+                driver = self.build_driver(headless=True)
+                created.append(driver)
+                drivers.put(driver)
+
+            with ThreadPoolExecutor(max_workers=pool_size) as executor:
+                list(executor.map(render, projects))
+        except Exception as e:
+            self.stdout.write(f"❌ Erreur pool de navigateurs GEF: {e}")
+        finally:
+            for driver in created:
+                try:
+                    driver.quit()
+                except Exception as e:
+                    logger.warning(f"⚠ Erreur fermeture driver: {e}")
+
     def enrich_gef_project_details(self, project_basic):
-        """Enrichir les détails du projet GEF depuis sa page dédiée"""
+        """Enrichir les détails du projet GEF depuis sa page dédiée (mode --gef-details selenium)"""
         enriched = project_basic.copy()
         
         if not project_basic.get('Lien'):
@@ -454,6 +895,10 @@ class Command(BaseCommand):
 
     def scrape_gcf_mauritania_projects(self, max_details=None):
         """Scraper principal pour les projets GCF Mauritanie"""
+        return [project for batch in self.iter_gcf_mauritania_projects(max_details) for project in batch]
+
+    def iter_gcf_mauritania_projects(self, max_details=None):
+        """Générateur: produit les projets GCF enrichis par lots de STREAM_BATCH_SIZE"""
         base_url = "https://www.greenclimate.fund"
         mauritania_url = "https://www.greenclimate.fund/countries/mauritania"
         
@@ -466,27 +911,43 @@ class Command(BaseCommand):
             
             if not projects:
                 self.stdout.write("❌ Aucun projet GCF trouvé")
-                return []
+                return
 
             # Enrichissement avec les détails
             if max_details:
                 projects = projects[:max_details]
-                
-            enriched_projects = self.enrich_gcf_projects_details(projects, base_url)
+
+            enriched_projects = []
+            for i in range(0, len(projects), self.STREAM_BATCH_SIZE):
+                batch = self.enrich_gcf_projects_details(projects[i:i + self.STREAM_BATCH_SIZE], base_url)
+                enriched_projects.extend(batch)
+                yield batch
+
+            self.load_scraping_state('GCF').remember(enriched_projects)
             
             self.stdout.write(f"✅ GCF terminé: {len(enriched_projects)} projets extraits")
-            return enriched_projects
             
         except Exception as e:
             self.stdout.write(f"❌ Erreur lors du scraping GCF: {e}")
             traceback.print_exc()
-            return []
 
     def get_page_content(self, url: str) -> Optional[BeautifulSoup]:
         """Récupère le contenu HTML d'une page GCF"""
         try:
-            response = self.session.get(url, timeout=30)
+            cached = self.http_cache.get(url) if self.http_cache else None
+            self.rate_limiter.wait(url)
+            response = self.session.get(url, timeout=30, headers=HttpCache.conditional_headers(cached))
+
+            if cached and response.status_code == 304:
+                self.count_http('not_modified')
+                return BeautifulSoup(cached['content'], 'html.parser')
+
             response.raise_for_status()
+            if self.http_cache:
+                entry = self.http_cache.store(url, response)
+                self.count_http('unchanged' if cached and cached.get('sha256') == entry['sha256'] else 'downloaded')
+            else:
+                self.count_http('downloaded')
             return BeautifulSoup(response.content, 'html.parser')
         except requests.RequestException as e:
             logger.error(f"Erreur lors de la récupération de {url}: {e}")
@@ -496,6 +957,7 @@ class Command(BaseCommand):
         """Récupère les projets GCF de toutes les pages avec pagination"""
         all_projects = []
         page = 0
+        state = self.load_scraping_state('GCF')
         
         while True:
             if page == 0:
@@ -514,6 +976,11 @@ class Command(BaseCommand):
             if not page_projects:
                 self.stdout.write("❌ Aucun projet GCF trouvé sur cette page")
                 break
+
+            page_projects, reached_known = self.filter_new_projects(state, page_projects, 'GCF')
+            if reached_known:
+                self.stdout.write("📌 Projets GCF déjà connus atteints, arrêt de la pagination")
+                break
             
             all_projects.extend(page_projects)
             self.stdout.write(f"📊 Page GCF {page + 1}: {len(page_projects)} projets trouvés")
@@ -528,12 +995,63 @@ class Command(BaseCommand):
             else:
                 self.stdout.write("📄 Pas de pagination GCF trouvée")
                 break
+
+            # Nombre de pages connu: les pages restantes sont téléchargées en parallèle
+            # (sauf en mode incrémental, où l'on s'arrête page par page aux projets connus)
+            last_page = self.get_gcf_last_page_number(pagination)
+            if not self.incremental and self.concurrency > 1 and last_page is not None and last_page > page + 1:
+                page_projects, has_more = self.get_gcf_remaining_pages_projects(
+                    mauritania_url, base_url, page + 1, last_page
+                )
+                all_projects.extend(page_projects)
+                if not has_more:
+                    break
+                # Le pager n'affichait qu'une fenêtre de pages: on reprend après la dernière
+                page = last_page + 1
+                continue
             
             page += 1
-            time.sleep(1)
 
         return all_projects
 
+    def get_gcf_last_page_number(self, pagination):
+        """Numéro (base 0) de la dernière page d'après les liens du pager GCF, ou None"""
+        page_numbers = []
+        for link in pagination.find_all('a', href=True):
+            values = parse_qs(urlparse(link['href']).query).get('page', [])
+            if values and values[0].isdigit():
+                page_numbers.append(int(values[0]))
+        return max(page_numbers) if page_numbers else None
+
+    def get_gcf_remaining_pages_projects(self, mauritania_url, base_url, first_page, last_page):
+        """
+        Télécharge les pages first_page..last_page en parallèle puis les traite dans l'ordre.
+        Retourne (projets, has_more) où has_more indique que la dernière page a un lien suivant.
+        """
+        pages = list(range(first_page, last_page + 1))
+        urls = [f"{mauritania_url}?page={page}" for page in pages]
+        self.stdout.write(f"⚡ Téléchargement parallèle de {len(urls)} pages GCF ({self.concurrency} connexions)")
+
+        projects = []
+        for page, soup in zip(pages, self.fetch_pages(urls)):
+            self.stdout.write(f"📄 TRAITEMENT PAGE GCF {page + 1}: {mauritania_url}?page={page}")
+            if not soup:
+                return projects, False
+
+            page_projects = self.extract_gcf_projects_from_table(soup, base_url)
+            if not page_projects:
+                self.stdout.write("❌ Aucun projet GCF trouvé sur cette page")
+                return projects, False
+
+            projects.extend(page_projects)
+            self.stdout.write(f"📊 Page GCF {page + 1}: {len(page_projects)} projets trouvés")
+
+        pagination = soup.find('ul', class_='pager')
+        next_link = pagination.find('a', title=re.compile(r'Go to next page|Aller à la page suivante')) if pagination else None
+        if not next_link:
+            self.stdout.write("📄 Dernière page GCF atteinte")
+        return projects, bool(next_link)
+
     def extract_gcf_projects_from_table(self, soup: BeautifulSoup, base_url: str):
         """Extrait les projets GCF depuis le tableau de la page principale"""
         projects = []
@@ -610,20 +1128,33 @@ class Command(BaseCommand):
 
     def enrich_gcf_projects_details(self, projects: List[Dict[str, str]], base_url: str):
         """Enrichit les projets GCF avec les détails de leurs pages individuelles"""
+        self.stdout.write(
+            f"🔍 Enrichissement GCF de {len(projects)} projets "
+            f"({self.concurrency} connexions, {self.rate_limiter.min_interval:.2f}s min. entre requêtes)"
+        )
+        started = time.monotonic()
+
+        def fetch_details(project):
+            return self.extract_gcf_project_details(project['Lien'])
+
+        if self.concurrency > 1 and len(projects) > 1:
+            with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+                details_list = list(executor.map(fetch_details, projects))
+        else:
+            details_list = [fetch_details(project) for project in projects]
+
         enriched_projects = []
-        
-        for i, project in enumerate(projects):
-            self.stdout.write(f"🔍 Enrichissement GCF {i+1}/{len(projects)}: {project['Titre'][:30]}...")
-            
-            detailed_info = self.extract_gcf_project_details(project['Lien'])
+        for i, (project, detailed_info) in enumerate(zip(projects, details_list)):
             enriched_project = {**project, **detailed_info}
             
             if not enriched_project.get('Description'):
                 enriched_project['Description'] = project.get('Description', '')
             
             enriched_projects.append(enriched_project)
-            time.sleep(0.5)
+            if i < 5 or (i + 1) % 25 == 0:
+                self.stdout.write(f"🔍 Enrichissement GCF {i+1}/{len(projects)}: {project['Titre'][:30]}...")
 
+        self.stdout.write(f"⏱️ Enrichissement GCF terminé en {time.monotonic() - started:.1f}s")
         return enriched_projects
 
     def extract_gcf_project_details(self, project_url: str):
@@ -695,6 +1226,10 @@ class Command(BaseCommand):
 
     def scrape_oecd_mauritania_projects(self, max_pages):
         """Scraper principal pour les projets OECD Mauritanie"""
+        return [project for batch in self.iter_oecd_mauritania_projects(max_pages) for project in batch]
+
+    def iter_oecd_mauritania_projects(self, max_pages):
+        """Générateur: produit les projets OECD page par page"""
         base_url = "https://www.oecd.org/en/search.html?orderBy=mostRelevant&page=0&facetTags=oecd-countries%3Amrt"
         
         try:
@@ -707,6 +1242,7 @@ class Command(BaseCommand):
             
             page_num = 0
             projects = []
+            state = self.load_scraping_state('OECD')
             
             while page_num < max_pages:
                 self.stdout.write(f"\n📄 TRAITEMENT PAGE OECD {page_num + 1}")
@@ -716,9 +1252,15 @@ class Command(BaseCommand):
                 if not page_projects:
                     self.stdout.write("❌ Aucun projet OECD trouvé sur cette page")
                     break
+
+                page_projects, reached_known = self.filter_new_projects(state, page_projects, 'OECD')
+                if reached_known:
+                    self.stdout.write("📌 Projets OECD déjà connus atteints, arrêt de la pagination")
+                    break
                 
                 projects.extend(page_projects)
                 self.stdout.write(f"📊 Page OECD {page_num + 1}: {len(page_projects)} projets extraits")
+                yield page_projects
                 
                 # Vérifier s'il y a une page suivante
                 if not self.navigate_to_next_oecd_page():
@@ -727,14 +1269,14 @@ class Command(BaseCommand):
                 
                 page_num += 1
                 time.sleep(3)  # Pause pour le chargement
+
+            state.remember(projects)
             
             self.stdout.write(f"✅ OECD terminé: {len(projects)} projets extraits")
-            return projects
             
         except Exception as e:
             self.stdout.write(f"❌ Erreur lors du scraping OECD: {e}")
             traceback.print_exc()
-            return []
 
     def extract_oecd_projects_from_page(self):
         """Extraire tous les projets OECD de la page actuelle"""
@@ -897,16 +1439,7 @@ class Command(BaseCommand):
         worksheet.title = f"Projets {source_name} Mauritanie"
         
         # En-têtes standardisés
-        headers = [
-            "Titre",
-            "Type", 
-            "Document",
-            "nom_site",
-            "Organisation",
-            "Lien",
-            "Description",
-            "Cofinancement Total"
-        ]
+        headers = self.PROJECT_COLUMNS
         
         # Couleur spécifique selon la source
         if source_name == 'GEF':
@@ -930,16 +1463,7 @@ class Command(BaseCommand):
         
         # Ajout des projets
         for project in projects:
-            worksheet.append([
-                project.get('Titre', ''),
-                project.get('Type', ''),
-                project.get('Document', ''),
-                project.get('nom_site', ''),
-                project.get('Organisation', ''),
-                project.get('Lien', ''),
-                project.get('Description', ''),
-                project.get('Cofinancement Total', '')
-            ])
+            worksheet.append([project.get(column, '') for column in headers])
         
         # Formatage avancé des cellules de données
         for row in worksheet.iter_rows(min_row=2, max_row=worksheet.max_row, min_col=1, max_col=len(headers)):
@@ -1076,7 +1600,10 @@ class Command(BaseCommand):
 # FONCTIONS UTILITAIRES
 # =============================
 
-def run_integrated_scraper(source='all', max_pages=50, headless=False, max_details=None):
+def run_integrated_scraper(source='all', max_pages=50, headless=False, max_details=None,
+                           concurrency=Command.DEFAULT_CONCURRENCY, rate_limit=Command.DEFAULT_RATE_LIMIT,
+                           gef_details='http', driver_pool=Command.DEFAULT_DRIVER_POOL,
+                           incremental=False, no_cache=False, sink='excel'):
     """Fonction utilitaire pour lancer le scraper intégré GEF-GCF-OECD"""
     command = Command()
     
@@ -1086,7 +1613,14 @@ def run_integrated_scraper(source='all', max_pages=50, headless=False, max_detai
                 'source': source,
                 'max_pages': max_pages,
                 'headless': headless,
-                'max_details': max_details
+                'max_details': max_details,
+                'concurrency': concurrency,
+                'rate_limit': rate_limit,
+                'gef_details': gef_details,
+                'driver_pool': driver_pool,
+                'incremental': incremental,
+                'no_cache': no_cache,
+                'sink': sink
             }
             return options_dict.get(key, default)
     
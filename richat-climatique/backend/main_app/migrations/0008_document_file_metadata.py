@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-17 21:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_app', '0007_merge_20250818_1440'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='file_size',
+            field=models.PositiveBigIntegerField(blank=True, null=True, verbose_name='Taille du fichier (octets)'),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='file_type',
+            field=models.CharField(blank=True, max_length=20, verbose_name='Type de fichier'),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='checksum',
+            field=models.CharField(blank=True, max_length=64, verbose_name='Empreinte SHA-256'),
+        ),
+    ]
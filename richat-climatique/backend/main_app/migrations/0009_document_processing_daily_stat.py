@@ -0,0 +1,34 @@
+# Generated by Django 4.2.7 on 2026-10-17 21:44
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_app', '0008_document_file_metadata'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentProcessingDailyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Jour de traitement')),
+                ('bucket', models.PositiveSmallIntegerField(verbose_name='Tranche de durée')),
+                ('processed_count', models.PositiveIntegerField(default=0, verbose_name='Documents traités')),
+                ('total_seconds', models.FloatField(default=0, verbose_name='Durée cumulée (secondes)')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('document_type', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='processing_daily_stats', to='main_app.documenttype', verbose_name='Type de document')),
+                ('traite_par', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='processing_daily_stats', to=settings.AUTH_USER_MODEL, verbose_name='Traité par')),
+            ],
+            options={
+                'verbose_name': 'Statistique quotidienne de traitement',
+                'verbose_name_plural': 'Statistiques quotidiennes de traitement',
+                'ordering': ['-date', 'bucket'],
+                'indexes': [models.Index(fields=['date'], name='main_app_docstat_date_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-17 21:49
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_app', '0009_document_processing_daily_stat'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationCounter',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='notification_counter', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Utilisateur')),
+                ('unread_count', models.PositiveIntegerField(default=0, verbose_name='Notifications non lues')),
+            ],
+            options={
+                'verbose_name': 'Compteur de notifications',
+                'verbose_name_plural': 'Compteurs de notifications',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['consultant', 'read'], name='main_app_notif_unread_idx'),
+        ),
+    ]
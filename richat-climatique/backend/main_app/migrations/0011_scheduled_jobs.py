@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-17 21:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_app', '0010_notification_counter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobLock',
+            fields=[
+                ('name', models.CharField(max_length=100, primary_key=True, serialize=False, verbose_name='Tâche')),
+                ('owner', models.CharField(max_length=200, verbose_name='Détenteur')),
+                ('acquired_at', models.DateTimeField(verbose_name='Acquis le')),
+                ('expires_at', models.DateTimeField(verbose_name='Expire le')),
+            ],
+            options={
+                'verbose_name': 'Verrou de tâche',
+                'verbose_name_plural': 'Verrous de tâches',
+            },
+        ),
+        migrations.AddField(
+            model_name='scrapingsession',
+            name='job',
+            field=models.CharField(blank=True, db_index=True, max_length=50, verbose_name='Tâche'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.7 on 2026-10-17 21:59
+
+from django.db import migrations, models
+from django.db.models import Avg, Count, Sum
+
+
+def fill_project_aggregates(apps, schema_editor):
+    """Agrégats des demandes existantes, en une requête groupée"""
+    ProjectRequest = apps.get_model('main_app', 'ProjectRequest')
+    requests = list(ProjectRequest.objects.annotate(
+        count=Count('projects'),
+        funding=Sum('projects__funding_amount'),
+        completeness=Avg('projects__data_completeness_score'),
+    ))
+    for request in requests:
+        request.projects_count = request.count
+        request.total_funding_requested = request.funding or 0
+        request.avg_completeness_score = request.completeness or 0
+    ProjectRequest.objects.bulk_update(
+        requests, ['projects_count', 'total_funding_requested', 'avg_completeness_score'], batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_app', '0011_scheduled_jobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='projectrequest',
+            name='avg_completeness_score',
+            field=models.FloatField(default=0, verbose_name='Complétude moyenne des projets'),
+        ),
+        migrations.AddField(
+            model_name='projectrequest',
+            name='projects_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Nombre de projets'),
+        ),
+        migrations.AddField(
+            model_name='projectrequest',
+            name='total_funding_requested',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Financement total demandé'),
+        ),
+        migrations.RunPython(fill_project_aggregates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 4.2.7 on 2026-10-17 22:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_app', '0012_project_request_aggregates'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='document',
+            index=models.Index(fields=['uploaded_by', '-uploaded_at'], name='main_app_doc_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='document',
+            index=models.Index(fields=['uploaded_by', 'status', '-uploaded_at'], name='main_app_doc_user_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='document',
+            index=models.Index(fields=['status', '-uploaded_at'], name='main_app_doc_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['consultant', '-created_at'], name='main_app_notif_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='projectrequest',
+            index=models.Index(fields=['-priority_score', '-created_at'], name='main_app_req_priority_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='projectrequest',
+            index=models.Index(fields=['status', '-priority_score', '-created_at'], name='main_app_req_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='scrapedproject',
+            index=models.Index(fields=['-scraped_at', 'id'], name='main_app_scraped_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='scrapedproject',
+            index=models.Index(fields=['source', '-scraped_at'], name='main_app_scraped_source_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='scrapedproject',
+            index=models.Index(fields=['is_relevant_for_mauritania', '-scraped_at'], name='main_app_scraped_relevant_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='scrapedproject',
+            index=models.Index(fields=['needs_review', '-scraped_at'], name='main_app_scraped_review_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='scrapedproject',
+            index=models.Index(fields=['data_completeness_score'], name='main_app_scraped_score_idx'),
+        ),
+    ]
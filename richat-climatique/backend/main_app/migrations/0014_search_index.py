@@ -0,0 +1,63 @@
+from django.db import migrations
+
+# Index plein texte de la recherche (?search=), voir main_app/search.py
+SEARCHED_TABLES = {
+    'ScrapedProject': ('main_app_scrapedproject', 'main_app_scraped_fulltext'),
+    'ProjectAlert': ('main_app_projectalert', 'main_app_alert_fulltext'),
+}
+SEARCH_FIELDS = ('title', 'organization', 'description')
+
+
+def sqlite_has_fts5(cursor):
+    cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+    return bool(cursor.fetchone()[0])
+
+
+def create_search_indexes(apps, schema_editor):
+    connection = schema_editor.connection
+    qn = schema_editor.quote_name
+    columns = ', '.join(SEARCH_FIELDS)
+
+    if connection.vendor == 'mysql':
+        for table, index in SEARCHED_TABLES.values():
+            schema_editor.execute(f'ALTER TABLE {qn(table)} ADD FULLTEXT INDEX {qn(index)} ({columns})')
+        return
+
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        if not sqlite_has_fts5(cursor):
+            return
+        for table, _ in SEARCHED_TABLES.values():
+            fts = qn(f'{table}_fts')
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} "
+                f"USING fts5({columns}, tokenize='unicode61 remove_diacritics 2')"
+            )
+            cursor.execute(
+                f"INSERT INTO {fts} (rowid, {columns}) "
+                f"SELECT id, COALESCE(title, ''), COALESCE(organization, ''), COALESCE(description, '') FROM {qn(table)}"
+            )
+
+
+def drop_search_indexes(apps, schema_editor):
+    connection = schema_editor.connection
+    qn = schema_editor.quote_name
+
+    if connection.vendor == 'mysql':
+        for table, index in SEARCHED_TABLES.values():
+            schema_editor.execute(f'ALTER TABLE {qn(table)} DROP INDEX {qn(index)}')
+    elif connection.vendor == 'sqlite':
+        for table, _ in SEARCHED_TABLES.values():
+            schema_editor.execute(f'DROP TABLE IF EXISTS {qn(table + "_fts")}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_app', '0013_hot_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.7 on 2026-10-17 22:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_app', '0014_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportedFile',
+            fields=[
+                ('file_name', models.CharField(max_length=255, primary_key=True, serialize=False, verbose_name='Fichier')),
+                ('loader', models.CharField(max_length=50, verbose_name='Chargeur')),
+                ('content_hash', models.CharField(max_length=64, verbose_name='Empreinte SHA-256')),
+                ('rows', models.IntegerField(default=0, verbose_name='Lignes lues')),
+                ('imported_at', models.DateTimeField(verbose_name='Importé le')),
+            ],
+            options={
+                'verbose_name': 'Fichier importé',
+                'verbose_name_plural': 'Fichiers importés',
+            },
+        ),
+    ]
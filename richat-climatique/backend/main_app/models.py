@@ -10,6 +10,8 @@ from django.utils import timezone
 from decimal import Decimal
 import hashlib
 
+from . import realtime
+
 # =============================================================================
 # MODÈLE UTILISATEUR PERSONNALISÉ
 # =============================================================================
@@ -166,6 +168,14 @@ class ScrapedProject(models.Model):
         ordering = ['-scraped_at']
         verbose_name = "Projet scrapé"
         verbose_name_plural = "Projets scrapés"
+        # Filtres de ScrapedProjectViewSet, dans l'ordre de la liste (-scraped_at, id)
+        indexes = [
+            models.Index(fields=['-scraped_at', 'id'], name='main_app_scraped_recent_idx'),
+            models.Index(fields=['source', '-scraped_at'], name='main_app_scraped_source_idx'),
+            models.Index(fields=['is_relevant_for_mauritania', '-scraped_at'], name='main_app_scraped_relevant_idx'),
+            models.Index(fields=['needs_review', '-scraped_at'], name='main_app_scraped_review_idx'),
+            models.Index(fields=['data_completeness_score'], name='main_app_scraped_score_idx'),
+        ]
     
     def save(self, *args, **kwargs):
         # Générer un hash unique basé sur titre + source + URL pour éviter les doublons
@@ -520,9 +530,9 @@ class ProjectAlert(models.Model):
         super().save(*args, **kwargs)
     
     @classmethod
-    def create_from_scraped_project(cls, scraped_project):
-        """Créer une alerte depuis un projet scrapé"""
-        alert = cls.objects.create(
+    def build_from_scraped_project(cls, scraped_project):
+        """Construit (sans sauvegarder) l'alerte d'un projet scrapé, priorité calculée"""
+        alert = cls(
             scraped_project=scraped_project,
             title=scraped_project.title,
             source=scraped_project.source,
@@ -536,25 +546,82 @@ class ProjectAlert(models.Model):
             data_completeness_score=scraped_project.data_completeness_score,
             is_featured=(scraped_project.data_completeness_score >= 80),
         )
+        # Même règle que save(), pour que bulk_create donne le même résultat
+        alert.priority_level = alert.calculate_priority()
+        return alert
+
+    @classmethod
+    def create_from_scraped_project(cls, scraped_project):
+        """Créer une alerte depuis un projet scrapé"""
+        alert = cls.build_from_scraped_project(scraped_project)
+        alert.save()
         
         # Créer les notifications pour les admins
         alert.create_notifications()
         
         return alert
+
+    @classmethod
+    def create_from_scraped_projects(cls, scraped_projects, batch_size=500):
+        """
+        Crée en masse les alertes et les notifications admin d'une liste de projets scrapés.
+
+        Nombre de requêtes constant quel que soit le nombre de projets (à la taille
+        des lots près) : un bulk_create pour les alertes, une requête pour les
+        admins (en cache) et un bulk_create pour les notifications.
+        """
+        from django.db import connection, transaction
+        from . import search
+        from .notifications import bulk_notify, get_admin_ids
+
+        alerts = [cls.build_from_scraped_project(project) for project in scraped_projects]
+        if not alerts:
+            return []
+
+        admin_ids = get_admin_ids()
+
+        with transaction.atomic():
+            cls.objects.bulk_create(alerts, batch_size=batch_size)
+
+            # MySQL ne renvoie pas les clés primaires après un INSERT groupé
+            if not connection.features.can_return_rows_from_bulk_insert:
+                project_ids = [alert.scraped_project_id for alert in alerts]
+                alerts = []
+                for i in range(0, len(project_ids), batch_size):
+                    alerts.extend(
+                        cls.objects.filter(scraped_project_id__in=project_ids[i:i + batch_size])
+                    )
+
+            # bulk_create ne déclenche pas les signaux (index de recherche)
+            search.index_objects(cls, alerts)
+
+            # Alertes toutes neuves : pas de doublon possible
+            bulk_notify(
+                (alert.build_notification(admin_id) for alert in alerts for admin_id in admin_ids),
+                batch_size=batch_size,
+                dedupe=False
+            )
+
+        realtime.publish_alerts_created(alerts)
+        return alerts
+
+    def build_notification(self, admin_id):
+        """Construit (sans sauvegarder) la notification de l'alerte pour un administrateur"""
+        return Notification(
+            type='scraping',
+            title=f'🔔 Nouveau projet {self.get_source_display()}',
+            message=f'{self.alert_icon} {self.title[:80]}{"..." if len(self.title) > 80 else ""}\n💰 {self.total_funding}\n🏢 {self.organization}\n📊 Score: {self.data_completeness_score}%',
+            consultant_id=admin_id,
+            read=False,
+            project_alert=self  # Nouveau champ relation
+        )
     
     def create_notifications(self):
         """Créer des notifications pour tous les administrateurs"""
-        admins = CustomUser.objects.filter(role='admin', actif=True)
-        
-        for admin in admins:
-            Notification.objects.create(
-                type='scraping',
-                title=f'🔔 Nouveau projet {self.get_source_display()}',
-                message=f'{self.alert_icon} {self.title[:80]}{"..." if len(self.title) > 80 else ""}\n💰 {self.total_funding}\n🏢 {self.organization}\n📊 Score: {self.data_completeness_score}%',
-                consultant=admin,
-                read=False,
-                project_alert=self  # Nouveau champ relation
-            )
+        from .notifications import bulk_notify, get_admin_ids
+
+        bulk_notify(self.build_notification(admin_id) for admin_id in get_admin_ids())
+        realtime.publish_alerts_created([self])
     
     def mark_as_read(self):
         """Marquer l'alerte comme lue"""
@@ -617,6 +684,11 @@ class Notification(models.Model):
         ordering = ['-created_at']
         verbose_name = "Notification"
         verbose_name_plural = "Notifications"
+        indexes = [
+            models.Index(fields=['consultant', 'read'], name='main_app_notif_unread_idx'),
+            # Liste des notifications d'un utilisateur, les plus récentes d'abord
+            models.Index(fields=['consultant', '-created_at'], name='main_app_notif_recent_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} - {self.consultant.username}"
@@ -641,6 +713,105 @@ class Notification(models.Model):
         else:
             return "à l'instant"
 
+
+class NotificationCounter(models.Model):
+    """
+    Nombre de notifications non lues d'un utilisateur, dénormalisé pour que
+    /notifications/unread_count/ soit une lecture par clé primaire.
+
+    Tenu à jour par des UPDATE atomiques (F()) à la création, au marquage comme
+    lue et à la suppression des notifications ; créé paresseusement à partir
+    du vrai décompte. La commande reconcile_notification_counters corrige une
+    éventuelle dérive.
+    """
+    user = models.OneToOneField(
+        CustomUser,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='notification_counter',
+        verbose_name="Utilisateur"
+    )
+    unread_count = models.PositiveIntegerField(default=0, verbose_name="Notifications non lues")
+
+    class Meta:
+        verbose_name = "Compteur de notifications"
+        verbose_name_plural = "Compteurs de notifications"
+
+    def __str__(self):
+        return f"{self.user_id}: {self.unread_count} non lue(s)"
+
+    @classmethod
+    def unread_for(cls, user_id):
+        """Nombre de notifications non lues (le compteur est créé au premier appel)"""
+        unread = cls.objects.filter(pk=user_id).values_list('unread_count', flat=True).first()
+        if unread is None:
+            counter, _ = cls.objects.get_or_create(
+                user_id=user_id,
+                defaults={'unread_count': Notification.objects.filter(consultant_id=user_id, read=False).count()}
+            )
+            unread = counter.unread_count
+        return unread
+
+    @classmethod
+    def add(cls, counts):
+        """
+        Ajoute {user_id: nombre} aux compteurs existants, un UPDATE par valeur
+        distincte. Un compteur absent n'est pas créé : il le sera à partir du
+        vrai décompte, qui inclut déjà ces notifications.
+        """
+        users_by_amount = {}
+        for user_id, amount in counts.items():
+            if amount:
+                users_by_amount.setdefault(amount, []).append(user_id)
+        for amount, user_ids in users_by_amount.items():
+            cls.objects.filter(pk__in=user_ids).update(unread_count=models.F('unread_count') + amount)
+
+    @classmethod
+    def add_unread(cls, notifications):
+        """Compte les notifications non lues qui viennent d'être créées"""
+        counts = {}
+        for notification in notifications:
+            if not notification.read:
+                counts[notification.consultant_id] = counts.get(notification.consultant_id, 0) + 1
+        cls.add(counts)
+
+    @classmethod
+    def remove(cls, user_id, amount=1):
+        """Retire des notifications lues ou supprimées, sans descendre sous zéro"""
+        if amount:
+            cls.objects.filter(pk=user_id).update(unread_count=models.Case(
+                models.When(unread_count__gt=amount, then=models.F('unread_count') - amount),
+                default=models.Value(0),
+            ))
+
+    @classmethod
+    def reconcile(cls):
+        """
+        Recalcule tous les compteurs existants à partir des notifications.
+        Les compteurs sont verrouillés avant le décompte : une notification
+        créée pendant la réconciliation est comptée une seule fois.
+        Retourne la liste des (user_id, ancienne valeur, nouvelle valeur) corrigés.
+        """
+        from django.db import transaction
+
+        with transaction.atomic():
+            counters = list(cls.objects.select_for_update().order_by('pk'))
+            actual = dict(
+                Notification.objects.filter(read=False).order_by()
+                .values('consultant').annotate(unread=models.Count('pk'))
+                .values_list('consultant', 'unread')
+            )
+            fixed = []
+            changed = []
+            for counter in counters:
+                unread = actual.get(counter.user_id, 0)
+                if counter.unread_count != unread:
+                    fixed.append((counter.user_id, counter.unread_count, unread))
+                    counter.unread_count = unread
+                    changed.append(counter)
+            cls.objects.bulk_update(changed, ['unread_count'], batch_size=500)
+        return fixed
+
 # =============================================================================
 # MODÈLE POUR LES STATISTIQUES DE SCRAPING
 # =============================================================================
@@ -665,6 +836,8 @@ class ScrapingSession(models.Model):
     # Paramètres de la session
     max_pages = models.IntegerField(null=True, blank=True, verbose_name="Pages max")
     headless_mode = models.BooleanField(default=False, verbose_name="Mode headless")
+    # Tâche planifiée à l'origine de la session (voir main_app/jobs.py)
+    job = models.CharField(max_length=50, blank=True, db_index=True, verbose_name="Tâche")
     
     class Meta:
         ordering = ['-started_at']
@@ -682,6 +855,69 @@ class ScrapingSession(models.Model):
             return self.completed_at - self.started_at
         return None
 
+class JobLock(models.Model):
+    """
+    Verrou d'une tâche planifiée, partagé par tous les processus et serveurs
+    via la base : une seule exécution d'une même tâche à la fois. Le verrou
+    expire (processus arrêté brutalement) et peut alors être repris.
+    """
+    name = models.CharField(max_length=100, primary_key=True, verbose_name="Tâche")
+    owner = models.CharField(max_length=200, verbose_name="Détenteur")
+    acquired_at = models.DateTimeField(verbose_name="Acquis le")
+    expires_at = models.DateTimeField(verbose_name="Expire le")
+
+    class Meta:
+        verbose_name = "Verrou de tâche"
+        verbose_name_plural = "Verrous de tâches"
+
+    def __str__(self):
+        return f"{self.name} ({self.owner})"
+
+    @classmethod
+    def acquire(cls, name, owner, timeout):
+        """Prend le verrou pour timeout secondes ; False s'il est déjà détenu"""
+        from datetime import timedelta
+        from django.db import IntegrityError, transaction
+
+        now = timezone.now()
+        expires_at = now + timedelta(seconds=timeout)
+        # Reprise d'un verrou expiré (UPDATE conditionnel, atomique)
+        if cls.objects.filter(name=name, expires_at__lte=now).update(
+            owner=owner, acquired_at=now, expires_at=expires_at
+        ):
+            return True
+        try:
+            with transaction.atomic():
+                cls.objects.create(name=name, owner=owner, acquired_at=now, expires_at=expires_at)
+            return True
+        except IntegrityError:
+            return False
+
+    @classmethod
+    def release(cls, name, owner):
+        """Libère le verrou s'il appartient toujours à owner"""
+        cls.objects.filter(name=name, owner=owner).delete()
+
+
+class ImportedFile(models.Model):
+    """
+    Dernière importation réussie d'un fichier source par la commande
+    collection : un fichier dont l'empreinte n'a pas changé n'est pas relu.
+    """
+    file_name = models.CharField(max_length=255, primary_key=True, verbose_name="Fichier")
+    loader = models.CharField(max_length=50, verbose_name="Chargeur")
+    content_hash = models.CharField(max_length=64, verbose_name="Empreinte SHA-256")
+    rows = models.IntegerField(default=0, verbose_name="Lignes lues")
+    imported_at = models.DateTimeField(verbose_name="Importé le")
+
+    class Meta:
+        verbose_name = "Fichier importé"
+        verbose_name_plural = "Fichiers importés"
+
+    def __str__(self):
+        return f"{self.file_name} ({self.imported_at.strftime('%d/%m/%Y %H:%M')})"
+
+
 class ProjectRequest(models.Model):
     """Modèle pour les demandes de projets des clients"""
     STATUS_CHOICES = [
@@ -735,27 +971,48 @@ class ProjectRequest(models.Model):
     # Priorité (calculée automatiquement)
     priority_score = models.IntegerField(default=0, verbose_name="Score de priorité")
     
+    # Agrégats des projets demandés, tenus à jour quand la liste des projets
+    # change (signal m2m_changed, voir signals.py)
+    projects_count = models.PositiveIntegerField(default=0, verbose_name="Nombre de projets")
+    total_funding_requested = models.DecimalField(
+        max_digits=18, decimal_places=2, default=0, verbose_name="Financement total demandé"
+    )
+    avg_completeness_score = models.FloatField(default=0, verbose_name="Complétude moyenne des projets")
+    
     class Meta:
         ordering = ['-created_at']
         verbose_name = "Demande de projet"
         verbose_name_plural = "Demandes de projets"
+        # Ordre de ProjectRequestViewSet, avec ou sans filtre sur le statut
+        indexes = [
+            models.Index(fields=['-priority_score', '-created_at'], name='main_app_req_priority_idx'),
+            models.Index(fields=['status', '-priority_score', '-created_at'], name='main_app_req_status_idx'),
+        ]
     
     def __str__(self):
         return f"Demande #{self.id} - {self.client.full_name} ({self.get_status_display()})"
     
-    @property
-    def projects_count(self):
-        """Nombre de projets demandés"""
-        return self.projects.count()
-    
-    @property
-    def total_funding_requested(self):
-        """Montant total des financements demandés"""
-        from django.db.models import Sum
-        total = self.projects.aggregate(
-            total=Sum('funding_amount')
-        )['total'] or 0
-        return total
+    def refresh_project_aggregates(self):
+        """
+        Recalcule en une requête le nombre de projets, le financement total et
+        la complétude moyenne, puis le score de priorité, et les enregistre
+        (UPDATE direct : ni save() ni notifications)
+        """
+        totals = self.projects.aggregate(
+            count=models.Count('id'),
+            funding=models.Sum('funding_amount'),
+            completeness=models.Avg('data_completeness_score')
+        )
+        self.projects_count = totals['count']
+        self.total_funding_requested = totals['funding'] or 0
+        self.avg_completeness_score = totals['completeness'] or 0
+        self.priority_score = self.calculate_priority_score()
+        ProjectRequest.objects.filter(pk=self.pk).update(
+            projects_count=self.projects_count,
+            total_funding_requested=self.total_funding_requested,
+            avg_completeness_score=self.avg_completeness_score,
+            priority_score=self.priority_score
+        )
     
     @property
     def time_since_request(self):
@@ -773,7 +1030,7 @@ class ProjectRequest(models.Model):
             return f"{minutes} minute{'s' if minutes > 1 else ''}"
     
     def calculate_priority_score(self):
-        """Calcule un score de priorité basé sur plusieurs critères"""
+        """Calcule un score de priorité basé sur plusieurs critères (agrégats enregistrés, sans requête)"""
         score = 0
         
         # Nombre de projets (plus = plus prioritaire)
@@ -789,10 +1046,7 @@ class ProjectRequest(models.Model):
             score += 10
         
         # Qualité des données des projets
-        avg_completeness = self.projects.aggregate(
-            avg_score=models.Avg('data_completeness_score')
-        )['avg_score'] or 0
-        score += int(avg_completeness / 10)
+        score += int(self.avg_completeness_score / 10)
         
         # Ancienneté de la demande (plus ancien = plus prioritaire)
         days_old = (timezone.now() - self.created_at).days
@@ -800,8 +1054,11 @@ class ProjectRequest(models.Model):
         
         return min(score, 100)  # Max 100
     
-    def save(self, *args, **kwargs):
-        """Override save pour calculer le score et créer les notifications"""
+    def save(self, *args, notify_admins=True, **kwargs):
+        """
+        Override save pour calculer le score et créer les notifications
+        (notify_admins=False : l'appelant notifiera une fois la demande complète)
+        """
         # Vérifier si c'est une nouvelle demande
         is_new = self.pk is None
         
@@ -813,24 +1070,21 @@ class ProjectRequest(models.Model):
         super().save(*args, **kwargs)
         
         # Créer des notifications pour les admins si c'est une nouvelle demande
-        if is_new:
+        if is_new and notify_admins:
             self.create_admin_notification()
     
-    def create_admin_notification(self):
+    def create_admin_notification(self, defer=False):
         """Créer une notification pour tous les administrateurs"""
-        # Récupérer tous les administrateurs actifs
-        admins = CustomUser.objects.filter(role='admin', actif=True)
-        
-        # Créer une notification pour chaque admin
-        for admin in admins:
-            Notification.objects.create(
-                type='request',
-                title='🔔 Nouvelle demande client',
-                message=f'Le client {self.client.full_name} ({self.client.company_name or "Entreprise non spécifiée"}) a soumis une demande pour {self.projects_count} projet(s). Priorité: {self.priority_score}/100',
-                consultant=admin,
-                project_request=self,
-                read=False
-            )
+        from .notifications import notify_admins
+
+        notify_admins(
+            'request',
+            '🔔 Nouvelle demande client',
+            f'Le client {self.client.full_name} ({self.client.company_name or "Entreprise non spécifiée"}) a soumis une demande pour {self.projects_count} projet(s). Priorité: {self.priority_score}/100',
+            defer=defer,
+            project_request=self
+        )
+        realtime.publish_request_created(self)
     
     def approve(self, admin_user, response_message=""):
         """Approuver la demande"""
@@ -839,6 +1093,7 @@ class ProjectRequest(models.Model):
         self.processed_at = timezone.now()
         self.admin_response = response_message
         self.save()
+        realtime.publish_request_status(self)
         
         # Créer une notification pour le client
         Notification.objects.create(
@@ -857,6 +1112,7 @@ class ProjectRequest(models.Model):
         self.processed_at = timezone.now()
         self.admin_response = response_message
         self.save()
+        realtime.publish_request_status(self)
         
         # Créer une notification pour le client
         Notification.objects.create(
@@ -874,6 +1130,7 @@ class ProjectRequest(models.Model):
         self.processed_by = admin_user
         self.processed_at = timezone.now()
         self.save()
+        realtime.publish_request_status(self)
         
         # Créer une notification pour le client
         Notification.objects.create(
@@ -990,6 +1247,10 @@ class Document(models.Model):
         upload_to=document_upload_path,
         verbose_name="Fichier"
     )
+    # Métadonnées du fichier, calculées à l'upload (voir compute_file_metadata)
+    file_size = models.PositiveBigIntegerField(null=True, blank=True, verbose_name="Taille du fichier (octets)")
+    file_type = models.CharField(max_length=20, blank=True, verbose_name="Type de fichier")
+    checksum = models.CharField(max_length=64, blank=True, verbose_name="Empreinte SHA-256")
     description = models.TextField(blank=True, verbose_name="Description")
     
     # NOUVEAU: Message d'accompagnement du client
@@ -1070,6 +1331,12 @@ class Document(models.Model):
         verbose_name = "Document"
         verbose_name_plural = "Documents"
         ordering = ['-date_soumission']
+        # Documents d'un utilisateur (my_documents) et vues admin, par date d'upload
+        indexes = [
+            models.Index(fields=['uploaded_by', '-uploaded_at'], name='main_app_doc_user_idx'),
+            models.Index(fields=['uploaded_by', 'status', '-uploaded_at'], name='main_app_doc_user_status_idx'),
+            models.Index(fields=['status', '-uploaded_at'], name='main_app_doc_status_idx'),
+        ]
         constraints = [
             models.CheckConstraint(
                 check=models.Q(project__isnull=False) | models.Q(scraped_project__isnull=False),
@@ -1091,11 +1358,9 @@ class Document(models.Model):
         """Met à jour automatiquement les métadonnées"""
         self.clean()  # Validation avant sauvegarde
         
-        if self.file:
-            # Calcule la taille du fichier en Ko
-            self.file_size = self.file.size // 1024  
-            # Extrait l'extension du fichier
-            self.file_type = os.path.splitext(self.file.name)[1][1:].upper()
+        # Nouveau fichier uploadé: taille, type et empreinte stockés une fois pour toutes
+        if self.file and not self.file._committed:
+            self.compute_file_metadata()
         
         # Met à jour la date de soumission si le statut change
         if self.status == 'submitted' and not self.date_soumission:
@@ -1109,6 +1374,30 @@ class Document(models.Model):
             
         super().save(*args, **kwargs)
 
+    def compute_file_metadata(self):
+        """
+        Renseigne file_size (octets), file_type (extension) et checksum (SHA-256)
+        en lisant le fichier par blocs (fichier uploadé ou déjà stocké)
+        """
+        digest = hashlib.sha256()
+        size = 0
+        committed = self.file._committed
+        self.file.open('rb')
+        try:
+            for chunk in self.file.chunks():
+                digest.update(chunk)
+                size += len(chunk)
+        finally:
+            if committed:
+                self.file.close()
+            else:
+                # Le fichier uploadé sera relu par le stockage à la sauvegarde
+                self.file.seek(0)
+
+        self.file_size = size
+        self.file_type = os.path.splitext(self.file.name)[1][1:].upper()
+        self.checksum = digest.hexdigest()
+
     @property
     def filename(self):
         """Retourne le nom du fichier sans le chemin"""
@@ -1174,4 +1463,46 @@ class Document(models.Model):
             message=f'Votre document "{self.name}" a été rejeté. Motif: {motif_rejet[:100]}{"..." if len(motif_rejet) > 100 else ""}',
             consultant=self.uploaded_by,
             read=False
-        )
\ No newline at end of file
+        )
+
+# =============================================================================
+# STATISTIQUES DE TRAITEMENT DES DOCUMENTS
+# =============================================================================
+class DocumentProcessingDailyStat(models.Model):
+    """
+    Agrégat quotidien des temps de traitement des documents (revue - soumission),
+    par type de document, par administrateur et par tranche de durée.
+    Rempli par la commande rollup_document_stats (tâche planifiée).
+    """
+    date = models.DateField(verbose_name="Jour de traitement")
+    document_type = models.ForeignKey(
+        'DocumentType',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='processing_daily_stats',
+        verbose_name="Type de document"
+    )
+    traite_par = models.ForeignKey(
+        'CustomUser',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='processing_daily_stats',
+        verbose_name="Traité par"
+    )
+    bucket = models.PositiveSmallIntegerField(verbose_name="Tranche de durée")
+    processed_count = models.PositiveIntegerField(default=0, verbose_name="Documents traités")
+    total_seconds = models.FloatField(default=0, verbose_name="Durée cumulée (secondes)")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Statistique quotidienne de traitement"
+        verbose_name_plural = "Statistiques quotidiennes de traitement"
+        ordering = ['-date', 'bucket']
+        indexes = [
+            models.Index(fields=['date'], name='main_app_docstat_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} - tranche {self.bucket}: {self.processed_count} document(s)"
@@ -0,0 +1,138 @@
+"""
+Service d'envoi des notifications (fan-out)
+
+Point d'entrée unique pour notifier plusieurs utilisateurs, en particulier
+tous les administrateurs :
+- la liste des administrateurs actifs est mise en cache (invalidée quand un
+  utilisateur change, voir signals.py) ;
+- toutes les notifications d'un envoi sont écrites en un seul bulk_create,
+  puis comptées (NotificationCounter) et poussées en temps réel ;
+- une notification déjà envoyée au même destinataire pour le même événement
+  (même type et même alerte / demande / projet) n'est pas recréée ;
+- defer=True confie l'envoi à une tâche en arrière-plan (tasks.py), lancée
+  après le commit, pour que la requête HTTP réponde sans attendre.
+"""
+from django.core.cache import cache
+from django.db.models import Q
+
+from . import realtime
+from .models import CustomUser, Notification, NotificationCounter
+
+ADMIN_RECIPIENTS_CACHE_KEY = 'notifications:admin_ids'
+ADMIN_RECIPIENTS_TIMEOUT = 300
+
+# Champs qui identifient l'événement à l'origine d'une notification
+EVENT_LINK_FIELDS = ('project_alert_id', 'project_request_id', 'project_id')
+
+
+def get_admin_ids():
+    """Identifiants des administrateurs actifs (en cache)"""
+    admin_ids = cache.get(ADMIN_RECIPIENTS_CACHE_KEY)
+    if admin_ids is None:
+        admin_ids = list(
+            CustomUser.objects.filter(role='admin', actif=True).order_by('pk').values_list('pk', flat=True)
+        )
+        cache.set(ADMIN_RECIPIENTS_CACHE_KEY, admin_ids, ADMIN_RECIPIENTS_TIMEOUT)
+    return admin_ids
+
+
+def invalidate_admin_ids():
+    cache.delete(ADMIN_RECIPIENTS_CACHE_KEY)
+
+
+def event_key(notification):
+    """Clé de l'événement d'une notification, None si elle n'est liée à aucun objet"""
+    links = tuple(getattr(notification, field) for field in EVENT_LINK_FIELDS)
+    if not any(links):
+        return None
+    return (notification.consultant_id, notification.type) + links
+
+
+def drop_duplicates(notifications):
+    """
+    Écarte les notifications en double : même destinataire et même événement,
+    dans le lot ou déjà en base (une requête pour tout le lot).
+    """
+    keyed = [n for n in notifications if event_key(n) is not None]
+    existing = set()
+    if keyed:
+        linked = Q()
+        for field in EVENT_LINK_FIELDS:
+            values = {getattr(n, field) for n in keyed} - {None}
+            if values:
+                linked |= Q(**{f'{field}__in': values})
+        existing = set(
+            Notification.objects.filter(
+                linked,
+                consultant_id__in={n.consultant_id for n in keyed},
+                type__in={n.type for n in keyed},
+            ).values_list('consultant_id', 'type', *EVENT_LINK_FIELDS)
+        )
+
+    unique = []
+    seen = set()
+    for notification in notifications:
+        key = event_key(notification)
+        if key is None:
+            key = (notification.consultant_id, notification.type, notification.title, notification.message)
+        elif key in existing:
+            continue
+        if key in seen:
+            continue
+        seen.add(key)
+        unique.append(notification)
+    return unique
+
+
+def bulk_notify(notifications, batch_size=500, dedupe=True):
+    """
+    Enregistre des notifications (non sauvegardées) en un seul bulk_create,
+    met à jour les compteurs de non lues et publie les événements temps réel.
+    dedupe=False évite la recherche des doublons quand l'événement vient
+    d'être créé. Retourne les notifications créées.
+    """
+    notifications = list(notifications)
+    if dedupe:
+        notifications = drop_duplicates(notifications)
+    if not notifications:
+        return []
+
+    created = Notification.objects.bulk_create(notifications, batch_size=batch_size)
+    # bulk_create ne déclenche pas post_save : compteurs et publication explicites
+    NotificationCounter.add_unread(created)
+    realtime.publish_notifications_created(created)
+    return created
+
+
+def notify_users(user_ids, notification_type, title, message, defer=False, **links):
+    """
+    Envoie la même notification à plusieurs utilisateurs. links : project,
+    project_request, project_alert (instances ou identifiants *_id).
+    """
+    if defer:
+        from .tasks import notify_users as notify_users_task
+
+        notify_users_task.delay(list(user_ids), notification_type, title, message, links=link_ids(links))
+        return []
+    return bulk_notify(
+        Notification(type=notification_type, title=title, message=message, consultant_id=user_id, read=False, **links)
+        for user_id in user_ids
+    )
+
+
+def notify_admins(notification_type, title, message, defer=False, **links):
+    """Envoie une notification à tous les administrateurs actifs"""
+    if defer:
+        from .tasks import notify_admins as notify_admins_task
+
+        notify_admins_task.delay(notification_type, title, message, links=link_ids(links))
+        return []
+    return notify_users(get_admin_ids(), notification_type, title, message, **links)
+
+
+def link_ids(links):
+    """Objets liés remplacés par leurs identifiants (arguments de tâche sérialisables)"""
+    return {
+        (f'{name}_id' if hasattr(value, 'pk') else name): getattr(value, 'pk', value)
+        for name, value in links.items()
+    }
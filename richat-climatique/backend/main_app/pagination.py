@@ -0,0 +1,59 @@
+"""
+Classes de pagination de l'API
+"""
+from django.db.models import Q
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class StandardPageNumberPagination(PageNumberPagination):
+    """Pagination par numéro de page (?page=), taille ajustable avec ?page_size="""
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    Pagination par curseur (keyset) sur un ordre fixe.
+
+    Chaque page est une requête "WHERE champ < ... ORDER BY ... LIMIT n",
+    sans OFFSET ni COUNT(*) : le coût reste constant quelle que soit la taille
+    de la table. L'ordre est fixe (le paramètre ?ordering= est ignoré).
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+    def get_ordering(self, request, queryset, view):
+        return self.ordering
+
+
+class ScrapedProjectCursorPagination(KeysetCursorPagination):
+    """Projets scrapés, du plus récent au plus ancien"""
+    ordering = ('-scraped_at', 'id')
+
+
+class DocumentCursorPagination(KeysetCursorPagination):
+    """Documents, du dernier uploadé au plus ancien"""
+    ordering = ('-uploaded_at', 'id')
+
+
+def iter_by_keyset(queryset, field, chunk_size=500):
+    """
+    Parcourt un queryset par lots ordonnés sur (-field, -id), une requête
+    "WHERE (field, id) < dernier ... LIMIT chunk_size" par lot : la mémoire
+    reste bornée même sur MySQL, où le pilote charge tout le résultat d'une
+    requête (ce que .iterator() ne suffit pas à éviter).
+    """
+    queryset = queryset.order_by(f'-{field}', '-id')
+    last = None
+    while True:
+        batch = queryset
+        if last is not None:
+            last_value = getattr(last, field)
+            batch = batch.filter(Q(**{f'{field}__lt': last_value}) | Q(**{field: last_value, 'id__lt': last.id}))
+        batch = list(batch[:chunk_size])
+        if not batch:
+            return
+        yield from batch
+        last = batch[-1]
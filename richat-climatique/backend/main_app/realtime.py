@@ -0,0 +1,357 @@
+"""
+Événements temps réel (Server-Sent Events)
+
+Les modèles publient des événements (notification créée, alerte créée,
+demande créée ou changement de son statut) sur des canaux : un canal par
+utilisateur et un canal commun aux administrateurs. La vue /api/notifications/stream/
+relaie les canaux de l'utilisateur connecté au navigateur, ce qui remplace le
+polling de /notifications/unread_count/.
+
+Le transport entre processus est un "broker" interchangeable, choisi par le
+réglage REALTIME_BROKER (chemin de classe) :
+- InProcessBroker : file en mémoire, pour les tests et un serveur à un seul processus
+- RedisBroker : pub/sub Redis (REDIS_URL), pour plusieurs workers ou serveurs
+
+Un flux reste ouvert jusqu'à REALTIME_STREAM_MAX_SECONDS : sous ASGI
+(richat_funding/asgi.py, uvicorn ou daphne) il est servi par un générateur
+asynchrone qui n'occupe aucun worker ; sous WSGI il bloque un thread, d'où le
+refus des workers synchrones (voir stream_allowed()).
+
+EventSource ne peut pas envoyer d'en-tête Authorization : le navigateur
+demande d'abord un jeton de flux (make_stream_token), signé, réservé à ce
+flux et valable REALTIME_STREAM_TOKEN_SECONDS, plutôt que de mettre le
+jeton DRF permanent dans l'URL.
+"""
+import asyncio
+import json
+import logging
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.core import signing
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+EVENT_NOTIFICATION_CREATED = 'notification.created'
+EVENT_ALERT_CREATED = 'alert.created'
+EVENT_REQUEST_CREATED = 'request.created'
+EVENT_REQUEST_STATUS = 'request.status'
+
+ADMINS_CHANNEL = 'admins'
+
+
+def user_channel(user_id):
+    """Canal privé d'un utilisateur"""
+    return f'user:{user_id}'
+
+
+# =============================
+# JETONS DE FLUX
+# =============================
+
+STREAM_TOKEN_SALT = 'main_app.realtime.stream'
+
+
+def stream_token_max_age():
+    return getattr(settings, 'REALTIME_STREAM_TOKEN_SECONDS', 60)
+
+
+def make_stream_token(user):
+    """Jeton signé et horodaté, valable uniquement pour ouvrir le flux SSE de cet utilisateur"""
+    return signing.TimestampSigner(salt=STREAM_TOKEN_SALT).sign(str(user.pk))
+
+
+def read_stream_token(token):
+    """Id de l'utilisateur d'un jeton de flux, ou None s'il est invalide ou expiré"""
+    try:
+        value = signing.TimestampSigner(salt=STREAM_TOKEN_SALT).unsign(token, max_age=stream_token_max_age())
+    except signing.BadSignature:
+        return None
+    return int(value) if value.isdigit() else None
+
+
+# =============================
+# BROKERS
+# =============================
+
+class InProcessSubscription:
+    """Abonnement à des canaux de l'InProcessBroker"""
+
+    def __init__(self, broker, channels):
+        self.broker = broker
+        self.channels = channels
+        self.messages = queue.Queue()
+
+    def get(self, timeout=None):
+        """Prochain message (chaîne JSON), ou None après timeout secondes"""
+        try:
+            return self.messages.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    """Broker en mémoire : ne relie que les threads d'un même processus"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscriptions = {}
+
+    def subscribe(self, channels):
+        subscription = InProcessSubscription(self, list(channels))
+        with self.lock:
+            for channel in subscription.channels:
+                self.subscriptions.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            for channel in subscription.channels:
+                subscribers = self.subscriptions.get(channel)
+                if subscribers:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self.subscriptions[channel]
+
+    def publish(self, channel, message):
+        with self.lock:
+            subscribers = list(self.subscriptions.get(channel, ()))
+        for subscription in subscribers:
+            subscription.messages.put(message)
+
+
+class RedisSubscription:
+    """Abonnement pub/sub Redis"""
+
+    def __init__(self, pubsub):
+        self.pubsub = pubsub
+
+    def get(self, timeout=None):
+        message = self.pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout or 0)
+        if message is None:
+            return None
+        data = message['data']
+        return data.decode('utf-8') if isinstance(data, bytes) else data
+
+    def close(self):
+        self.pubsub.close()
+
+
+class RedisBroker:
+    """Broker Redis (pub/sub) : relie tous les workers qui partagent REDIS_URL"""
+
+    def __init__(self):
+        import redis  # Dépendance optionnelle, seulement pour ce broker
+
+        self.client = redis.Redis.from_url(settings.REDIS_URL)
+
+    def subscribe(self, channels):
+        pubsub = self.client.pubsub()
+        pubsub.subscribe(*channels)
+        return RedisSubscription(pubsub)
+
+    def publish(self, channel, message):
+        self.client.publish(channel, message)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """Instance unique du broker configuré"""
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                default = 'main_app.realtime.RedisBroker' if getattr(settings, 'REDIS_URL', '') else \
+                    'main_app.realtime.InProcessBroker'
+                _broker = import_string(getattr(settings, 'REALTIME_BROKER', '') or default)()
+    return _broker
+
+
+# =============================
+# PUBLICATION
+# =============================
+
+def format_event(event, data):
+    """Message transporté par le broker"""
+    return json.dumps({'event': event, 'data': data}, cls=DjangoJSONEncoder)
+
+
+def publish(channels, event, data):
+    """
+    Publie un événement sur des canaux, après le commit de la transaction en
+    cours (les clients ne doivent pas voir un objet qui n'existe pas encore).
+    Une erreur du broker est journalisée sans faire échouer l'écriture.
+    """
+    message = format_event(event, data)
+    channels = list(channels)
+
+    def send():
+        try:
+            broker = get_broker()
+            for channel in channels:
+                broker.publish(channel, message)
+        except Exception as e:
+            logger.warning(f"Événement temps réel {event} non publié: {e}")
+
+    transaction.on_commit(send)
+
+
+def notification_payload(notification):
+    return {
+        'id': notification.pk,
+        'type': notification.type,
+        'title': notification.title,
+        'message': notification.message,
+        'project_alert': notification.project_alert_id,
+        'project_request': notification.project_request_id,
+        'created_at': notification.created_at,
+    }
+
+
+def publish_notifications_created(notifications):
+    """Un événement notification.created par destinataire"""
+    for notification in notifications:
+        publish(
+            [user_channel(notification.consultant_id)],
+            EVENT_NOTIFICATION_CREATED,
+            notification_payload(notification)
+        )
+
+
+def publish_alerts_created(alerts):
+    """Nouvelles alertes de projets, pour les administrateurs"""
+    if not alerts:
+        return
+    publish([ADMINS_CHANNEL], EVENT_ALERT_CREATED, {
+        'count': len(alerts),
+        'alerts': [
+            {
+                'id': alert.pk,
+                'title': alert.title,
+                'source': alert.source,
+                'priority_level': alert.priority_level,
+            }
+            for alert in alerts[:20]
+        ],
+    })
+
+
+def publish_request_created(project_request):
+    """Nouvelle demande d'un client, pour les administrateurs"""
+    publish([ADMINS_CHANNEL], EVENT_REQUEST_CREATED, {
+        'id': project_request.pk,
+        'client': project_request.client_id,
+        'projects_count': project_request.projects_count,
+        'priority_score': project_request.priority_score,
+    })
+
+
+def publish_request_status(project_request):
+    """Changement de statut d'une demande, pour le client et les administrateurs"""
+    publish(
+        [user_channel(project_request.client_id), ADMINS_CHANNEL],
+        EVENT_REQUEST_STATUS,
+        {
+            'id': project_request.pk,
+            'status': project_request.status,
+            'processed_at': project_request.processed_at,
+        }
+    )
+
+
+# =============================
+# FLUX SERVER-SENT EVENTS
+# =============================
+
+def format_sse(event, data):
+    """Bloc d'événement au format text/event-stream"""
+    return f"event: {event}\ndata: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n"
+
+
+def stream_allowed(request):
+    """
+    Un flux n'est servi que s'il ne bloque pas un worker entier : sous ASGI,
+    par un serveur WSGI multi-thread (gunicorn --threads, runserver) ou si
+    REALTIME_WSGI_STREAMS est activé (workers gevent/eventlet)
+    """
+    if isinstance(request, ASGIRequest):
+        return True
+    return bool(request.META.get('wsgi.multithread')) or getattr(settings, 'REALTIME_WSGI_STREAMS', False)
+
+
+def stream_for(request, subscription, initial=None):
+    """Générateur adapté au serveur : asynchrone sous ASGI, synchrone sous WSGI"""
+    if isinstance(request, ASGIRequest):
+        return async_event_stream(subscription, initial)
+    return event_stream(subscription, initial)
+
+
+def event_stream(subscription, initial=None):
+    """
+    Générateur du flux SSE d'un abonnement : un événement "counts" initial,
+    puis les événements publiés, entrecoupés de commentaires keep-alive.
+    Le flux se termine après REALTIME_STREAM_MAX_SECONDS.
+    """
+    heartbeat = getattr(settings, 'REALTIME_HEARTBEAT_SECONDS', 15)
+    deadline = time.monotonic() + getattr(settings, 'REALTIME_STREAM_MAX_SECONDS', 300)
+    try:
+        yield 'retry: 5000\n\n'
+        if initial is not None:
+            yield format_sse('counts', initial)
+
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            message = subscription.get(timeout=min(heartbeat, remaining))
+            if message is None:
+                yield ': keep-alive\n\n'
+                continue
+            payload = json.loads(message)
+            yield format_sse(payload['event'], payload['data'])
+    finally:
+        subscription.close()
+
+
+async def async_event_stream(subscription, initial=None):
+    """
+    Variante asynchrone de event_stream (ASGI) : l'abonnement est relevé sans
+    bloquer toutes les REALTIME_POLL_SECONDS, la boucle d'événements reste libre
+    """
+    heartbeat = getattr(settings, 'REALTIME_HEARTBEAT_SECONDS', 15)
+    poll = getattr(settings, 'REALTIME_POLL_SECONDS', 0.5)
+    deadline = time.monotonic() + getattr(settings, 'REALTIME_STREAM_MAX_SECONDS', 300)
+    try:
+        yield 'retry: 5000\n\n'
+        if initial is not None:
+            yield format_sse('counts', initial)
+
+        next_heartbeat = time.monotonic() + heartbeat
+        while True:
+            now = time.monotonic()
+            if now >= deadline:
+                return
+            message = subscription.get(timeout=0)
+            if message is not None:
+                payload = json.loads(message)
+                yield format_sse(payload['event'], payload['data'])
+                next_heartbeat = now + heartbeat
+                continue
+            if now >= next_heartbeat:
+                yield ': keep-alive\n\n'
+                next_heartbeat = now + heartbeat
+            await asyncio.sleep(min(poll, deadline - now))
+    finally:
+        subscription.close()
@@ -0,0 +1,244 @@
+"""
+Recherche plein texte des projets scrapés et des alertes (?search=)
+
+Remplace les LIKE '%q%' de SearchFilter par un index plein texte sur
+title, organization et description, avec des résultats classés par
+pertinence. Le moteur est choisi par SEARCH_BACKEND, ou selon la base :
+- 'mysql' : index FULLTEXT (migration 0014) et MATCH ... AGAINST ; l'index
+  est maintenu par MySQL, les accents sont ignorés par la collation ;
+- 'fts5' : SQLite, table FTS5 annexe par modèle (<table>_fts, tokenizer
+  unicode61 sans diacritiques), mise à jour à chaque écriture (signaux,
+  imports en masse) et reconstruite par la commande rebuild_search_index ;
+- 'like' : repli sans index (icontains sur chaque mot).
+
+Les mots recherchés sont normalisés (minuscules, sans accents) et traités
+comme des préfixes : "energ resil" trouve "Énergie et résilience".
+"""
+import re
+import unicodedata
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q, Value, FloatField
+from django.db.models.expressions import RawSQL
+from rest_framework.filters import OrderingFilter, SearchFilter
+
+SEARCH_FIELDS = ('title', 'organization', 'description')
+# Poids bm25 des champs (FTS5) : le titre compte plus que la description
+FIELD_WEIGHTS = (3.0, 2.0, 1.0)
+INDEXED_MODELS = ('main_app.ScrapedProject', 'main_app.ProjectAlert')
+# innodb_ft_min_token_size : les mots plus courts ne sont pas indexés par MySQL
+MYSQL_MIN_TOKEN_LENGTH = 3
+INDEX_BATCH_SIZE = 500
+
+_fts5_available = None
+
+
+def fold(text):
+    """Minuscules sans accents : "Énergie" -> "energie" """
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    return ''.join(char for char in decomposed if not unicodedata.combining(char)).lower()
+
+
+def tokenize(text):
+    return re.findall(r'\w+', fold(text))
+
+
+def fts_table(model):
+    return f'{model._meta.db_table}_fts'
+
+
+def indexed_models():
+    return [apps.get_model(label) for label in INDEXED_MODELS]
+
+
+def is_indexed(model):
+    return model._meta.label in INDEXED_MODELS
+
+
+def fts5_available():
+    """SQLite compilé avec FTS5 ?"""
+    global _fts5_available
+    if _fts5_available is None:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+            _fts5_available = bool(cursor.fetchone()[0])
+    return _fts5_available
+
+
+def get_backend():
+    """Moteur de recherche : SEARCH_BACKEND, sinon selon la base"""
+    backend = getattr(settings, 'SEARCH_BACKEND', '')
+    if backend:
+        return backend
+    if connection.vendor == 'mysql':
+        return 'mysql'
+    if connection.vendor == 'sqlite' and fts5_available():
+        return 'fts5'
+    return 'like'
+
+
+# =============================
+# RECHERCHE
+# =============================
+
+def search(queryset, text):
+    """
+    Filtre un queryset (ScrapedProject ou ProjectAlert) sur le texte recherché,
+    annoté par search_rank (plus grand = plus pertinent) et trié par pertinence
+    """
+    tokens = tokenize(text)
+    if not tokens:
+        return queryset
+
+    backend = get_backend()
+    if backend == 'mysql':
+        tokens = [token for token in tokens if len(token) >= MYSQL_MIN_TOKEN_LENGTH]
+        if tokens:
+            return mysql_search(queryset, tokens)
+        return like_search(queryset, text)
+    if backend == 'fts5':
+        return fts5_search(queryset, tokens)
+    return like_search(queryset, text)
+
+
+def mysql_search(queryset, tokens):
+    """MATCH ... AGAINST en mode booléen : tous les mots, en préfixe"""
+    qn = connection.ops.quote_name
+    table = queryset.model._meta.db_table
+    columns = ', '.join(f'{qn(table)}.{qn(field)}' for field in SEARCH_FIELDS)
+    rank = RawSQL(
+        f'MATCH ({columns}) AGAINST (%s IN BOOLEAN MODE)',
+        [' '.join(f'+{token}*' for token in tokens)],
+        output_field=FloatField()
+    )
+    return queryset.annotate(search_rank=rank).filter(search_rank__gt=0).order_by('-search_rank', '-pk')
+
+
+def fts5_search(queryset, tokens):
+    """Jointure sur la table FTS5 annexe, classement bm25 pondéré par champ"""
+    qn = connection.ops.quote_name
+    model = queryset.model
+    table = fts_table(model)
+    weights = ', '.join(str(weight) for weight in FIELD_WEIGHTS)
+    return queryset.extra(
+        tables=[table],
+        where=[
+            f'{qn(table)}.rowid = {qn(model._meta.db_table)}.{qn(model._meta.pk.column)}',
+            f'{qn(table)} MATCH %s',
+        ],
+        params=[' '.join(f'"{token}"*' for token in tokens)],
+        select={'search_rank': f'-bm25({qn(table)}, {weights})'},
+    ).order_by('-search_rank', '-pk')
+
+
+def like_search(queryset, text):
+    """
+    Repli sans index : chaque mot doit apparaître dans l'un des champs (les
+    accents ne sont ignorés que si la collation de la base le fait)
+    """
+    for token in re.findall(r'\w+', text):
+        condition = Q()
+        for field in SEARCH_FIELDS:
+            condition |= Q(**{f'{field}__icontains': token})
+        queryset = queryset.filter(condition)
+    return queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+
+# =============================
+# INDEX FTS5 (SQLITE)
+# =============================
+
+def ensure_fts_table(model, cursor):
+    qn = connection.ops.quote_name
+    cursor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {qn(fts_table(model))} "
+        f"USING fts5({', '.join(SEARCH_FIELDS)}, tokenize='unicode61 remove_diacritics 2')"
+    )
+
+
+def write_rows(model, rows, cursor):
+    """Remplace les lignes (pk, title, organization, description) de l'index"""
+    qn = connection.ops.quote_name
+    table = qn(fts_table(model))
+    cursor.executemany(f'DELETE FROM {table} WHERE rowid = %s', [(row[0],) for row in rows])
+    cursor.executemany(
+        f"INSERT INTO {table} (rowid, {', '.join(SEARCH_FIELDS)}) VALUES (%s, %s, %s, %s)",
+        [(row[0], *(value or '' for value in row[1:])) for row in rows]
+    )
+
+
+def index_objects(model, objects):
+    """Indexe (ou réindexe) des instances déjà enregistrées"""
+    if not is_indexed(model) or get_backend() != 'fts5':
+        return
+    rows = [
+        (obj.pk, *(getattr(obj, field) for field in SEARCH_FIELDS))
+        for obj in objects if obj.pk is not None
+    ]
+    if rows:
+        with connection.cursor() as cursor:
+            write_rows(model, rows, cursor)
+
+
+def index_queryset(queryset):
+    """Indexe les lignes d'un queryset (imports en masse), par lots ; retourne leur nombre"""
+    model = queryset.model
+    if not is_indexed(model) or get_backend() != 'fts5':
+        return 0
+    rows = queryset.order_by().values_list('pk', *SEARCH_FIELDS)
+    count = 0
+    with connection.cursor() as cursor:
+        batch = []
+        for row in rows.iterator(chunk_size=INDEX_BATCH_SIZE):
+            batch.append(row)
+            if len(batch) >= INDEX_BATCH_SIZE:
+                write_rows(model, batch, cursor)
+                count += len(batch)
+                batch = []
+        if batch:
+            write_rows(model, batch, cursor)
+            count += len(batch)
+    return count
+
+
+def remove_objects(model, pks):
+    if not is_indexed(model) or get_backend() != 'fts5':
+        return
+    qn = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {qn(fts_table(model))} WHERE rowid = %s', [(pk,) for pk in pks])
+
+
+def rebuild_index(model):
+    """Reconstruit l'index FTS5 d'un modèle ; retourne le nombre de lignes indexées"""
+    qn = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        ensure_fts_table(model, cursor)
+        cursor.execute(f'DELETE FROM {qn(fts_table(model))}')
+    return index_queryset(model.objects.all())
+
+
+# =============================
+# FILTRES DRF
+# =============================
+
+class FullTextSearchFilter(SearchFilter):
+    """?search= sur l'index plein texte, résultats classés par pertinence"""
+
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get(self.search_param, '').strip()
+        if not text:
+            return queryset
+        return search(queryset, text)
+
+
+class RelevanceOrderingFilter(OrderingFilter):
+    """OrderingFilter qui, sans ?ordering= explicite, garde l'ordre de pertinence d'une recherche"""
+
+    def get_ordering(self, request, queryset, view):
+        if request.query_params.get(SearchFilter.search_param, '').strip() and \
+                not request.query_params.get(self.ordering_param):
+            return None
+        return super().get_ordering(request, queryset, view)
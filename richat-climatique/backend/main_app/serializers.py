@@ -185,7 +185,25 @@ class ProjectAlertSerializer(serializers.ModelSerializer):
 # =============================================================================
 # SERIALIZERS POUR LES PROJETS SCRAPÉS
 # =============================================================================
-class ScrapedProjectSerializer(serializers.ModelSerializer):
+class SparseFieldsetMixin:
+    """
+    Permet au client de restreindre les champs renvoyés avec ?fields=id,title,...
+    Les noms inconnus sont ignorés ; sans paramètre, tous les champs sont renvoyés.
+    """
+
+    def get_field_names(self, declared_fields, info):
+        field_names = super().get_field_names(declared_fields, info)
+        request = self.context.get('request')
+        requested = request.query_params.get('fields') if request else None
+        if not requested:
+            return field_names
+
+        wanted = {name.strip() for name in requested.split(',') if name.strip()}
+        selected = [name for name in field_names if name in wanted]
+        return selected or field_names
+
+
+class ScrapedProjectSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     source_display = serializers.CharField(source='get_source_display', read_only=True)
     linked_project_name = serializers.CharField(source='linked_project.name', read_only=True)
     can_create_project = serializers.ReadOnlyField()
@@ -204,6 +222,20 @@ class ScrapedProjectSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['scraped_at', 'last_updated', 'unique_hash']
 
+
+class ScrapedProjectListSerializer(ScrapedProjectSerializer):
+    """Version compacte pour les listes (sans description ni champs spécifiques aux sources)"""
+
+    class Meta(ScrapedProjectSerializer.Meta):
+        fields = [
+            'id', 'title', 'source', 'source_display', 'source_url',
+            'organization', 'project_type', 'status',
+            'total_funding', 'funding_amount', 'currency', 'country',
+            'scraped_at', 'linked_project', 'linked_project_name',
+            'data_completeness_score', 'is_relevant_for_mauritania', 'needs_review',
+            'can_create_project'
+        ]
+
 from rest_framework import serializers
 from .models import Document, ScrapedProject, CustomUser
 from django.db.models import Count, Q
@@ -234,20 +266,22 @@ class DocumentSerializer(serializers.ModelSerializer):
         model = Document
         fields = [
             'id', 'project', 'project_title', 'scraped_project', 'scraped_project_title',
-            'file', 'file_name', 'file_size', 'description', 'status', 'status_display', 'status_color',
+            'file', 'file_name', 'file_size', 'file_type', 'checksum',
+            'description', 'status', 'status_display', 'status_color',
             'uploaded_at', 'uploaded_by', 'uploaded_by_name', 'uploaded_by_email', 'uploaded_by_company',
             'notes', 'notes_admin', 'motif_rejet', 'message_accompagnement',  # NOUVEAUX CHAMPS
             'document_type', 'document_type_name', 'date_soumission', 
             'date_expiration', 'reviewed_at', 'rejection_reason', 'name', 'time_since_upload',
             'traite_par', 'traite_par_name'  # NOUVEAU CHAMP
         ]
-        read_only_fields = ['uploaded_by', 'uploaded_at', 'reviewed_at', 'traite_par']
+        read_only_fields = ['uploaded_by', 'uploaded_at', 'reviewed_at', 'traite_par', 'file_type', 'checksum']
     
     def get_file_name(self, obj):
         return obj.file.name.split('/')[-1] if obj.file else obj.name
     
     def get_file_size(self, obj):
-        return obj.file.size if obj.file else 0
+        # Valeur stockée à l'upload: aucun accès au stockage (voir backfill_document_metadata)
+        return obj.file_size or 0
     
     def get_traite_par_name(self, obj):
         """Nom de l'administrateur qui a traité le document"""
@@ -428,7 +462,7 @@ class ScrapingSessionSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'source', 'source_display', 'started_at', 'completed_at',
             'projects_found', 'projects_saved', 'projects_updated',
-            'success', 'error_message', 'max_pages', 'headless_mode', 'duration'
+            'success', 'error_message', 'max_pages', 'headless_mode', 'job', 'duration'
         ]
 
 # =============================================================================
@@ -444,12 +478,18 @@ class DocumentTypeSerializer(serializers.ModelSerializer):
 # SERIALIZERS POUR LES PROJETS DJANGO
 # =============================================================================
 class ProjectSerializer(serializers.ModelSerializer):
+    """
+    Les valeurs dérivées des documents sont calculées sans requête par projet
+    quand le queryset vient de ProjectViewSet : compteur annoté
+    (submitted_mandatory_count), documents préchargés filtrés en Python et
+    types obligatoires chargés une seule fois par requête (contexte partagé).
+    """
     consultant_details = UserSerializer(source='consultant', read_only=True)
     documents = DocumentSerializer(many=True, read_only=True)
-    missing_documents = serializers.ReadOnlyField()
+    missing_documents = serializers.SerializerMethodField()
     submitted_documents = serializers.SerializerMethodField()
     rating_stars = serializers.ReadOnlyField()
-    progress_percentage = serializers.ReadOnlyField()
+    progress_percentage = serializers.SerializerMethodField()
     status_display = serializers.CharField(source='get_status_display', read_only=True)
     type_display = serializers.CharField(source='get_type_project_display', read_only=True)
     fund_display = serializers.CharField(source='get_fund_display', read_only=True)
@@ -459,10 +499,46 @@ class ProjectSerializer(serializers.ModelSerializer):
         model = Project
         fields = '__all__'
     
+    def get_mandatory_document_types(self):
+        """Types de documents obligatoires, chargés une fois pour toute la liste"""
+        if 'mandatory_document_types' not in self.context:
+            self.context['mandatory_document_types'] = list(
+                DocumentType.objects.filter(obligatoire=True).values('id', 'name')
+            )
+        return self.context['mandatory_document_types']
+
+    def get_progress_percentage(self, obj):
+        """Pourcentage de progression basé sur les documents obligatoires"""
+        total_docs = len(self.get_mandatory_document_types())
+        if total_docs == 0:
+            return 0
+
+        submitted_docs = getattr(obj, 'submitted_mandatory_count', None)
+        if submitted_docs is None:
+            mandatory_ids = {doc_type['id'] for doc_type in self.get_mandatory_document_types()}
+            submitted_docs = sum(
+                1 for doc in obj.documents.all()
+                if doc.document_type_id in mandatory_ids and doc.status in ['submitted', 'approved']
+            )
+
+        return int((submitted_docs / total_docs) * 100)
+
+    def get_missing_documents(self, obj):
+        """Types obligatoires sans document soumis ou approuvé"""
+        submitted_types = {
+            doc.document_type_id for doc in obj.documents.all()
+            if doc.status in ['submitted', 'approved']
+        }
+        return [
+            {"id": doc_type['id'], "name": doc_type['name']}
+            for doc_type in self.get_mandatory_document_types()
+            if doc_type['id'] not in submitted_types
+        ]
+
     def get_submitted_documents(self, obj):
-        """Retourne les documents soumis avec leurs détails"""
-        submitted_docs = obj.documents.filter(status='submitted')
-        return DocumentSerializer(submitted_docs, many=True).data
+        """Retourne les documents soumis avec leurs détails (documents préchargés)"""
+        submitted_docs = [doc for doc in obj.documents.all() if doc.status == 'submitted']
+        return DocumentSerializer(submitted_docs, many=True, context=self.context).data
 
 class ProjectCreateUpdateSerializer(serializers.ModelSerializer):
     """Serializer pour créer/modifier un projet"""
@@ -530,45 +606,25 @@ class ProjectRequestCreateSerializer(serializers.ModelSerializer):
         except CustomUser.DoesNotExist:
             raise serializers.ValidationError("Client non trouvé")
         
-        # Créer la demande
-        request = ProjectRequest.objects.create(
+        # Créer la demande (les admins sont notifiés une fois les projets ajoutés)
+        request = ProjectRequest(
             client=client,
             **validated_data
         )
+        request.save(notify_admins=False)
         
         # Ajouter les projets
         projects = ScrapedProject.objects.filter(
             id__in=project_ids,
             linked_project__isnull=True  # Seulement les projets non liés
         )
+        # (agrégats et score de priorité recalculés par le signal m2m_changed)
         request.projects.set(projects)
         
-        # Calculer et sauvegarder le score de priorité
-        request.priority_score = request.calculate_priority_score()
-        request.save()
-        
-        # NOUVEAU : Créer des notifications pour les admins
-        self.create_admin_notifications(request)
+        # Notifier les admins en arrière-plan, après le commit
+        request.create_admin_notification(defer=True)
         
         return request
-    
-    def create_admin_notifications(self, project_request):
-        """Créer des notifications pour tous les administrateurs"""
-        from .models import Notification, CustomUser
-        
-        # Récupérer tous les administrateurs actifs
-        admins = CustomUser.objects.filter(role='admin', actif=True)
-        
-        # Créer une notification pour chaque admin
-        for admin in admins:
-            Notification.objects.create(
-                type='request',
-                title='🔔 Nouvelle demande client',
-                message=f'Le client {project_request.client.full_name} ({project_request.client.company_name}) a soumis une demande pour {project_request.projects_count} projet(s). Priorité: {project_request.priority_score}/100',
-                consultant=admin,
-                project_request=project_request,
-                read=False
-            )
 
 # =============================================================================
 # SERIALIZERS POUR LES STATISTIQUES
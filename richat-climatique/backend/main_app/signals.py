@@ -0,0 +1,131 @@
+"""
+Signaux de main_app : invalidation du cache des statistiques des tableaux de
+bord, compteurs de notifications non lues, publication temps réel,
+agrégats des projets d'une demande et index de recherche plein texte
+"""
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save, pre_delete
+
+from . import search
+from .models import CustomUser, Notification, NotificationCounter, ProjectAlert, ProjectRequest, ScrapedProject
+from .notifications import invalidate_admin_ids
+from .realtime import publish_notifications_created
+from .stats import STATS_INVALIDATED_BY, invalidate_stats_for_model
+
+
+def invalidate_dashboard_stats(sender, **kwargs):
+    """Une écriture sur un modèle suivi invalide les statistiques qui en dépendent"""
+    invalidate_stats_for_model(sender)
+
+
+for model in STATS_INVALIDATED_BY:
+    post_save.connect(invalidate_dashboard_stats, sender=model, dispatch_uid=f'stats-save-{model.__name__}')
+    post_delete.connect(invalidate_dashboard_stats, sender=model, dispatch_uid=f'stats-delete-{model.__name__}')
+
+
+def push_created_notification(sender, instance, created, **kwargs):
+    """
+    Compte et pousse vers son destinataire chaque notification créée
+    (les bulk_create le font eux-mêmes)
+    """
+    if created:
+        NotificationCounter.add_unread([instance])
+        publish_notifications_created([instance])
+
+
+def uncount_deleted_notification(sender, instance, **kwargs):
+    """Une notification non lue supprimée sort du compteur"""
+    if not instance.read:
+        NotificationCounter.remove(instance.consultant_id)
+
+
+def refresh_admin_recipients(sender, **kwargs):
+    """Un utilisateur modifié peut entrer ou sortir de la liste des administrateurs notifiés"""
+    invalidate_admin_ids()
+
+
+post_save.connect(push_created_notification, sender=Notification, dispatch_uid='realtime-notification-created')
+post_save.connect(refresh_admin_recipients, sender=CustomUser, dispatch_uid='notifications-admins-save')
+post_delete.connect(refresh_admin_recipients, sender=CustomUser, dispatch_uid='notifications-admins-delete')
+post_delete.connect(uncount_deleted_notification, sender=Notification, dispatch_uid='notification-counter-deleted')
+
+
+def refresh_request_aggregates(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Les projets d'une demande ont changé : ses agrégats (nombre, financement,
+    complétude) et son score de priorité sont recalculés. Côté inverse
+    (scraped_project.requests), ce sont les demandes concernées.
+    """
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            instance.refresh_project_aggregates()
+        return
+
+    if action == 'pre_clear':
+        # pk_set n'est pas fourni à post_clear : demandes retenues avant le vidage
+        instance._cleared_request_ids = list(instance.requests.values_list('pk', flat=True))
+        return
+    if action == 'post_clear':
+        pk_set = getattr(instance, '_cleared_request_ids', [])
+    elif action not in ('post_add', 'post_remove'):
+        return
+    refresh_requests(pk_set)
+
+
+m2m_changed.connect(
+    refresh_request_aggregates,
+    sender=ProjectRequest.projects.through,
+    dispatch_uid='project-request-aggregates'
+)
+
+# Champs d'un projet scrapé repris dans les agrégats de ses demandes
+AGGREGATED_PROJECT_FIELDS = ('funding_amount', 'data_completeness_score')
+
+
+def refresh_requests(request_ids):
+    for project_request in ProjectRequest.objects.filter(pk__in=request_ids):
+        project_request.refresh_project_aggregates()
+
+
+def remember_aggregated_values(sender, instance, **kwargs):
+    """Valeurs chargées (les champs différés ne sont pas lus)"""
+    instance._aggregated_values = tuple(instance.__dict__.get(f) for f in AGGREGATED_PROJECT_FIELDS)
+
+
+def refresh_requests_of_changed_project(sender, instance, created, **kwargs):
+    """Montant ou complétude d'un projet modifié : agrégats de ses demandes recalculés"""
+    values = tuple(instance.__dict__.get(f) for f in AGGREGATED_PROJECT_FIELDS)
+    if not created and values != getattr(instance, '_aggregated_values', None):
+        refresh_requests(instance.requests.values_list('pk', flat=True))
+    instance._aggregated_values = values
+
+
+def remember_requests_of_deleted_project(sender, instance, **kwargs):
+    """
+    La suppression en cascade des liens n'envoie pas m2m_changed : demandes
+    retenues avant la suppression
+    """
+    instance._deleted_request_ids = list(instance.requests.values_list('pk', flat=True))
+
+
+def refresh_requests_of_deleted_project(sender, instance, **kwargs):
+    refresh_requests(getattr(instance, '_deleted_request_ids', []))
+
+
+post_init.connect(remember_aggregated_values, sender=ScrapedProject, dispatch_uid='request-aggregates-init')
+post_save.connect(refresh_requests_of_changed_project, sender=ScrapedProject, dispatch_uid='request-aggregates-save')
+pre_delete.connect(remember_requests_of_deleted_project, sender=ScrapedProject, dispatch_uid='request-aggregates-pre-delete')
+post_delete.connect(refresh_requests_of_deleted_project, sender=ScrapedProject, dispatch_uid='request-aggregates-delete')
+
+
+def index_searchable(sender, instance, **kwargs):
+    """Projet scrapé ou alerte enregistré : réindexé pour la recherche (FTS5)"""
+    search.index_objects(sender, [instance])
+
+
+def unindex_searchable(sender, instance, **kwargs):
+    search.remove_objects(sender, [instance.pk])
+
+
+for model in (ScrapedProject, ProjectAlert):
+    post_save.connect(index_searchable, sender=model, dispatch_uid=f'search-index-{model.__name__}')
+    post_delete.connect(unindex_searchable, sender=model, dispatch_uid=f'search-unindex-{model.__name__}')
@@ -0,0 +1,482 @@
+"""
+Calcul des statistiques des tableaux de bord
+
+Chaque table est agrégée en une seule requête (agrégation conditionnelle
+Count(filter=Q(...)), traduite en CASE WHEN sur MySQL) au lieu d'un COUNT(*)
+par source, par tranche de score ou par statut.
+
+Les résultats sont mis en cache (cache Django : mémoire locale ou Redis) avec
+un ETag, et invalidés par les signaux de main_app/signals.py ou explicitement
+après les écritures en masse (collection, tâches de nettoyage).
+"""
+import hashlib
+import json
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import (
+    Avg, Case, Count, DurationField, ExpressionWrapper, F, IntegerField, Max, Q, Sum, Value, When, Window
+)
+from django.db.models.functions import RowNumber, TruncDate
+from django.utils import timezone
+
+from .models import (
+    CustomUser, Document, DocumentProcessingDailyStat, DocumentType, Project, ProjectAlert,
+    ProjectRequest, ScrapedProject, ScrapingSession
+)
+from .serializers import ScrapingSessionSerializer
+
+
+# Tranches de score de complétude (bornes incluses / exclues)
+COMPLETENESS_BUCKETS = {
+    'excellent': Q(data_completeness_score__gte=90),
+    'good': Q(data_completeness_score__gte=70, data_completeness_score__lt=90),
+    'fair': Q(data_completeness_score__gte=50, data_completeness_score__lt=70),
+    'poor': Q(data_completeness_score__lt=50),
+}
+
+# Projets scrapés prêts à être convertis en projets Django
+READY_FOR_CONVERSION = Q(
+    linked_project__isnull=True,
+    is_relevant_for_mauritania=True,
+    data_completeness_score__gte=60
+)
+
+
+def count_where(condition):
+    """Compteur conditionnel à utiliser dans un aggregate()"""
+    return Count('pk', filter=condition)
+
+
+def compute_scraped_project_stats():
+    """Statistiques des projets scrapés (/scraped-projects/stats/)"""
+    aggregates = {
+        'total_scraped': Count('pk'),
+        'ready_projects': count_where(READY_FOR_CONVERSION),
+        'linked_projects': count_where(Q(linked_project__isnull=False)),
+        'needs_review': count_where(Q(needs_review=True)),
+        'avg_completeness_score': Avg('data_completeness_score'),
+    }
+    for source_code, _ in ScrapedProject.SOURCE_CHOICES:
+        aggregates[f'source_{source_code}'] = count_where(Q(source=source_code))
+    for bucket, condition in COMPLETENESS_BUCKETS.items():
+        aggregates[f'score_{bucket}'] = count_where(condition)
+
+    row = ScrapedProject.objects.aggregate(**aggregates)
+
+    # Sessions récentes
+    recent_sessions = ScrapingSession.objects.all()[:5]
+
+    return {
+        'total_scraped': row['total_scraped'],
+        'by_source': {
+            source_code: row[f'source_{source_code}'] for source_code, _ in ScrapedProject.SOURCE_CHOICES
+        },
+        'by_completeness_score': {
+            bucket: row[f'score_{bucket}'] for bucket in COMPLETENESS_BUCKETS
+        },
+        'ready_projects': row['ready_projects'],
+        'linked_projects': row['linked_projects'],
+        'needs_review': row['needs_review'],
+        'avg_completeness_score': round(row['avg_completeness_score'] or 0, 2),
+        'recent_sessions': ScrapingSessionSerializer(recent_sessions, many=True).data
+    }
+
+
+def compute_dashboard_stats():
+    """Statistiques du tableau de bord (/projects/dashboard_stats/)"""
+    projects = Project.objects.aggregate(
+        total_projects=Count('pk'),
+        ready_projects=count_where(Q(status='ready')),
+        pending_projects=count_where(Q(status='progress')),
+        avg_score=Avg('score_viabilite'),
+        total_amount=Sum('montant_demande'),
+    )
+
+    scraped_aggregates = {
+        'total_scraped': Count('pk'),
+        'ready_for_conversion': count_where(READY_FOR_CONVERSION),
+    }
+    for source_code, _ in ScrapedProject.SOURCE_CHOICES:
+        scraped_aggregates[f'source_{source_code}'] = count_where(Q(source=source_code))
+    scraped = ScrapedProject.objects.aggregate(**scraped_aggregates)
+
+    # Sessions de scraping récentes
+    recent_sessions = ScrapingSession.objects.all()[:3]
+
+    return {
+        'total_projects': projects['total_projects'],
+        'ready_projects': projects['ready_projects'],
+        'pending_projects': projects['pending_projects'],
+        'avg_score': round(projects['avg_score'] or 0, 2),
+        'total_amount': projects['total_amount'] or 0,
+        'total_scraped': scraped['total_scraped'],
+        'scraped_by_source': {
+            source_code: scraped[f'source_{source_code}'] for source_code, _ in ScrapedProject.SOURCE_CHOICES
+        },
+        'ready_for_conversion': scraped['ready_for_conversion'],
+        'recent_scraping_sessions': ScrapingSessionSerializer(recent_sessions, many=True).data
+    }
+
+
+def compute_project_alert_stats():
+    """Statistiques des alertes (/project-alerts/stats/)"""
+    source_choices = ProjectAlert._meta.get_field('source').choices
+    priority_choices = ProjectAlert._meta.get_field('priority_level').choices
+    active = Q(status='active')
+
+    aggregates = {
+        'total_alerts': Count('pk'),
+        'active_alerts': count_where(active),
+        'high_priority_alerts': count_where(active & Q(priority_level__in=['high', 'urgent'])),
+        'new_this_week': count_where(active & Q(is_new_this_week=True)),
+    }
+    for source_code, _ in source_choices:
+        aggregates[f'source_{source_code}'] = count_where(active & Q(source=source_code))
+    for priority_code, _ in priority_choices:
+        aggregates[f'priority_{priority_code}'] = count_where(active & Q(priority_level=priority_code))
+
+    row = ProjectAlert.objects.aggregate(**aggregates)
+
+    return {
+        'total_alerts': row['total_alerts'],
+        'active_alerts': row['active_alerts'],
+        'high_priority_alerts': row['high_priority_alerts'],
+        'new_this_week': row['new_this_week'],
+        'by_source': {source_code: row[f'source_{source_code}'] for source_code, _ in source_choices},
+        'by_priority': {priority_code: row[f'priority_{priority_code}'] for priority_code, _ in priority_choices},
+    }
+
+
+def compute_project_request_stats():
+    """Statistiques des demandes de projets (/project-requests/stats/)"""
+    row = ProjectRequest.objects.aggregate(
+        total_requests=Count('pk'),
+        pending_requests=count_where(Q(status='pending')),
+        approved_requests=count_where(Q(status='approved')),
+        rejected_requests=count_where(Q(status='rejected')),
+        # Demandes par priorité
+        high_priority_pending=count_where(Q(status='pending', priority_score__gte=70)),
+    )
+    row['avg_processing_time'] = '2.5 jours'  # À calculer dynamiquement
+    return row
+
+
+# =============================
+# TEMPS DE TRAITEMENT DES DOCUMENTS
+# =============================
+
+# Bornes supérieures (en heures) des tranches de durée de traitement ;
+# la dernière tranche, ouverte, regroupe tout ce qui dépasse 30 jours.
+# Toute modification impose de reconstruire les agrégats (rollup_document_stats --full)
+PROCESSING_BUCKET_BOUNDS_HOURS = [1, 2, 4, 8, 12, 24, 36, 48, 72, 96, 120, 168, 240, 336, 504, 720]
+
+# Regroupements publiés : global, par type de document, par administrateur
+PROCESSING_GROUPS = {
+    'overall': None,
+    'by_document_type': 'document_type',
+    'by_admin': 'traite_par',
+}
+
+
+def processed_documents(queryset=None):
+    """Documents revus, annotés de leur durée de traitement (revue - soumission)"""
+    queryset = Document.objects.all() if queryset is None else queryset
+    return queryset.filter(reviewed_at__isnull=False, date_soumission__isnull=False).annotate(
+        duration=ExpressionWrapper(F('reviewed_at') - F('date_soumission'), output_field=DurationField())
+    ).order_by()
+
+
+def processing_bucket():
+    """Numéro de tranche de la durée de traitement, calculé par la base (CASE WHEN)"""
+    return Case(
+        *[
+            When(duration__lt=timedelta(hours=hours), then=Value(index))
+            for index, hours in enumerate(PROCESSING_BUCKET_BOUNDS_HOURS)
+        ],
+        default=Value(len(PROCESSING_BUCKET_BOUNDS_HOURS)),
+        output_field=IntegerField()
+    )
+
+
+def processing_rows(documents, by_date=False):
+    """
+    Nombre et durée cumulée des documents traités par type, administrateur et
+    tranche de durée (et par jour de revue si by_date) : un seul GROUP BY.
+    """
+    fields = ['document_type', 'traite_par', 'bucket']
+    documents = documents.annotate(bucket=processing_bucket())
+    if by_date:
+        documents = documents.annotate(date=TruncDate('reviewed_at'))
+        fields.insert(0, 'date')
+
+    rows = documents.values(*fields).annotate(processed_count=Count('pk'), total_duration=Sum('duration'))
+    return [
+        {
+            **{field: row[field] for field in fields},
+            'processed_count': row['processed_count'],
+            'total_seconds': row['total_duration'].total_seconds() if row['total_duration'] else 0.0,
+        }
+        for row in rows
+    ]
+
+
+def rollup_document_processing(start=None, end=None):
+    """
+    (Re)calcule les agrégats quotidiens DocumentProcessingDailyStat des jours de
+    revue compris entre start et end (inclus), tout l'historique sans bornes.
+    Retourne le nombre de lignes écrites.
+    """
+    documents = processed_documents()
+    rollups = DocumentProcessingDailyStat.objects.all()
+    if start:
+        documents = documents.filter(reviewed_at__date__gte=start)
+        rollups = rollups.filter(date__gte=start)
+    if end:
+        documents = documents.filter(reviewed_at__date__lte=end)
+        rollups = rollups.filter(date__lte=end)
+
+    rows = processing_rows(documents, by_date=True)
+    with transaction.atomic():
+        rollups.delete()
+        DocumentProcessingDailyStat.objects.bulk_create([
+            DocumentProcessingDailyStat(
+                date=row['date'],
+                document_type_id=row['document_type'],
+                traite_par_id=row['traite_par'],
+                bucket=row['bucket'],
+                processed_count=row['processed_count'],
+                total_seconds=row['total_seconds'],
+            )
+            for row in rows
+        ], batch_size=500)
+    return len(rows)
+
+
+def histogram_percentile(counts, seconds, fraction):
+    """
+    Percentile (en heures) estimé à partir d'un histogramme par tranches :
+    interpolation linéaire dans la tranche, moyenne de la tranche pour la
+    dernière tranche (ouverte).
+    """
+    target = fraction * sum(counts)
+    cumulated = 0
+    for index, count in enumerate(counts):
+        if count and cumulated + count >= target:
+            if index == len(PROCESSING_BUCKET_BOUNDS_HOURS):
+                return seconds[index] / count / 3600
+            low = PROCESSING_BUCKET_BOUNDS_HOURS[index - 1] if index else 0
+            high = PROCESSING_BUCKET_BOUNDS_HOURS[index]
+            return low + (high - low) * (target - cumulated) / count
+        cumulated += count
+    return None
+
+
+def summarize_processing_rows(rows):
+    """Moyenne, médiane et p90 (en heures) par regroupement à partir des lignes par tranche"""
+    size = len(PROCESSING_BUCKET_BOUNDS_HOURS) + 1
+    histograms = {name: {} for name in PROCESSING_GROUPS}
+    for row in rows:
+        for name, field in PROCESSING_GROUPS.items():
+            key = row[field] if field else None
+            counts, seconds = histograms[name].setdefault(key, ([0] * size, [0.0] * size))
+            counts[row['bucket']] += row['processed_count']
+            seconds[row['bucket']] += row['total_seconds']
+
+    summary = {}
+    for name, groups in histograms.items():
+        summary[name] = {}
+        for key, (counts, seconds) in groups.items():
+            total = sum(counts)
+            if not total:
+                continue
+            summary[name][key] = {
+                'count': total,
+                'avg_hours': sum(seconds) / total / 3600,
+                'median_hours': histogram_percentile(counts, seconds, 0.5),
+                'p90_hours': histogram_percentile(counts, seconds, 0.9),
+            }
+    return summary
+
+
+def duration_percentile(documents, field, fraction):
+    """
+    Percentile exact (rang le plus proche) de la durée de traitement par groupe,
+    calculé par la base : ROW_NUMBER() et COUNT() OVER (PARTITION BY ...), puis
+    filtre sur la ligne de rang ceil(fraction * effectif) de chaque groupe.
+    """
+    partition = [F(field)] if field else None
+    ranked = documents.annotate(
+        row_rank=Window(RowNumber(), partition_by=partition, order_by=[F('duration').asc(), F('pk').asc()]),
+        group_size=Window(Count('pk'), partition_by=partition),
+    ).filter(
+        row_rank__gte=F('group_size') * fraction,
+        row_rank__lt=F('group_size') * fraction + 1,
+    )
+    fields = [field] if field else []
+    return {row[field] if field else None: row['duration'] for row in ranked.values(*fields, 'duration')}
+
+
+def exact_processing_summary(documents):
+    """Moyenne, médiane et p90 exacts (en heures) par regroupement, sur les documents bruts"""
+    summary = {}
+    for name, field in PROCESSING_GROUPS.items():
+        aggregates = {'count': Count('pk'), 'avg': Avg('duration')}
+        if field:
+            averages = {row[field]: row for row in documents.values(field).annotate(**aggregates)}
+        else:
+            averages = {None: documents.aggregate(**aggregates)}
+        medians = duration_percentile(documents, field, 0.5)
+        p90s = duration_percentile(documents, field, 0.9)
+
+        summary[name] = {
+            key: {
+                'count': row['count'],
+                'avg_hours': row['avg'].total_seconds() / 3600,
+                'median_hours': medians[key].total_seconds() / 3600,
+                'p90_hours': p90s[key].total_seconds() / 3600,
+            }
+            for key, row in averages.items() if row['count']
+        }
+    return summary
+
+
+def compute_processing_time_stats(exact=False):
+    """
+    Temps de traitement des documents : global, par type de document et par
+    administrateur.
+
+    Par défaut, l'historique est lu dans les agrégats quotidiens (coût constant
+    quelle que soit la profondeur d'historique) et seuls les jours pas encore
+    agrégés sont calculés sur les documents ; exact=True calcule les
+    percentiles exacts sur tous les documents.
+    """
+    documents = processed_documents()
+    if exact:
+        summary = exact_processing_summary(documents)
+    else:
+        yesterday = timezone.localdate() - timedelta(days=1)
+        last_rollup = DocumentProcessingDailyStat.objects.aggregate(last=Max('date'))['last']
+        rows = []
+        if last_rollup:
+            # La journée en cours n'est jamais lue dans les agrégats (incomplète)
+            last_rollup = min(last_rollup, yesterday)
+            rows = list(
+                DocumentProcessingDailyStat.objects.filter(date__lte=last_rollup).order_by()
+                .values('document_type', 'traite_par', 'bucket')
+                .annotate(processed_count=Sum('processed_count'), total_seconds=Sum('total_seconds'))
+            )
+            documents = documents.filter(reviewed_at__date__gt=last_rollup)
+        summary = summarize_processing_rows(rows + processing_rows(documents))
+
+    type_names = dict(
+        DocumentType.objects.filter(pk__in=summary['by_document_type']).values_list('pk', 'name')
+    )
+    admin_names = {
+        admin.pk: admin.full_name
+        for admin in CustomUser.objects.filter(pk__in=summary['by_admin']).only('first_name', 'last_name', 'username')
+    }
+
+    def rounded(values):
+        return {
+            key: round(value, 2) if isinstance(value, float) else value
+            for key, value in values.items()
+        }
+
+    overall = summary['overall'].get(None)
+    return {
+        'method': 'exact' if exact else 'rollup',
+        'overall': rounded(overall) if overall else None,
+        'by_document_type': [
+            {
+                'document_type': type_id,
+                'document_type_name': type_names.get(type_id, 'Non défini'),
+                **rounded(values)
+            }
+            for type_id, values in summary['by_document_type'].items()
+        ],
+        'by_admin': [
+            {
+                'traite_par': admin_id,
+                'admin_name': admin_names.get(admin_id, 'Non défini'),
+                **rounded(values)
+            }
+            for admin_id, values in summary['by_admin'].items()
+        ],
+    }
+
+
+# =============================
+# CACHE DES STATISTIQUES
+# =============================
+
+STATS_COMPUTERS = {
+    'scraped_projects': compute_scraped_project_stats,
+    'dashboard': compute_dashboard_stats,
+    'project_alerts': compute_project_alert_stats,
+    'project_requests': compute_project_request_stats,
+}
+
+# Statistiques à invalider quand un modèle change
+STATS_INVALIDATED_BY = {
+    ScrapedProject: ['scraped_projects', 'dashboard'],
+    ScrapingSession: ['scraped_projects', 'dashboard'],
+    Project: ['dashboard'],
+    ProjectAlert: ['project_alerts'],
+    ProjectRequest: ['project_requests'],
+}
+
+
+def _version_key(name):
+    return f'stats:{name}:version'
+
+
+def get_stats_version(name):
+    """
+    Version courante d'une statistique. Elle fait partie de la clé de cache :
+    l'invalidation incrémente la version, ce qui évite de remettre en cache un
+    résultat calculé pendant une écriture concurrente.
+    """
+    version = cache.get(_version_key(name))
+    if version is None:
+        # Valeur initiale unique, pour ne jamais retomber sur une ancienne entrée
+        cache.add(_version_key(name), time.time_ns(), None)
+        version = cache.get(_version_key(name), 0)
+    return version
+
+
+def get_cached_stats(name):
+    """Retourne (données, etag) d'une statistique, calculée au besoin"""
+    key = f'stats:{name}:{get_stats_version(name)}'
+    entry = cache.get(key)
+    if entry is None:
+        data = STATS_COMPUTERS[name]()
+        payload = json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True)
+        entry = {'data': data, 'etag': hashlib.md5(payload.encode('utf-8')).hexdigest()}
+        cache.set(key, entry, getattr(settings, 'STATS_CACHE_TIMEOUT', 300))
+    return entry['data'], entry['etag']
+
+
+def invalidate_stats(*names):
+    """Invalide les statistiques indiquées (toutes si aucun nom) après le commit en cours"""
+    names = names or tuple(STATS_COMPUTERS)
+
+    def bump_versions():
+        for name in names:
+            try:
+                cache.incr(_version_key(name))
+            except ValueError:
+                cache.set(_version_key(name), time.time_ns(), None)
+
+    transaction.on_commit(bump_versions)
+
+
+def invalidate_stats_for_model(model):
+    """Invalide les statistiques qui dépendent du modèle"""
+    names = STATS_INVALIDATED_BY.get(model)
+    if names:
+        invalidate_stats(*names)
@@ -1,9 +1,18 @@
-from celery import shared_task
-from django.utils import timezone
+"""
+Tâches en arrière-plan de main_app (voir background.py pour le moteur d'exécution)
+"""
 from datetime import timedelta
-from .models import ProjectAlert
 
-@shared_task
+from django.conf import settings
+from django.core.mail import send_mail
+from django.utils import timezone
+
+from .background import background_task
+from .models import CustomUser, ProjectAlert
+from .stats import invalidate_stats, rollup_document_processing
+
+
+@background_task
 def cleanup_old_alerts():
     """Nettoyer les anciennes alertes automatiquement"""
     # Marquer les alertes de plus de 2 semaines comme non nouvelles
@@ -20,4 +29,142 @@ def cleanup_old_alerts():
         status='read'
     ).update(status='archived')
     
-    return "Nettoyage des alertes terminé"
\ No newline at end of file
+    # update() ne déclenche pas les signaux
+    invalidate_stats('project_alerts')
+    
+    return "Nettoyage des alertes terminé"
+
+
+@background_task
+def rollup_document_stats():
+    """Agréger les temps de traitement des documents d'hier et d'aujourd'hui"""
+    rows = rollup_document_processing(start=timezone.localdate() - timedelta(days=1))
+    return f"{rows} ligne(s) d'agrégat de traitement écrite(s)"
+
+
+@background_task(max_retries=5, retry_delay=60)
+def send_email(subject, message, recipients):
+    """Envoyer un email (réessayé si le serveur SMTP est indisponible)"""
+    send_mail(
+        subject=subject,
+        message=message,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        recipient_list=recipients,
+        fail_silently=False
+    )
+    return f"Email envoyé à {len(recipients)} destinataire(s)"
+
+
+@background_task(max_retries=5, retry_delay=60)
+def send_project_alerts_email(total_alerts, high_priority_count):
+    """Envoyer aux admins l'email récapitulatif des nouvelles alertes"""
+    # Récupérer les alertes récentes
+    recent_alerts = ProjectAlert.objects.filter(
+        status='active',
+        alert_created_at__gte=timezone.now() - timedelta(hours=1)
+    ).order_by('-priority_level', '-alert_created_at')[:10]
+
+    # Construire le message email
+    subject = f"🔔 {total_alerts} nouveau{'x' if total_alerts > 1 else ''} projet{'s' if total_alerts > 1 else ''} de financement climatique détecté{'s' if total_alerts > 1 else ''}"
+
+    message_parts = [
+        "🌍 NOUVELLES OPPORTUNITÉS DE FINANCEMENT CLIMATIQUE",
+        "=" * 60,
+        f"📊 Total nouveaux projets: {total_alerts}",
+        f"🔥 Haute priorité: {high_priority_count}",
+        f"📅 Détectés le: {timezone.now().strftime('%d/%m/%Y à %H:%M')}",
+        "",
+        "📋 APERÇU DES NOUVEAUX PROJETS:",
+        "-" * 40
+    ]
+
+    for i, alert in enumerate(recent_alerts[:5], 1):
+        priority_indicator = {
+            'urgent': '🚨',
+            'high': '🔥',
+            'medium': '📋',
+            'low': '📝'
+        }.get(alert.priority_level, '📋')
+    
+        message_parts.extend([
+            f"{i}. {priority_indicator} [{alert.get_source_display()}] {alert.title[:80]}",
+            f"   💰 Financement: {alert.total_funding}",
+            f"   🏢 Organisation: {alert.organization}",
+            f"   📊 Score qualité: {alert.data_completeness_score}%",
+            f"   🎯 Priorité: {alert.get_priority_level_display()}",
+            ""
+        ])
+
+    if len(recent_alerts) > 5:
+        message_parts.append(f"... et {len(recent_alerts) - 5} autres projets")
+
+    message_parts.extend([
+        "",
+        "🎯 ACTIONS RECOMMANDÉES:",
+        "• Consulter les nouvelles alertes dans l'interface admin",
+        "• Évaluer les opportunités haute priorité en premier",
+        "• Vérifier les critères d'éligibilité pour la Mauritanie",
+        "• Préparer les dossiers de candidature",
+        "",
+        "💻 ACCÈS RAPIDE:",
+        "• Interface admin: /admin/main_app/projectalert/",
+        "• Page alertes: /suivez-appels",
+        "• API alertes: /api/project-alerts/",
+        "",
+        f"Système automatique de veille - {timezone.now().strftime('%d/%m/%Y %H:%M')}",
+        "Pour modifier vos préférences de notification, contactez l'administrateur."
+    ])
+
+    full_message = "\n".join(message_parts)
+
+    # Récupérer les destinataires (tous les admins actifs)
+    recipients = list(CustomUser.objects.filter(
+        role='admin',
+        actif=True,
+        email__isnull=False
+    ).exclude(email='').values_list('email', flat=True))
+
+    if recipients:
+        send_mail(
+            subject=subject,
+            message=full_message,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            recipient_list=recipients,
+            fail_silently=False
+        )
+    
+        # Marquer les alertes comme ayant été envoyées par email
+        # (update() est impossible sur un queryset découpé)
+        ProjectAlert.objects.filter(pk__in=[alert.pk for alert in recent_alerts]).update(
+            email_sent=True,
+            email_sent_at=timezone.now()
+        )
+
+    return f"Email d'alerte envoyé à {len(recipients)} destinataire(s)"
+
+
+@background_task
+def notify_users(user_ids, notification_type, title, message, links=None):
+    """Envoi groupé d'une notification à des utilisateurs"""
+    from .notifications import notify_users as fan_out
+
+    return len(fan_out(user_ids, notification_type, title, message, **(links or {})))
+
+
+@background_task
+def notify_admins(notification_type, title, message, links=None):
+    """Envoi groupé d'une notification à tous les administrateurs actifs"""
+    from .notifications import notify_admins as fan_out
+
+    return len(fan_out(notification_type, title, message, **(links or {})))
+
+
+@background_task(max_retries=0)
+def run_scheduled_job(name):
+    """Tâche planifiée de SCHEDULED_JOBS (Celery beat), sous verrou et enregistrée"""
+    from .jobs import run_job
+
+    session = run_job(name)
+    if session is None:
+        return f"Tâche {name} déjà en cours, ignorée"
+    return f"Tâche {name} terminée ({'succès' if session.success else 'échec'})"
@@ -1,3 +1,1716 @@
-from django.test import TestCase
+import asyncio
+import csv
+import hashlib
+import json
+import math
+import os
+import re
+import tempfile
+import time
+import unittest
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+import pandas as pd
+
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from . import amounts, realtime, tasks
+from .background import BackgroundTask, get_backend
+from .jobs import is_due, run_job
+from .management.commands import scraping
+from .management.commands.collection import Command as CollectionCommand
+from .loaders import SCRAPER_COLUMNS, ClimateFundsLoader, OECDLoader
+from .notifications import notify_admins
+from .pagination import iter_by_keyset
+from .search import search
+from .serializers import DocumentSerializer, ProjectRequestCreateSerializer
+
+from .models import (
+    CustomUser, Document, DocumentProcessingDailyStat, DocumentType, ImportedFile, JobLock, Notification,
+    NotificationCounter, Project, ProjectAlert, ProjectRequest, ScrapedProject, ScrapingSession
+)
+from .stats import compute_processing_time_stats, get_cached_stats, rollup_document_processing
+from .views import DocumentViewSet, ProjectRequestViewSet, ScrapedProjectViewSet
+
+
+class StatsEndpointsQueryCountTests(TestCase):
+    """Les endpoints de statistiques font une requête agrégée par table"""
+
+    @classmethod
+    def setUpTestData(cls):
+        scores = [95, 80, 72, 65, 55, 40, 10]
+        scraped = []
+        for i in range(21):
+            source = ['GEF', 'GCF', 'OTHER'][i % 3]
+            scraped.append(ScrapedProject(
+                title=f'Projet climat numéro {i}',
+                source=source,
+                organization='Organisation',
+                data_completeness_score=scores[i % len(scores)],
+                is_relevant_for_mauritania=i % 4 != 0,
+                needs_review=i % 5 == 0,
+                unique_hash=f'hash-{i}',
+            ))
+        ScrapedProject.objects.bulk_create(scraped)
+
+        cls.client_user = CustomUser.objects.create_user(username='client', password='x')
+        project = Project.objects.create(
+            name='Projet lié', type_project='etat', fund='CIF', status='ready',
+            score_viabilite=70, montant_demande=1000, contact_name='Contact', contact_email='c@example.com'
+        )
+        Project.objects.create(
+            name='Projet en cours', type_project='prive', fund='CIF', status='progress',
+            score_viabilite=40, montant_demande=500, contact_name='Contact', contact_email='c@example.com'
+        )
+        ScrapedProject.objects.filter(unique_hash='hash-1').update(linked_project=project)
+
+        priorities = ['low', 'medium', 'high', 'urgent']
+        ProjectAlert.objects.bulk_create([
+            ProjectAlert(
+                scraped_project=scraped_project,
+                title=scraped_project.title,
+                source=scraped_project.source,
+                priority_level=priorities[i % len(priorities)],
+                status='active' if i % 3 else 'archived',
+                is_new_this_week=i % 2 == 0,
+            )
+            for i, scraped_project in enumerate(ScrapedProject.objects.all())
+        ])
+
+        ProjectRequest.objects.bulk_create([
+            ProjectRequest(client=cls.client_user, message='Demande', status=status, priority_score=score)
+            for status, score in [('pending', 80), ('pending', 20), ('approved', 90), ('rejected', 50)]
+        ])
+
+    def setUp(self):
+        cache.clear()
+        self.api = APIClient()
+
+    def get_json(self, url, expected_queries):
+        with self.assertNumQueries(expected_queries):
+            response = self.api.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_scraped_project_stats(self):
+        # 1 agrégat ScrapedProject + 1 pour les sessions récentes
+        data = self.get_json('/api/scraped-projects/stats/', 2)
+
+        self.assertEqual(data['total_scraped'], ScrapedProject.objects.count())
+        for source_code, _ in ScrapedProject.SOURCE_CHOICES:
+            self.assertEqual(data['by_source'][source_code], ScrapedProject.objects.filter(source=source_code).count())
+        self.assertEqual(
+            data['by_completeness_score']['good'],
+            ScrapedProject.objects.filter(data_completeness_score__gte=70, data_completeness_score__lt=90).count()
+        )
+        self.assertEqual(sum(data['by_completeness_score'].values()), ScrapedProject.objects.count())
+        self.assertEqual(data['linked_projects'], 1)
+        self.assertEqual(data['needs_review'], ScrapedProject.objects.filter(needs_review=True).count())
+        self.assertEqual(data['ready_projects'], ScrapedProject.objects.filter(
+            linked_project__isnull=True, is_relevant_for_mauritania=True, data_completeness_score__gte=60
+        ).count())
+
+    def test_dashboard_stats(self):
+        # 1 agrégat Project + 1 agrégat ScrapedProject + 1 pour les sessions récentes
+        data = self.get_json('/api/projects/dashboard_stats/', 3)
+
+        self.assertEqual(data['total_projects'], 2)
+        self.assertEqual(data['ready_projects'], 1)
+        self.assertEqual(data['pending_projects'], 1)
+        self.assertEqual(data['avg_score'], 55)
+        self.assertEqual(data['total_scraped'], 21)
+        self.assertEqual(data['scraped_by_source']['GEF'], 7)
+
+    def test_project_alert_stats(self):
+        data = self.get_json('/api/project-alerts/stats/', 1)
+
+        active = ProjectAlert.objects.filter(status='active')
+        self.assertEqual(data['total_alerts'], ProjectAlert.objects.count())
+        self.assertEqual(data['active_alerts'], active.count())
+        self.assertEqual(data['high_priority_alerts'], active.filter(priority_level__in=['high', 'urgent']).count())
+        self.assertEqual(data['new_this_week'], active.filter(is_new_this_week=True).count())
+        self.assertEqual(data['by_source']['GCF'], active.filter(source='GCF').count())
+        self.assertEqual(data['by_priority']['urgent'], active.filter(priority_level='urgent').count())
+
+    def test_project_request_stats(self):
+        data = self.get_json('/api/project-requests/stats/', 1)
+
+        self.assertEqual(data['total_requests'], 4)
+        self.assertEqual(data['pending_requests'], 2)
+        self.assertEqual(data['approved_requests'], 1)
+        self.assertEqual(data['rejected_requests'], 1)
+        self.assertEqual(data['high_priority_pending'], 1)
+
+
+class StatsCacheTests(TestCase):
+    """Cache des statistiques: ETag, 304 et invalidation par signaux"""
+
+    url = '/api/scraped-projects/stats/'
+
+    def setUp(self):
+        cache.clear()
+        self.api = APIClient()
+        ScrapedProject.objects.create(title='Projet de résilience climatique', source='GEF', unique_hash='h-1')
+
+    def test_second_call_is_served_from_cache(self):
+        first = self.api.get(self.url)
+        with self.assertNumQueries(0):
+            second = self.api.get(self.url)
+        self.assertEqual(first.json(), second.json())
+        self.assertEqual(first['ETag'], second['ETag'])
+
+    def test_matching_etag_returns_304(self):
+        etag = self.api.get(self.url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.api.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_save_invalidates_dependent_stats_only(self):
+        etag = self.api.get(self.url)['ETag']
+        alerts_etag = self.api.get('/api/project-alerts/stats/')['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ScrapedProject.objects.create(title='Projet d\'adaptation côtière', source='GCF', unique_hash='h-2')
+
+        response = self.api.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['total_scraped'], 2)
+        self.assertNotEqual(response['ETag'], etag)
+
+        with self.assertNumQueries(0):
+            response = self.api.get('/api/project-alerts/stats/', HTTP_IF_NONE_MATCH=alerts_etag)
+        self.assertEqual(response.status_code, 304)
+
+
+class ProjectListQueryCountTests(TestCase):
+    """La liste des projets fait un nombre de requêtes constant"""
+
+    @classmethod
+    def setUpTestData(cls):
+        user = CustomUser.objects.create_user(username='consultant', password='x')
+        cls.mandatory = [
+            DocumentType.objects.create(name='Note conceptuelle', obligatoire=True),
+            DocumentType.objects.create(name='Budget', obligatoire=True),
+        ]
+        optional = DocumentType.objects.create(name='Annexe', obligatoire=False)
+
+        Project.objects.bulk_create([
+            Project(
+                name=f'Projet {i}', type_project='etat', fund='CIF', consultant=user,
+                contact_name='Contact', contact_email='c@example.com'
+            )
+            for i in range(100)
+        ])
+        documents = []
+        for i, project in enumerate(Project.objects.all()):
+            documents.append(Document(
+                uploaded_by=user, project=project, name='Note', document_type=cls.mandatory[0],
+                status='submitted' if i % 2 else 'approved'
+            ))
+            documents.append(Document(
+                uploaded_by=user, project=project, name='Annexe', document_type=optional, status='submitted'
+            ))
+        Document.objects.bulk_create(documents)
+
+    def setUp(self):
+        self.api = APIClient()
+
+    def test_list_query_count_is_constant(self):
+        # count + projets + documents préchargés + types obligatoires
+        with self.assertNumQueries(4):
+            response = self.api.get('/api/projects/', {'page_size': 100})
+        self.assertEqual(response.status_code, 200)
+
+        results = response.json()['results']
+        self.assertEqual(len(results), 100)
+        for data in results:
+            project = Project.objects.get(pk=data['id'])
+            self.assertEqual(data['progress_percentage'], project.progress_percentage)
+            self.assertEqual(data['missing_documents'], project.missing_documents)
+            self.assertEqual(
+                [doc['id'] for doc in data['submitted_documents']],
+                list(project.documents.filter(status='submitted').values_list('id', flat=True))
+            )
+
+
+class ScrapedProjectListTests(TestCase):
+    """Liste des projets scrapés : pagination par curseur, champs choisis, requêtes constantes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        ScrapedProject.objects.bulk_create([
+            ScrapedProject(title=f'Projet {i}', source='GEF', unique_hash=f'h-{i}', description='Longue description')
+            for i in range(25)
+        ])
+        # Même date pour tous : le curseur départage par id
+        ScrapedProject.objects.update(scraped_at=timezone.now())
+
+    def setUp(self):
+        self.api = APIClient()
+
+    def test_cursor_pages_chain_without_duplicates(self):
+        ids = []
+        url, params = '/api/scraped-projects/', {'pagination': 'cursor', 'page_size': 10}
+        while url:
+            with self.assertNumQueries(1):  # ni COUNT(*) ni requête par projet
+                response = self.api.get(url, params)
+            data = response.json()
+            self.assertNotIn('count', data)
+            ids.extend(project['id'] for project in data['results'])
+            url, params = data['next'], None
+
+        self.assertEqual(len(ids), 25)
+        self.assertEqual(ids, sorted(ScrapedProject.objects.values_list('id', flat=True)))
+        # Mode curseur : jeu de champs compact
+        self.assertNotIn('description', data['results'][0])
+
+    def test_fields_parameter(self):
+        response = self.api.get('/api/scraped-projects/', {'fields': 'id,title,unknown', 'page_size': 5})
+        self.assertEqual([set(project) for project in response.json()['results']], [{'id', 'title'}] * 5)
+
+        response = self.api.get('/api/scraped-projects/', {'fields': 'unknown', 'page_size': 1})
+        self.assertIn('description', response.json()['results'][0])
+
+    def test_page_number_query_count_is_constant(self):
+        for page_size in (5, 25):
+            with self.assertNumQueries(2):  # count + page (linked_project en jointure)
+                response = self.api.get('/api/scraped-projects/', {'page_size': page_size, 'compact': 'true'})
+            self.assertEqual(len(response.json()['results']), page_size)
+
+    def test_cursor_is_rejected_with_search(self):
+        response = self.api.get('/api/scraped-projects/', {'pagination': 'cursor', 'search': 'projet'})
+        self.assertEqual(response.status_code, 400)
+
+
+class DocumentFileMetadataTests(TestCase):
+    """Taille, type et empreinte des documents stockés en base (plus de lecture disque par ligne)"""
+
+    CONTENT = b'%PDF-1.4 note conceptuelle' * 100
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.client_user = CustomUser.objects.create_user(username='client', password='x')
+        cls.scraped = ScrapedProject.objects.create(title='Projet de résilience', source='GEF', unique_hash='h-doc')
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        media = override_settings(MEDIA_ROOT=tmp.name)
+        media.enable()
+        self.addCleanup(media.disable)
+
+    def upload(self, name='note.pdf', content=CONTENT):
+        return Document.objects.create(
+            uploaded_by=self.client_user, scraped_project=self.scraped, name='Note',
+            file=SimpleUploadedFile(name, content, content_type='application/pdf')
+        )
+
+    def test_upload_stores_metadata_once(self):
+        document = self.upload()
+        document.refresh_from_db()
+        self.assertEqual(document.file_size, len(self.CONTENT))
+        self.assertEqual(document.file_type, 'PDF')
+        self.assertEqual(document.checksum, hashlib.sha256(self.CONTENT).hexdigest())
+        with document.file.open('rb') as stored:
+            self.assertEqual(stored.read(), self.CONTENT)  # fichier relu intégralement à la sauvegarde
+
+        # Nouvelle sauvegarde sans nouveau fichier : le stockage n'est pas lu
+        with mock.patch.object(FileSystemStorage, 'open') as storage_open, \
+                mock.patch.object(FileSystemStorage, 'size') as storage_size:
+            document.status = 'submitted'
+            document.save()
+            self.assertEqual(DocumentSerializer(document).data['file_size'], document.file_size)
+        storage_open.assert_not_called()
+        storage_size.assert_not_called()
+
+    def test_backfill_fills_missing_metadata(self):
+        filled = self.upload('budget.xlsx', b'budget')
+        missing_size = self.upload()
+        missing_checksum = self.upload('statuts.docx', b'statuts')
+        Document.objects.filter(pk=missing_size.pk).update(file_size=None, file_type='')
+        Document.objects.filter(pk=missing_checksum.pk).update(checksum='')
+        gone = self.upload('perdu.pdf', b'perdu')
+        Document.objects.filter(pk=gone.pk).update(file_size=None)
+        gone.file.storage.delete(gone.file.name)
+
+        call_command('backfill_document_metadata', '--dry-run', stdout=StringIO())
+        self.assertIsNone(Document.objects.get(pk=missing_size.pk).file_size)
+
+        out = StringIO()
+        with mock.patch.object(Document, 'compute_file_metadata', autospec=True,
+                               side_effect=Document.compute_file_metadata) as compute:
+            call_command('backfill_document_metadata', stdout=out)
+        self.assertEqual({call.args[0].pk for call in compute.call_args_list}, {missing_size.pk, missing_checksum.pk, gone.pk})
+
+        missing_size.refresh_from_db()
+        self.assertEqual((missing_size.file_size, missing_size.file_type), (len(self.CONTENT), 'PDF'))
+        missing_checksum.refresh_from_db()
+        self.assertEqual(missing_checksum.checksum, hashlib.sha256(b'statuts').hexdigest())
+        self.assertIsNone(Document.objects.get(pk=gone.pk).file_size)
+        self.assertIn('1 fichier(s) introuvable(s)', out.getvalue())
+        self.assertEqual(Document.objects.get(pk=filled.pk).checksum, hashlib.sha256(b'budget').hexdigest())
+
+
+class DocumentListingTests(TestCase):
+    """Listes de documents admin : pages par curseur, exports en streaming"""
+
+    URL = '/api/documents/all_documents_admin/'
+
+    @classmethod
+    def setUpTestData(cls):
+        user = CustomUser.objects.create_user(username='client', password='x')
+        scraped = ScrapedProject.objects.create(title='Projet de résilience', source='GEF', unique_hash='h-list')
+        Document.objects.bulk_create([
+            Document(uploaded_by=user, scraped_project=scraped, name=f'Document {i}', status='submitted')
+            for i in range(7)
+        ])
+        documents = list(Document.objects.order_by('id'))
+        cls.ids = [document.id for document in documents]
+        now = timezone.now()
+        # Cinq documents à la même date, deux plus anciens
+        Document.objects.filter(pk__in=cls.ids[:5]).update(uploaded_at=now)
+        Document.objects.filter(pk__in=cls.ids[5:]).update(uploaded_at=now - timedelta(days=1))
+
+    def setUp(self):
+        self.api = APIClient()
+
+    def test_cursor_pages_chain_without_duplicates(self):
+        ids = []
+        url, params = self.URL, {'pagination': 'cursor', 'page_size': 2}
+        while url:
+            data = self.api.get(url, params).json()
+            ids.extend(document['id'] for document in data['results'])
+            url, params = data['next'], None
+        # (-uploaded_at, id) : même date départagée par id
+        self.assertEqual(ids, self.ids)
+
+    def streamed(self, export_format):
+        response = self.api.get(self.URL, {'export_format': export_format})
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content).decode('utf-8')
+
+    def test_ndjson_export(self):
+        response, body = self.streamed('ndjson')
+        self.assertTrue(response['Content-Type'].startswith('application/x-ndjson'))
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([row['id'] for row in rows], self.ids[4::-1] + self.ids[:4:-1])
+        self.assertEqual(rows[0]['name'], 'Document 4')
+
+    def test_csv_export(self):
+        response, body = self.streamed('csv')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="documents.csv"')
+        rows = list(csv.reader(body.splitlines()))
+        self.assertEqual(rows[0], DocumentViewSet.EXPORT_CSV_FIELDS)
+        self.assertEqual(sorted(int(row[0]) for row in rows[1:]), self.ids)
+
+    def test_iter_by_keyset_across_chunks(self):
+        # Lots de 2 : les limites tombent au milieu des documents de même date
+        with self.assertNumQueries(5):
+            ids = [document.id for document in iter_by_keyset(Document.objects.all(), 'uploaded_at', chunk_size=2)]
+        self.assertEqual(ids, self.ids[4::-1] + self.ids[:4:-1])
+        self.assertEqual(list(iter_by_keyset(Document.objects.none(), 'uploaded_at')), [])
+
+
+class DocumentProcessingTimeTests(TestCase):
+    """Temps de traitement des documents calculés par la base"""
+
+    @classmethod
+    def setUpTestData(cls):
+        client = CustomUser.objects.create_user(username='client', password='x')
+        cls.admins = [CustomUser.objects.create_user(username=f'admin{i}', password='x', role='admin') for i in range(2)]
+        cls.types = [DocumentType.objects.create(name='Budget'), DocumentType.objects.create(name='Statuts')]
+        scraped = ScrapedProject.objects.create(title='Projet de résilience climatique', source='GEF', unique_hash='h-1')
+
+        now = timezone.now()
+        documents = []
+        for i in range(60):
+            reviewed_at = now - timedelta(days=i % 20, hours=1)
+            documents.append(Document(
+                uploaded_by=client, scraped_project=scraped, name=f'Document {i}', status='approved',
+                document_type=cls.types[i % 2], traite_par=cls.admins[i % 3 % 2],
+                reviewed_at=reviewed_at, date_soumission=reviewed_at - timedelta(hours=(i * 7) % 97 + 0.5)
+            ))
+        Document.objects.bulk_create(documents)
+        cls.documents = documents
+
+    def durations(self, **filters):
+        return sorted(
+            (doc.reviewed_at - doc.date_soumission).total_seconds() / 3600
+            for doc in self.documents
+            if all(getattr(doc, field) == value for field, value in filters.items())
+        )
+
+    def nearest_rank(self, durations, fraction):
+        return round(durations[math.ceil(fraction * len(durations)) - 1], 2)
+
+    def test_exact_percentiles_match_python(self):
+        stats = compute_processing_time_stats(exact=True)
+
+        durations = self.durations()
+        self.assertEqual(stats['overall']['count'], 60)
+        self.assertEqual(stats['overall']['avg_hours'], round(sum(durations) / len(durations), 2))
+        self.assertEqual(stats['overall']['median_hours'], self.nearest_rank(durations, 0.5))
+        self.assertEqual(stats['overall']['p90_hours'], self.nearest_rank(durations, 0.9))
+
+        for row in stats['by_document_type']:
+            durations = self.durations(document_type_id=row['document_type'])
+            self.assertEqual(row['median_hours'], self.nearest_rank(durations, 0.5))
+            self.assertEqual(row['p90_hours'], self.nearest_rank(durations, 0.9))
+        for row in stats['by_admin']:
+            durations = self.durations(traite_par_id=row['traite_par'])
+            self.assertEqual(row['count'], len(durations))
+            self.assertEqual(row['p90_hours'], self.nearest_rank(durations, 0.9))
+
+    def test_rollup_gives_same_result_as_live_histogram(self):
+        live = compute_processing_time_stats()
+        rollup_document_processing()
+        self.assertTrue(DocumentProcessingDailyStat.objects.exists())
+
+        # agrégat max + agrégats + documents non agrégés + noms des types + noms des admins
+        with self.assertNumQueries(5):
+            rolled_up = compute_processing_time_stats()
+        self.assertEqual(rolled_up, live)
+        self.assertEqual(rolled_up['overall']['avg_hours'], compute_processing_time_stats(exact=True)['overall']['avg_hours'])
+
+    def test_statistics_endpoint_keeps_average(self):
+        response = APIClient().get('/api/documents/statistics/')
+        self.assertEqual(response.status_code, 200)
+        durations = self.durations()
+        self.assertEqual(response.json()['avg_processing_time_hours'], round(sum(durations) / len(durations), 2))
+
+
+@override_settings(REALTIME_HEARTBEAT_SECONDS=1, REALTIME_STREAM_MAX_SECONDS=5)
+class RealtimeEventsTests(TestCase):
+    """Événements temps réel : flux SSE et publication depuis les modèles"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_user(username='admin', password='x', role='admin')
+        cls.client_user = CustomUser.objects.create_user(username='client', password='x', role='client')
+
+    def subscribe(self, *channels):
+        subscription = realtime.get_broker().subscribe(channels)
+        self.addCleanup(subscription.close)
+        return subscription
+
+    def next_event(self, subscription):
+        message = subscription.get(timeout=1)
+        self.assertIsNotNone(message)
+        return json.loads(message)
+
+    def stream_token(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.post('/api/notifications/stream_token/')
+        self.assertEqual(response.status_code, 200)
+        return response.json()['token']
+
+    def test_stream_requires_authentication(self):
+        response = APIClient().get('/api/notifications/stream/')
+        self.assertEqual(response.status_code, 401)
+
+    def test_stream_rejects_drf_token_and_expired_stream_token(self):
+        token = Token.objects.create(user=self.client_user)
+        response = APIClient().get('/api/notifications/stream/', {'token': token.key})
+        self.assertEqual(response.status_code, 401)
+
+        stream_token = self.stream_token(self.client_user)
+        with mock.patch('django.core.signing.time.time', return_value=time.time() + 120):
+            response = APIClient().get('/api/notifications/stream/', {'stream_token': stream_token})
+        self.assertEqual(response.status_code, 401)
+
+        # Un jeton de flux n'ouvre pas le reste de l'API
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {stream_token}')
+        self.assertIn(client.get('/api/notifications/unread_count/').status_code, (401, 403))
+
+    def test_stream_refused_on_sync_wsgi_worker(self):
+        stream_token = self.stream_token(self.client_user)
+        with self.settings(REALTIME_WSGI_STREAMS=False):
+            response = APIClient().get('/api/notifications/stream/', {'stream_token': stream_token})
+        self.assertEqual(response.status_code, 503)
+
+    @override_settings(REALTIME_WSGI_STREAMS=True)
+    def test_stream_pushes_created_notifications(self):
+        stream_token = self.stream_token(self.client_user)
+        response = APIClient().get(
+            '/api/notifications/stream/', {'stream_token': stream_token}, HTTP_ACCEPT='text/event-stream'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+        chunks = iter(response.streaming_content)
+        self.assertEqual(next(chunks), b'retry: 5000\n\n')
+        self.assertIn(b'"unread_count": 0', next(chunks))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            notification = Notification.objects.create(
+                type='info', title='Bienvenue', message='Message', consultant=self.client_user
+            )
+        event = next(chunks).decode('utf-8')
+        self.assertTrue(event.startswith('event: notification.created\n'))
+        self.assertIn(f'"id": {notification.pk}', event)
+        response.close()
+
+    @override_settings(REALTIME_WSGI_STREAMS=True, BACKGROUND_TASKS_BACKEND='eager')
+    def test_new_request_reaches_admin_stream(self):
+        projects = [
+            ScrapedProject.objects.create(title=f'Projet climat {i}', source='GEF', unique_hash=f'h-{i}')
+            for i in range(2)
+        ]
+        response = APIClient().get(
+            '/api/notifications/stream/', {'stream_token': self.stream_token(self.admin)},
+            HTTP_ACCEPT='text/event-stream'
+        )
+        self.assertEqual(response.status_code, 200)
+        chunks = iter(response.streaming_content)
+        next(chunks), next(chunks)  # retry, counts
+
+        client = APIClient()
+        client.force_authenticate(self.client_user)
+        with self.captureOnCommitCallbacks(execute=True):
+            created = client.post('/api/project-requests/', {
+                'client_id': self.client_user.pk, 'project_ids': [p.pk for p in projects], 'message': 'Demande'
+            }, format='json')
+        self.assertEqual(created.status_code, 201)
+
+        events = {}
+        while realtime.EVENT_REQUEST_CREATED not in events:
+            chunk = next(chunks).decode('utf-8')
+            if chunk.startswith('event: '):
+                name, data = chunk.split('\n')[:2]
+                events[name[len('event: '):]] = json.loads(data[len('data: '):])
+        self.assertEqual(events[realtime.EVENT_REQUEST_CREATED]['projects_count'], 2)
+        response.close()
+
+    @override_settings(REALTIME_POLL_SECONDS=0.01)
+    def test_async_stream_does_not_block(self):
+        subscription = realtime.get_broker().subscribe([realtime.user_channel(self.client_user.pk)])
+
+        async def read_stream():
+            chunks = realtime.async_event_stream(subscription, initial={'unread_count': 0})
+            received = [await chunks.__anext__(), await chunks.__anext__()]
+            realtime.get_broker().publish(
+                realtime.user_channel(self.client_user.pk),
+                realtime.format_event(realtime.EVENT_NOTIFICATION_CREATED, {'id': 1})
+            )
+            received.append(await chunks.__anext__())
+            await chunks.aclose()
+            return received
+
+        received = asyncio.run(read_stream())
+        self.assertEqual(received[0], 'retry: 5000\n\n')
+        self.assertTrue(received[1].startswith('event: counts\n'))
+        self.assertTrue(received[2].startswith('event: notification.created\n'))
+        self.assertNotIn(subscription, realtime.get_broker().subscriptions.get(
+            realtime.user_channel(self.client_user.pk), set()
+        ))
+
+    def test_request_status_and_alert_events(self):
+        client_channel = self.subscribe(realtime.user_channel(self.client_user.pk))
+        admins_channel = self.subscribe(realtime.ADMINS_CHANNEL)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            project_request = ProjectRequest.objects.create(client=self.client_user, message='Demande')
+        self.assertIsNone(client_channel.get(timeout=0.1))
+        event = self.next_event(admins_channel)
+        self.assertEqual(event['event'], realtime.EVENT_REQUEST_CREATED)
+        self.assertEqual(event['data']['id'], project_request.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            project_request.approve(self.admin, 'OK')
+        events = [self.next_event(client_channel), self.next_event(client_channel)]
+        self.assertEqual(
+            sorted(event['event'] for event in events),
+            [realtime.EVENT_NOTIFICATION_CREATED, realtime.EVENT_REQUEST_STATUS]
+        )
+        self.assertEqual(self.next_event(admins_channel)['data']['status'], 'approved')
+
+        scraped = ScrapedProject.objects.create(title='Projet de résilience climatique', source='GEF', unique_hash='h-1')
+        with self.captureOnCommitCallbacks(execute=True):
+            ProjectAlert.create_from_scraped_projects([scraped])
+        event = self.next_event(admins_channel)
+        self.assertEqual(event['event'], realtime.EVENT_ALERT_CREATED)
+        self.assertEqual(event['data']['count'], 1)
+
+
+class NotificationCounterTests(TestCase):
+    """Compteur dénormalisé des notifications non lues"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(username='client', password='x', role='client')
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+
+    def notify(self, count=1, user=None):
+        return [
+            Notification.objects.create(type='info', title=f'Info {i}', message='Message', consultant=user or self.user)
+            for i in range(count)
+        ]
+
+    def unread_count(self):
+        # Lecture du compteur par clé primaire
+        with self.assertNumQueries(1):
+            response = self.api.get('/api/notifications/unread_count/')
+        self.assertEqual(response.status_code, 200)
+        return response.json()['unread_count']
+
+    def test_counter_follows_creation_read_and_deletion(self):
+        notifications = self.notify(3)
+        # Première lecture : création du compteur à partir du vrai décompte
+        self.assertEqual(NotificationCounter.unread_for(self.user.pk), 3)
+        self.assertEqual(self.unread_count(), 3)
+        self.notify(2)
+        self.assertEqual(self.unread_count(), 5)
+
+        for _ in range(2):
+            self.api.post(f'/api/notifications/{notifications[0].pk}/mark_read/')
+        self.assertEqual(self.unread_count(), 4)
+
+        notifications[0].refresh_from_db()
+        notifications[0].delete()  # déjà lue
+        notifications[1].delete()
+        self.assertEqual(self.unread_count(), 3)
+
+        self.api.post('/api/notifications/mark_all_read/')
+        self.assertEqual(self.unread_count(), 0)
+        self.assertEqual(Notification.objects.filter(consultant=self.user, read=False).count(), 0)
+
+    def test_bulk_alert_notifications_are_counted(self):
+        admin = CustomUser.objects.create_user(username='admin', password='x', role='admin')
+        self.assertEqual(NotificationCounter.unread_for(admin.pk), 0)
+
+        scraped = [
+            ScrapedProject.objects.create(title=f'Projet climat {i}', source='GEF', unique_hash=f'h-{i}')
+            for i in range(3)
+        ]
+        ProjectAlert.create_from_scraped_projects(scraped[:2])
+        ProjectAlert.create_from_scraped_project(scraped[2])
+
+        self.assertEqual(NotificationCounter.unread_for(admin.pk), 3)
+        self.assertEqual(Notification.objects.filter(consultant=admin, read=False).count(), 3)
+
+    def test_reconcile_repairs_drift(self):
+        self.notify(2)
+        NotificationCounter.unread_for(self.user.pk)
+        Notification.objects.filter(consultant=self.user).update(read=True)  # contourne le compteur
+
+        self.assertEqual(NotificationCounter.reconcile(), [(self.user.pk, 2, 0)])
+        self.assertEqual(self.unread_count(), 0)
+        self.assertEqual(NotificationCounter.reconcile(), [])
+
+
+@override_settings(BACKGROUND_TASKS_BACKEND='eager')
+class NotificationFanOutTests(TestCase):
+    """Envoi groupé des notifications aux administrateurs"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admins = [
+            CustomUser.objects.create_user(username=f'admin{i}', password='x', role='admin') for i in range(3)
+        ]
+        CustomUser.objects.create_user(username='inactif', password='x', role='admin', actif=False)
+        cls.client_user = CustomUser.objects.create_user(username='client', password='x', role='client')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_fan_out_is_one_insert_with_cached_recipients(self):
+        notify_admins('info', 'Préchauffage', 'Message')
+
+        # admins en cache : INSERT groupé + UPDATE des compteurs
+        with self.assertNumQueries(2):
+            created = notify_admins('info', 'Maintenance', 'Message')
+        self.assertEqual(sorted(n.consultant_id for n in created), [admin.pk for admin in self.admins])
+
+    def test_same_event_is_not_notified_twice(self):
+        scraped = ScrapedProject.objects.create(title='Projet climat', source='GEF', unique_hash='h-1')
+        alert = ProjectAlert.create_from_scraped_project(scraped)
+        alert.create_notifications()
+
+        self.assertEqual(Notification.objects.filter(project_alert=alert).count(), len(self.admins))
+
+    def test_project_request_notifies_admins_once_with_projects(self):
+        projects = [
+            ScrapedProject.objects.create(title=f'Projet climat {i}', source='GCF', unique_hash=f'h-{i}')
+            for i in range(2)
+        ]
+        serializer = ProjectRequestCreateSerializer(data={
+            'client_id': self.client_user.pk,
+            'project_ids': [project.pk for project in projects],
+            'message': 'Demande',
+        })
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        with self.captureOnCommitCallbacks(execute=True):
+            project_request = serializer.save()
+
+        notifications = Notification.objects.filter(project_request=project_request)
+        self.assertEqual(notifications.count(), len(self.admins))
+        self.assertIn('2 projet(s)', notifications.first().message)
+
+
+class ProjectRequestAggregatesTests(TestCase):
+    """Agrégats des projets enregistrés sur la demande, sans requête d'agrégat à la lecture"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.client_user = CustomUser.objects.create_user(username='client', password='x', role='client')
+        cls.admin = CustomUser.objects.create_user(username='admin', password='x', role='admin')
+        cls.projects = [
+            ScrapedProject.objects.create(
+                title=f'Projet climat {i}', source='GEF', unique_hash=f'h-{i}',
+                funding_amount=Decimal(amount), data_completeness_score=score
+            )
+            for i, (amount, score) in enumerate([('400000', 80), ('700000', 60), ('50000', 40)])
+        ]
+
+    def assert_no_projects_aggregate(self, queries):
+        through = ProjectRequest.projects.through._meta.db_table
+        self.assertFalse([q['sql'] for q in queries if through in q['sql']])
+
+    def test_aggregates_follow_project_changes(self):
+        project_request = ProjectRequest.objects.create(client=self.client_user, message='Demande')
+        project_request.projects.set(self.projects[:2])
+
+        project_request.refresh_from_db()
+        self.assertEqual(project_request.projects_count, 2)
+        self.assertEqual(project_request.total_funding_requested, Decimal('1100000'))
+        self.assertEqual(project_request.avg_completeness_score, 70)
+        # 2 projets (20) + plus d'un million (30) + complétude 70 % (7)
+        self.assertEqual(project_request.priority_score, 57)
+
+        project_request.projects.remove(self.projects[1])
+        self.projects[2].requests.add(project_request)
+        project_request.refresh_from_db()
+        self.assertEqual(project_request.projects_count, 2)
+        self.assertEqual(project_request.total_funding_requested, Decimal('450000'))
+
+        self.projects[0].requests.clear()
+        project_request.refresh_from_db()
+        self.assertEqual(project_request.projects_count, 1)
+        self.assertEqual(project_request.avg_completeness_score, 40)
+
+    def test_aggregates_follow_project_edits_and_deletion(self):
+        project_request = ProjectRequest.objects.create(client=self.client_user, message='Demande')
+        project_request.projects.set(self.projects)
+
+        project = self.projects[0]
+        project.funding_amount = Decimal('1400000')
+        project.data_completeness_score = 20
+        project.save()
+        project_request.refresh_from_db()
+        self.assertEqual(project_request.total_funding_requested, Decimal('2150000'))
+        self.assertEqual(project_request.avg_completeness_score, 40)
+
+        ScrapedProject.objects.filter(pk=self.projects[1].pk).delete()
+        project_request.refresh_from_db()
+        self.assertEqual(project_request.projects_count, 2)
+        self.assertEqual(project_request.total_funding_requested, Decimal('1450000'))
+        self.assertEqual(project_request.avg_completeness_score, 30)
+
+        # Un enregistrement sans changement de ces champs ne recalcule rien
+        project = ScrapedProject.objects.get(pk=self.projects[2].pk)
+        project.title = 'Projet climat renommé'
+        with CaptureQueriesContext(connection) as queries:
+            project.save()
+        self.assert_no_projects_aggregate(queries.captured_queries)
+
+    def test_approve_and_list_do_not_aggregate_projects(self):
+        for _ in range(3):
+            ProjectRequest.objects.create(client=self.client_user, message='Demande').projects.set(self.projects)
+        project_request = ProjectRequest.objects.first()
+
+        with CaptureQueriesContext(connection) as queries:
+            project_request.approve(self.admin, 'OK')
+        self.assert_no_projects_aggregate(queries.captured_queries)
+        self.assertIn('3 projet(s)', Notification.objects.get(type='request_approved').message)
+
+        api = APIClient()
+        api.force_authenticate(self.admin)
+        with CaptureQueriesContext(connection) as queries:
+            response = api.get('/api/project-requests/')
+        self.assertEqual(response.status_code, 200)
+        rows = response.data['results'] if isinstance(response.data, dict) else response.data
+        self.assertEqual({row['projects_count'] for row in rows}, {3})
+        # seule la prévisualisation des projets (prefetch) lit la table de liaison
+        through = ProjectRequest.projects.through._meta.db_table
+        self.assertEqual(len([q for q in queries.captured_queries if through in q['sql']]), 1)
+
+def query_plan_problems(queryset):
+    """
+    Défauts du plan d'exécution (EXPLAIN) d'un queryset, pour SQLite et MySQL :
+    (tables parcourues entièrement sans index, tris hors index)
+    """
+    scans, sorts = [], []
+    if connection.vendor == 'sqlite':
+        for line in queryset.explain().splitlines():
+            match = re.search(r'SCAN (?:TABLE )?(\w+)', line)
+            if match and 'INDEX' not in line:
+                scans.append(match.group(1))
+            if 'USE TEMP B-TREE FOR ORDER BY' in line:
+                sorts.append(match.group(1) if match else line.strip())
+    elif connection.vendor == 'mysql':
+        def walk(node):
+            if isinstance(node, dict):
+                if node.get('access_type') == 'ALL':
+                    scans.append(node.get('table_name'))
+                if node.get('using_filesort'):
+                    sorts.append('filesort')
+                for value in node.values():
+                    walk(value)
+            elif isinstance(node, list):
+                for value in node:
+                    walk(value)
+        walk(json.loads(queryset.explain(format='json')))
+    else:
+        raise unittest.SkipTest(f"EXPLAIN non interprété pour {connection.vendor}")
+    return scans, sorts
+
+
+class QueryPlanTests(TestCase):
+    """
+    Plans d'exécution des filtres fréquents des listes : aucun ne doit
+    parcourir une table entière, et les listes paginées doivent être triées
+    par un index
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [CustomUser.objects.create_user(username=f'user{i}', password='x') for i in range(5)]
+        ScrapedProject.objects.bulk_create([
+            ScrapedProject(
+                title=f'Projet climat {i}', source=['GEF', 'GCF', 'OTHER'][i % 3], unique_hash=f'h-{i}',
+                data_completeness_score=i % 100, is_relevant_for_mauritania=i % 4 != 0, needs_review=i % 7 == 0
+            )
+            for i in range(300)
+        ])
+        scraped = ScrapedProject.objects.first()
+        Notification.objects.bulk_create([
+            Notification(type='info', title='Info', message='Message', consultant=cls.users[i % 5], read=i % 3 == 0)
+            for i in range(300)
+        ])
+        Document.objects.bulk_create([
+            Document(
+                uploaded_by=cls.users[i % 5], scraped_project=scraped, name=f'Document {i}',
+                status=['draft', 'submitted', 'approved'][i % 3]
+            )
+            for i in range(300)
+        ])
+        ProjectRequest.objects.bulk_create([
+            ProjectRequest(
+                client=cls.users[i % 5], message='Demande', status=['pending', 'approved'][i % 2], priority_score=i % 100
+            )
+            for i in range(300)
+        ])
+
+    def assert_indexed(self, queryset, sorted_by_index=True):
+        scans, sorts = query_plan_problems(queryset)
+        self.assertEqual(scans, [], f"Parcours complet: {queryset.query}")
+        if sorted_by_index:
+            self.assertEqual(sorts, [], f"Tri hors index: {queryset.query}")
+
+    def test_detects_full_scan(self):
+        scans, _ = query_plan_problems(ScrapedProject.objects.filter(description='Projet').order_by())
+        self.assertEqual(scans, [ScrapedProject._meta.db_table])
+
+    def test_scraped_project_list_filters(self):
+        projects = ScrapedProjectViewSet.queryset.order_by(*ScrapedProjectViewSet.ordering)
+        self.assert_indexed(projects[:20])
+        for filters in [{'source': 'GEF'}, {'is_relevant_for_mauritania': False}, {'needs_review': True}]:
+            self.assert_indexed(projects.filter(**filters)[:20])
+            self.assert_indexed(ScrapedProject.objects.filter(**filters).order_by().values('pk'))
+        self.assert_indexed(ScrapedProject.objects.filter(data_completeness_score__gte=70).order_by().values('pk'))
+        self.assert_indexed(projects.filter(linked_project=1)[:20], sorted_by_index=False)
+
+    def test_notification_filters(self):
+        notifications = Notification.objects.filter(consultant=self.users[0])
+        self.assert_indexed(notifications.order_by('-created_at')[:20])
+        self.assert_indexed(notifications.filter(read=False).order_by().values('pk'))
+
+    def test_document_filters(self):
+        documents = Document.objects.order_by('-uploaded_at')
+        self.assert_indexed(documents.filter(uploaded_by=self.users[0])[:20])
+        self.assert_indexed(documents.filter(uploaded_by=self.users[0], status='submitted')[:20])
+        self.assert_indexed(documents.filter(status='submitted')[:20])
+
+    def test_project_request_filters(self):
+        requests = ProjectRequestViewSet.queryset.order_by(*ProjectRequestViewSet.ordering)
+        self.assert_indexed(requests[:20])
+        self.assert_indexed(requests.filter(status='pending')[:20])
+        self.assert_indexed(requests.filter(client=self.users[0])[:20], sorted_by_index=False)
+
+@override_settings(BACKGROUND_TASKS_BACKEND='eager')
+class FullTextSearchTests(TestCase):
+    """Recherche plein texte : accents ignorés, préfixes, classement et index tenu à jour"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.solar = ScrapedProject.objects.create(
+            title='Énergie solaire à Nouakchott', source='GEF', unique_hash='h-1', description='Projet pilote'
+        )
+        cls.farming = ScrapedProject.objects.create(
+            title='Agriculture durable', source='GCF', unique_hash='h-2',
+            description='Volet énergie renouvelable et résilience des cultures'
+        )
+        cls.water = ScrapedProject.objects.create(
+            title="Gestion de l'eau", source='GCF', unique_hash='h-3', organization='FAO', description='Irrigation'
+        )
+
+    def titles(self, text, model=ScrapedProject):
+        return [obj.title for obj in search(model.objects.all(), text)]
+
+    def test_accents_prefixes_and_relevance(self):
+        # Le titre pèse plus que la description
+        self.assertEqual(self.titles('energie'), ['Énergie solaire à Nouakchott', 'Agriculture durable'])
+        self.assertEqual(self.titles('ÉNERG renouv'), ['Agriculture durable'])
+        self.assertEqual(self.titles('résilience'), ['Agriculture durable'])
+        self.assertEqual(self.titles('fao'), ["Gestion de l'eau"])
+        self.assertEqual(self.titles('hydrogène'), [])
+
+    @override_settings(SEARCH_BACKEND='like')
+    def test_fallback_without_index_finds_same_projects(self):
+        self.assertEqual(set(self.titles('durable Agri')), {'Agriculture durable'})
+        self.assertEqual(len(self.titles('projet')), 1)
+
+    def test_index_follows_saves_deletes_and_bulk_imports(self):
+        self.water.title = 'Énergie hydraulique'
+        self.water.save()
+        self.solar.delete()
+        self.assertEqual(self.titles('energie'), ['Énergie hydraulique', 'Agriculture durable'])
+
+        ProjectAlert.create_from_scraped_projects([self.farming])
+        self.assertEqual(self.titles('cultures', model=ProjectAlert), ['Agriculture durable'])
+
+    def test_api_results_are_ranked_and_paginated(self):
+        response = APIClient().get('/api/scraped-projects/', {'search': 'énergie', 'page_size': 1})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual([row['title'] for row in response.data['results']], ['Énergie solaire à Nouakchott'])
+        self.assertIsNotNone(response.data['next'])
+
+        response = APIClient().get('/api/scraped-projects/', {'search': 'énergie', 'ordering': 'scraped_at'})
+        self.assertEqual([row['title'] for row in response.data['results']][0], 'Énergie solaire à Nouakchott')
+
+class BackgroundTasksTests(TestCase):
+    """Tâches en arrière-plan : retries et exécution immédiate"""
+
+    def test_thread_runner_retries_until_success(self):
+        attempts = []
+
+        def flaky(value):
+            attempts.append(value)
+            if len(attempts) < 3:
+                raise ConnectionError('SMTP indisponible')
+            return value * 2
+
+        task = BackgroundTask(flaky, name='tests.flaky', max_retries=3, retry_delay=0)
+        with self.assertLogs('main_app.background', level='WARNING'):
+            self.assertEqual(task.run_with_retries((21,), {}), 42)
+        self.assertEqual(len(attempts), 3)
+
+    def test_thread_runner_gives_up_after_max_retries(self):
+        def broken():
+            raise ConnectionError('SMTP indisponible')
+
+        task = BackgroundTask(broken, name='tests.broken', max_retries=2, retry_delay=0)
+        with self.assertLogs('main_app.background', level='ERROR'):
+            self.assertIsNone(task.run_with_retries((), {}))
+
+    @override_settings(BACKGROUND_TASKS_BACKEND='', REDIS_URL='redis://localhost:6379/0', CELERY_BROKER_URL='')
+    def test_redis_url_alone_does_not_select_celery(self):
+        with mock.patch('main_app.background.shared_task', object()):
+            self.assertEqual(get_backend(), 'thread')
+            with self.settings(CELERY_BROKER_URL='redis://localhost:6379/1'):
+                self.assertEqual(get_backend(), 'celery')
+        with self.settings(BACKGROUND_TASKS_BACKEND='celery'):
+            self.assertEqual(get_backend(), 'celery')
+
+    @override_settings(BACKGROUND_TASKS_BACKEND='thread')
+    def test_thread_backend_waits_for_commit(self):
+        calls = []
+        task = BackgroundTask(calls.append, name='tests.append', retry_delay=0)
+        with self.captureOnCommitCallbacks() as callbacks:
+            task.delay('ok')
+        self.assertEqual(calls, [])
+        self.assertEqual(len(callbacks), 1)
+
+    @override_settings(BACKGROUND_TASKS_BACKEND='eager')
+    def test_project_alerts_email_marks_sent_alerts(self):
+        CustomUser.objects.create_user(username='admin', password='x', role='admin', email='admin@example.com')
+        scraped = ScrapedProject.objects.create(title='Projet climat', source='GEF', unique_hash='h-1')
+        alert = ProjectAlert.create_from_scraped_project(scraped)
+
+        tasks.send_project_alerts_email.delay(1, 0)
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['admin@example.com'])
+        alert.refresh_from_db()
+        self.assertTrue(alert.email_sent)
+
+
+def failing_job():
+    raise RuntimeError('source indisponible')
+
+
+@override_settings(SCHEDULED_JOBS={
+    'rollup': {'command': 'rollup_document_stats', 'every': 3600},
+    'broken': {'task': 'main_app.tests.failing_job', 'at': '02:00'},
+})
+class ScheduledJobsTests(TestCase):
+    """Tâches planifiées : verrou partagé et enregistrement dans ScrapingSession"""
+
+    def test_lock_is_exclusive_until_released_or_expired(self):
+        self.assertTrue(JobLock.acquire('collection', 'a', timeout=60))
+        self.assertFalse(JobLock.acquire('collection', 'b', timeout=60))
+
+        JobLock.release('collection', 'b')  # pas le détenteur : sans effet
+        self.assertFalse(JobLock.acquire('collection', 'b', timeout=60))
+
+        JobLock.objects.filter(name='collection').update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertTrue(JobLock.acquire('collection', 'b', timeout=60))
+        JobLock.release('collection', 'b')
+        self.assertFalse(JobLock.objects.exists())
+
+    def test_run_is_recorded_and_lock_released(self):
+        session = run_job('rollup', stdout=StringIO())
+
+        self.assertTrue(session.success)
+        self.assertEqual(session.job, 'rollup')
+        self.assertIsNotNone(session.completed_at)
+        self.assertFalse(JobLock.objects.exists())
+
+    def test_failure_is_recorded(self):
+        with self.assertLogs('main_app.jobs', level='ERROR'):
+            session = run_job('broken')
+
+        session.refresh_from_db()
+        self.assertFalse(session.success)
+        self.assertIn('source indisponible', session.error_message)
+        self.assertIsNotNone(session.completed_at)
+        self.assertFalse(JobLock.objects.exists())
+
+    def test_locked_job_is_skipped(self):
+        JobLock.acquire('rollup', 'autre-serveur', timeout=60)
+
+        with self.assertLogs('main_app.jobs', level='INFO'):
+            self.assertIsNone(run_job('rollup'))
+        self.assertFalse(ScrapingSession.objects.exists())
+
+    def test_due_after_interval_or_daily_time(self):
+        self.assertTrue(is_due('rollup', {'every': 3600}))
+        run_job('rollup', stdout=StringIO())
+        self.assertFalse(is_due('rollup', {'every': 3600}))
+        self.assertTrue(is_due('rollup', {'every': 3600}, now=timezone.now() + timedelta(hours=1, seconds=1)))
+
+        now = timezone.localtime().replace(hour=12, minute=0)
+        ScrapingSession.objects.create(source='OTHER', job='daily')
+        ScrapingSession.objects.filter(job='daily').update(started_at=now.replace(hour=3))
+        self.assertFalse(is_due('daily', {'at': '02:00'}, now=now))
+        self.assertTrue(is_due('daily', {'at': '02:00'}, now=now + timedelta(days=1)))
+        self.assertTrue(is_due('daily', {'at': '04:00'}, now=now))
+
+
+class DuplicateIndexTests(TestCase):
+    """DuplicateIndex rend les mêmes décisions que is_truly_duplicate (parcours complet)"""
+
+    def setUp(self):
+        self.command = CollectionCommand(stdout=StringIO())
+
+    def project(self, title, source='GEF', organization='PNUD', link=''):
+        project = {'title': title, 'source': source, 'organization': organization, 'additional_links': link}
+        project['unique_hash'] = self.command.generate_smart_hash(project)
+        return project
+
+    def test_same_decisions_as_row_wise_check(self):
+        base_title = 'Renforcement de la résilience des communautés côtières de Nouakchott'
+        existing = [
+            self.project(base_title, link='https://thegef.org/projects/10001'),
+            self.project('Énergie solaire pour les écoles rurales du Trarza', organization='Banque mondiale'),
+            self.project('Gestion durable des terres au Sahel', source='GCF', organization='FAO'),
+        ]
+        incoming = [
+            # Lien identique, même source (titre différent)
+            self.project('Projet renommé', link='https://thegef.org/projects/10001'),
+            # Même lien, autre source
+            self.project('Projet renommé', source='GCF', link='https://thegef.org/projects/10001'),
+            # Un caractère changé : juste au-dessus du seuil ; deux : juste en dessous
+            self.project(base_title[:-1] + 'x'),
+            self.project(base_title[:-2] + 'xy'),
+            # Accents retirés : titres normalisés différents
+            self.project('Energie solaire pour les ecoles rurales du Trarza', organization='Banque mondiale'),
+            # Même titre, organisation écrite autrement (normalisée) ou autre organisation
+            self.project('Énergie solaire pour les écoles rurales du Trarza!', organization='  banque MONDIALE '),
+            self.project('Énergie solaire pour les écoles rurales du Trarza', organization='UNICEF'),
+            # Titre trop court pour la comparaison
+            self.project('Sahel 2030'),
+            # Doublons internes au lot : copie exacte puis copie proche d'un nouveau projet
+            self.project('Adaptation de l\'agriculture oasienne en Adrar'),
+            self.project('Adaptation de l\'agriculture oasienne en Adrar'),
+            self.project('Adaptation de l\'agriculture oasienne en Adrar.'),
+            self.project('Adaptation de l\'agriculture oasienne au Tagant'),
+        ]
+
+        existing_df = pd.DataFrame(existing)
+        duplicate_index = self.command.build_duplicate_index(existing_df)
+        new_rows, duplicates, _ = self.command.split_new_projects(pd.DataFrame(incoming), duplicate_index)
+        kept = {row.name for row in new_rows}
+        decisions = [i in kept for i in range(len(incoming))]
+
+        reference_df = existing_df
+        expected = []
+        for project in incoming:
+            if project['unique_hash'] in set(reference_df['unique_hash']):
+                is_duplicate = True
+            else:
+                is_duplicate, _ = self.command.is_truly_duplicate(project, reference_df)
+            expected.append(not is_duplicate)
+            if not is_duplicate:
+                reference_df = pd.concat([reference_df, pd.DataFrame([project])], ignore_index=True)
+
+        self.assertEqual(decisions, expected)
+        self.assertEqual(decisions, [False, True, False, True, True, False, True, True, True, False, False, True])
+        self.assertEqual(len(duplicates), decisions.count(False))
+
+        # Mêmes motifs que le parcours complet
+        self.assertEqual(
+            duplicate_index.find_duplicate(incoming[2]),
+            self.command.is_truly_duplicate(incoming[2], existing_df)
+        )
+
+
+@override_settings(SEARCH_BACKEND='like')
+class BulkUpsertTests(TestCase):
+    """Écriture en masse des projets de la collection (bulk_upsert_projects)"""
+
+    def setUp(self):
+        self.command = CollectionCommand(stdout=StringIO())
+
+    def projects_df(self, count, completeness=50):
+        return pd.DataFrame([
+            {
+                'title': f'Projet de résilience {i}', 'source': 'GEF', 'organization': 'PNUD',
+                'unique_hash': f'hash-{i}', 'funding_amount': 250000.0, 'data_completeness_score': completeness,
+            }
+            for i in range(count)
+        ])
+
+    def test_second_import_updates_instead_of_inserting(self):
+        df = pd.concat([self.projects_df(5), self.projects_df(1)], ignore_index=True)
+        self.assertEqual(
+            self.command.bulk_upsert_projects(df, batch_size=2), {'inserted': 5, 'updated': 0, 'skipped': 1}
+        )
+
+        df = pd.concat([self.projects_df(5, completeness=80), pd.DataFrame([{'title': 'Sans hash'}])], ignore_index=True)
+        self.assertEqual(
+            self.command.bulk_upsert_projects(df, batch_size=2), {'inserted': 0, 'updated': 5, 'skipped': 1}
+        )
+        self.assertEqual(ScrapedProject.objects.count(), 5)
+        self.assertEqual(set(ScrapedProject.objects.values_list('data_completeness_score', flat=True)), {80})
+
+    def test_query_count_is_constant_per_batch(self):
+        # savepoint + (hash existants + INSERT ... ON CONFLICT) par lot,
+        # + demandes liées aux projets mis à jour
+        for count, batches in ((2, 1), (6, 3)):
+            ScrapedProject.objects.all().delete()
+            with self.assertNumQueries(2 + 2 * batches):
+                self.command.bulk_upsert_projects(self.projects_df(count), batch_size=2)
+            with self.assertNumQueries(2 + 3 * batches):
+                self.command.bulk_upsert_projects(self.projects_df(count), batch_size=2)
+
+    def test_update_refreshes_linked_requests(self):
+        self.command.bulk_upsert_projects(self.projects_df(3), batch_size=2)
+        client = CustomUser.objects.create_user(username='client', password='x', role='client')
+        project_request = ProjectRequest.objects.create(client=client, message='Demande')
+        project_request.projects.set(ScrapedProject.objects.filter(unique_hash__in=['hash-0', 'hash-2']))
+
+        df = self.projects_df(3, completeness=90)
+        df['funding_amount'] = 400000.0
+        self.command.bulk_upsert_projects(df, batch_size=2)
+
+        project_request.refresh_from_db()
+        self.assertEqual(project_request.total_funding_requested, 800000)
+        self.assertEqual(project_request.avg_completeness_score, 90)
+
+
+@override_settings(SEARCH_BACKEND='like')
+class BulkAlertsTests(TestCase):
+    """Alertes et notifications admin des projets importés, créées en masse"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admins = [
+            CustomUser.objects.create_user(username=f'admin{i}', password='x', role='admin') for i in range(3)
+        ]
+        CustomUser.objects.create_user(username='ancien', password='x', role='admin', actif=False)
+        CustomUser.objects.create_user(username='client', password='x', role='client')
+
+    def setUp(self):
+        cache.clear()  # destinataires des notifications en cache
+        self.command = CollectionCommand(stdout=StringIO())
+
+    def import_projects(self, prefix, count):
+        ScrapedProject.objects.bulk_create([
+            ScrapedProject(title=f'Projet {prefix} {i}', source='GEF', unique_hash=f'{prefix}-{i}')
+            for i in range(count)
+        ])
+        return pd.DataFrame({'unique_hash': [f'{prefix}-{i}' for i in range(count)]})
+
+    def test_query_count_does_not_depend_on_project_count(self):
+        query_counts = []
+        for prefix, count in (('a', 2), ('b', 20)):
+            cache.clear()
+            df = self.import_projects(prefix, count)
+            with CaptureQueriesContext(connection) as queries:
+                alerts = self.command.create_alerts_for_projects(df)
+            self.assertEqual(len(alerts), count)
+            query_counts.append(len(queries))
+        # projets sans alerte + admins + savepoint + alertes + notifications + compteurs
+        self.assertEqual(query_counts[0], query_counts[1])
+        self.assertLessEqual(query_counts[1], 10)
+
+    def test_one_notification_per_admin_per_alert(self):
+        df = self.import_projects('c', 4)
+        alerts = self.command.create_alerts_for_projects(df)
+        # Déjà des alertes : un second passage ne crée rien
+        self.assertEqual(self.command.create_alerts_for_projects(df), [])
+
+        self.assertEqual(ProjectAlert.objects.count(), 4)
+        self.assertEqual(Notification.objects.count(), 4 * len(self.admins))
+        pairs = set(Notification.objects.values_list('project_alert_id', 'consultant_id'))
+        self.assertEqual(pairs, {(alert.pk, admin.pk) for alert in alerts for admin in self.admins})
+        for admin in self.admins:
+            self.assertEqual(NotificationCounter.unread_for(admin.pk), 4)
+
+
+class ScrapingHttpTests(SimpleTestCase):
+    """Requêtes HTTP du scraper : débit par hôte, téléchargements parallèles, pager GCF"""
+
+    def setUp(self):
+        self.command = scraping.Command()
+        self.command.stdout = StringIO()
+
+    def test_rate_limiter_spaces_slots_per_host(self):
+        limiter = scraping.HostRateLimiter(requests_per_second=4)
+        with mock.patch.object(scraping.time, 'monotonic', return_value=100.0), \
+                mock.patch.object(scraping.time, 'sleep') as sleep:
+            for url in ['https://a.org/1', 'https://a.org/2', 'https://b.org/1', 'https://a.org/3']:
+                limiter.wait(url)
+        # a.org : 0, 0.25, 0.5 s ; b.org a son propre créneau
+        self.assertEqual([c.args[0] for c in sleep.call_args_list], [0.25, 0.5])
+
+        with mock.patch.object(scraping.time, 'sleep') as sleep:
+            scraping.HostRateLimiter(requests_per_second=0).wait('https://a.org/1')
+        sleep.assert_not_called()
+
+    def test_fetch_pages_keeps_url_order(self):
+        urls = [f'https://www.greenclimate.fund/countries/mauritania?page={i}' for i in range(6)]
+
+        def get_page_content(url):
+            page = int(url.rsplit('=', 1)[1])
+            time.sleep(0.01 * (6 - page))  # les premières pages finissent en dernier
+            return None if page == 3 else f'page {page}'
+
+        self.command.get_page_content = get_page_content
+        self.command.configure_http(concurrency=4, rate_limit=0)
+        self.assertEqual(self.command.fetch_pages(urls), ['page 0', 'page 1', 'page 2', None, 'page 4', 'page 5'])
+
+    def test_gcf_last_page_number(self):
+        pager = scraping.BeautifulSoup("""
+            <ul class="pager">
+              <li><a href="/countries/mauritania?page=1" title="Go to page 2">2</a></li>
+              <li><a href="/countries/mauritania?page=5&amp;sort=date" title="Go to last page">last</a></li>
+              <li><a href="/countries/mauritania?page=1" title="Go to next page">next</a></li>
+              <li><a href="/countries/mauritania?page=abc">?</a></li>
+            </ul>
+        """, 'html.parser').find('ul', class_='pager')
+        self.assertEqual(self.command.get_gcf_last_page_number(pager), 5)
+
+        empty = scraping.BeautifulSoup('<ul class="pager"><li><a href="/countries/mauritania">1</a></li></ul>', 'html.parser')
+        self.assertIsNone(self.command.get_gcf_last_page_number(empty.find('ul')))
+
+
+class GefDetailsTests(SimpleTestCase):
+    """Pages détail GEF en HTTP, navigateurs headless seulement pour les pages rendues en JavaScript"""
+
+    STATIC_PAGE = """
+        <div class="field field--name-body"><div class="field__item">Restauration des oasis du Tagant</div></div>
+        <div class="field field--name-field-document-url">
+          <div class="field__item"><a href="https://thegef.org/doc.pdf">PIF</a></div>
+        </div>
+    """
+    JS_PAGE = '<div id="app"></div>'
+
+    def setUp(self):
+        self.command = scraping.Command()
+        self.command.stdout = StringIO()
+        self.command.configure_http(concurrency=2, rate_limit=0)
+        pages = {'https://thegef.org/projects/1': self.STATIC_PAGE, 'https://thegef.org/projects/2': self.JS_PAGE}
+        self.command.get_page_content = lambda url: (
+            scraping.BeautifulSoup(pages[url], 'html.parser') if url in pages else None
+        )
+        self.rendered = []
+        self.command.enrich_gef_with_driver_pool = lambda projects: self.rendered.extend(p['Lien'] for p in projects)
+        self.projects = [
+            {'Titre': f'Projet {i}', 'Lien': f'https://thegef.org/projects/{i}', 'Description': '',
+             'Document': '', 'Cofinancement Total': ''}
+            for i in (1, 2, 3)
+        ] + [{'Titre': 'Sans lien', 'Lien': '', 'Description': ''}]
+
+    def test_pages_without_details_go_to_driver_pool(self):
+        enriched = self.command.enrich_gef_projects_details(self.projects)
+
+        self.assertEqual(enriched[0]['Description'], 'Restauration des oasis du Tagant')
+        self.assertEqual(enriched[0]['Document'], 'https://thegef.org/doc.pdf')
+        # Page sans blocs .field / .project-details, ou page non téléchargée
+        self.assertEqual(self.rendered, ['https://thegef.org/projects/2', 'https://thegef.org/projects/3'])
+        self.assertEqual(self.projects[0]['Description'], '')  # projets d'origine non modifiés
+
+    def test_driver_pool_zero_skips_browsers(self):
+        options = self.command.create_parser('manage.py', 'scraping').parse_args(['--driver-pool', '0'])
+        self.command.driver_pool_size = max(0, options.driver_pool or 0)
+
+        enriched = self.command.enrich_gef_projects_details(self.projects)
+        self.assertEqual(self.rendered, [])
+        self.assertEqual(enriched[0]['Description'], 'Restauration des oasis du Tagant')
+        self.assertIn('2 pages GEF non enrichies', self.command.stdout.getvalue())
+
+
+class IncrementalScrapingTests(SimpleTestCase):
+    """Cache HTTP disque (requêtes conditionnelles) et arrêt de la pagination aux projets connus"""
+
+    URL = 'https://www.greenclimate.fund/countries/mauritania'
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.data_dir = Path(tmp.name)
+        self.command = scraping.Command()
+        self.command.stdout = StringIO()
+        self.command.configure_http(concurrency=1, rate_limit=0)
+        self.command.get_scraped_data_dir = lambda: self.data_dir
+        self.command.http_cache = scraping.HttpCache(self.data_dir / 'http_cache')
+
+    def respond(self, status, content=b'', headers=None):
+        """Prochaine réponse de la session HTTP ; retourne le mock pour inspecter les appels"""
+        response = scraping.requests.Response()
+        response.status_code = status
+        response._content = content
+        response.headers.update(headers or {})
+        response.url = self.URL
+        self.command.session.get = mock.Mock(return_value=response)
+        return self.command.session.get
+
+    def test_conditional_requests_and_counters(self):
+        get = self.respond(200, b'<p>v1</p>', {'ETag': '"v1"', 'Last-Modified': 'Mon, 05 Oct 2026 10:00:00 GMT'})
+        self.assertEqual(self.command.get_page_content(self.URL).p.text, 'v1')
+        self.assertEqual(get.call_args.kwargs['headers'], {})
+
+        # 304 : le corps en cache est réutilisé
+        get = self.respond(304)
+        self.assertEqual(self.command.get_page_content(self.URL).p.text, 'v1')
+        self.assertEqual(get.call_args.kwargs['headers'], {
+            'If-None-Match': '"v1"', 'If-Modified-Since': 'Mon, 05 Oct 2026 10:00:00 GMT'
+        })
+
+        # 200 avec le même contenu (serveur sans ETag) puis un contenu nouveau
+        self.respond(200, b'<p>v1</p>')
+        self.command.get_page_content(self.URL)
+        self.assertEqual(scraping.HttpCache.conditional_headers(self.command.http_cache.get(self.URL)), {})
+        self.respond(200, b'<p>v2</p>')
+        self.assertEqual(self.command.get_page_content(self.URL).p.text, 'v2')
+
+        self.assertEqual(self.command.http_stats, {'downloaded': 2, 'unchanged': 1, 'not_modified': 1})
+
+    def gcf_page(self, numbers, last=False):
+        rows = ''.join(
+            f'<tr><td><a href="/project/fp{n}">Projet FP{n}</a></td><td>Funding proposal</td><td>2024</td></tr>'
+            for n in numbers
+        )
+        pager = '' if last else '<ul class="pager"><li><a href="?page=9" title="Go to next page">next</a></li></ul>'
+        return scraping.BeautifulSoup(f'<table class="table"><tbody>{rows}</tbody></table>{pager}', 'html.parser')
+
+    def test_incremental_mode_stops_on_known_page(self):
+        pages = {0: self.gcf_page([5, 4]), 1: self.gcf_page([3, 2]), 2: self.gcf_page([1], last=True)}
+        fetched = []
+
+        def get_page_content(url):
+            page = int(url.split('page=')[1]) if 'page=' in url else 0
+            fetched.append(page)
+            return pages[page]
+
+        self.command.get_page_content = get_page_content
+        base_url = 'https://www.greenclimate.fund'
+        self.command.load_scraping_state('GCF').remember(
+            self.command.extract_gcf_projects_from_table(pages[1], base_url)
+            + self.command.extract_gcf_projects_from_table(pages[2], base_url)
+        )
+
+        self.command.incremental = True
+        projects = self.command.get_all_gcf_pages_projects(self.URL, base_url)
+        self.assertEqual([project['Titre'] for project in projects], ['Projet FP5', 'Projet FP4'])
+        self.assertEqual(fetched, [0, 1])
+
+        # Page à moitié connue : seuls les nouveaux projets sont gardés, la pagination continue
+        state = self.command.load_scraping_state('GCF')
+        new_projects, stop = self.command.filter_new_projects(state, self.command.extract_gcf_projects_from_table(
+            self.gcf_page([6, 3]), base_url
+        ), 'GCF')
+        self.assertEqual(([p['Titre'] for p in new_projects], stop), (['Projet FP6'], False))
+
+
+@override_settings(BACKGROUND_TASKS_BACKEND='eager', SEARCH_BACKEND='like')
+class StreamedImportTests(TestCase):
+    """Import direct scraper -> base, lot par lot, sans fichier Excel (--sink db)"""
+
+    def setUp(self):
+        cache.clear()  # destinataires des notifications en cache
+        CustomUser.objects.create_user(username='admin', password='x', role='admin')
+
+    def batch(self):
+        return [
+            {
+                'Titre': f'Projet de gestion durable des terres {i}', 'Type': 'Full-sized Project', 'Document': '',
+                'nom_site': 'thegef.org', 'Organisation': 'PNUD', 'Lien': f'https://thegef.org/projects/{1000 + i}',
+                'Description': 'Restauration des terres dégradées', 'Cofinancement Total': '9,000,000', 'source': 'GEF',
+            }
+            for i in range(3)
+        ] + [{'Titre': '', 'source': 'GEF'}]
+
+    def test_identical_batches_insert_then_skip(self):
+        command = scraping.Command()
+        command.stdout = StringIO()
+        all_projects = []
+
+        totals = command.import_batches_into_database(iter([self.batch(), self.batch()]), all_projects)
+
+        self.assertEqual(len(all_projects), 8)
+        self.assertEqual(
+            {key: totals[key] for key in ('received', 'inserted', 'updated', 'duplicates', 'alerts')},
+            {'received': 6, 'inserted': 3, 'updated': 0, 'duplicates': 3, 'alerts': 3}
+        )
+        self.assertEqual(ScrapedProject.objects.count(), 3)
+        self.assertEqual(ProjectAlert.objects.count(), 3)
+        project = ScrapedProject.objects.get(source_url='thegef.org', title__endswith=' 0')
+        self.assertEqual(project.funding_amount, Decimal('9000000'))
+
+    def test_import_project_records_keeps_index_between_batches(self):
+        command = CollectionCommand(stdout=StringIO())
+        records = [scraping.Command().normalize_project_record(project) for project in self.batch()[:3]]
+        totals = command.import_project_records(iter([records, records]))
+        self.assertEqual((totals['inserted'], totals['duplicates']), (3, 3))
+
+
+@override_settings(BACKGROUND_TASKS_BACKEND='eager')
+class CollectionLoadersTests(TestCase):
+    """Chargeurs de la collection : choix du fichier, exports CSV/JSON, fichiers inchangés"""
+
+    def setUp(self):
+        cache.clear()  # destinataires des notifications en cache
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.base_dir = Path(tmp.name)
+        self.data_dir = self.base_dir / 'scraped_data'
+        self.data_dir.mkdir()
+
+    def climate_funds(self):
+        return pd.DataFrame({
+            'Fund Name': ['Adaptation Fund', 'Green Climate Fund'],
+            'Fund URL': ['https://climatefundsupdate.org/a', None],
+            'Pledge (USD mn)': [1210.51, 2.57],
+            'Approval (USD mn)': ['-', 0],
+            'Number of projects approved': [43, 328],
+        })
+
+    def test_up_to_date_export_is_preferred(self):
+        loader = ClimateFundsLoader(self.data_dir)
+        self.assertIsNone(loader.resolve())
+
+        self.climate_funds().to_excel(loader.workbook_path, index=False)
+        self.climate_funds().to_csv(self.data_dir / 'climate_funds_global.csv', index=False)
+        self.assertEqual(loader.resolve().name, 'climate_funds_global.csv')
+
+        # Export d'une exécution précédente du scraper : le classeur fait foi
+        mtime = loader.workbook_path.stat().st_mtime
+        os.utime(self.data_dir / 'climate_funds_global.csv', (mtime - 60, mtime - 60))
+        self.assertEqual(loader.resolve().name, 'climate_funds_global.xlsx')
+
+    def test_exports_are_read_like_the_workbook(self):
+        loader = ClimateFundsLoader(self.data_dir)
+        df = self.climate_funds()
+        df.to_excel(loader.workbook_path, index=False)
+        df.to_csv(self.data_dir / 'climate_funds_global.csv', index=False)
+        df.to_json(self.data_dir / 'climate_funds_global.json', orient='records')
+
+        expected = loader.read(loader.workbook_path).fillna('').to_dict('records')
+        for name in loader.siblings:
+            self.assertEqual(loader.read(self.data_dir / name).fillna('').to_dict('records'), expected, name)
+
+        oecd = OECDLoader(self.data_dir)
+        pd.DataFrame([{'title': 'Examen OCDE', 'url': 'https://oecd.org/a', 'tag': 'Report', 'date': '', 'snippet': 'Résumé'}]).to_csv(
+            self.data_dir / 'oecd_mauritania.csv', index=False
+        )
+        row = oecd.read(oecd.resolve()).iloc[0]
+        self.assertEqual(list(row.index), SCRAPER_COLUMNS)
+        self.assertEqual((row['Titre'], row['Document'], row['Organisation']), ('Examen OCDE', 'https://oecd.org/a', 'OECD'))
+
+    def test_unchanged_files_are_not_reimported(self):
+        workbook = self.data_dir / 'GEF_Mauritanie_Projects.xlsx'
+        projects = [
+            {'Titre': f'Projet de résilience climatique {i}', 'Organisation': 'UNDP', 'Lien': f'https://thegef.org/projects/{i}'}
+            for i in range(3)
+        ]
+        pd.DataFrame(projects, columns=SCRAPER_COLUMNS).to_excel(workbook, index=False)
+
+        def collect():
+            out = StringIO()
+            with override_settings(BASE_DIR=self.base_dir):
+                call_command('collection', workers=1, email_recipients='admin@example.com', stdout=out)
+            return out.getvalue()
+
+        collect()
+        self.assertEqual(ScrapedProject.objects.count(), 3)
+        imported = ImportedFile.objects.get(file_name=workbook.name)
+        self.assertEqual((imported.loader, imported.rows), ('gef', 3))
+
+        self.assertIn('inchangé', collect())
+        self.assertEqual(ImportedFile.objects.get(file_name=workbook.name).imported_at, imported.imported_at)
+
+        projects.append({'Titre': 'Nouveau projet de reboisement', 'Organisation': 'FAO', 'Lien': 'https://thegef.org/projects/9'})
+        pd.DataFrame(projects, columns=SCRAPER_COLUMNS).to_excel(workbook, index=False)
+        collect()
+        self.assertEqual(ScrapedProject.objects.count(), 4)
+        self.assertEqual(ImportedFile.objects.get(file_name=workbook.name).rows, 4)
+
+
+class FundingAmountParserTests(TestCase):
+    """Lecture des montants (main_app/amounts.py) sur un corpus tiré des fichiers de scraped_data"""
+
+    corpus_path = Path(__file__).resolve().parent / 'test_data' / 'funding_amounts.json'
+
+    def test_corpus(self):
+        corpus = json.loads(self.corpus_path.read_text(encoding='utf-8'))
+        for case in corpus:
+            with self.subTest(text=case['text'], header=case.get('header')):
+                currency, unit = amounts.header_defaults(case.get('header', ''))
+                amount = amounts.parse_amount(case['text'], currency, unit)
+                if case['amount'] is None:
+                    self.assertIsNone(amount)
+                    continue
+                self.assertEqual(amount, (Decimal(case['amount']), case['currency']))
+                # Le texte formaté par la collection (total_funding) se relit à l'identique
+                self.assertEqual(amounts.parse_amount(amounts.format_amount(amount)), amount)
+
+    @override_settings(FUNDING_BASE_CURRENCY='EUR', FUNDING_FX_RATES={'USD': 1, 'EUR': 1.25})
+    def test_conversion_uses_configured_rates(self):
+        self.assertEqual(amounts.funding_amount('USD 5 million'), Decimal('4000000.00'))
+        self.assertEqual(amounts.funding_amount('1 000 EUR'), Decimal('1000.00'))
+        self.assertIsNone(amounts.funding_amount('1 500 000 FCFA'))  # pas de taux XOF
+
+        funding = pd.Series(['USD 5 million', '1 500 000 FCFA', 'N/A', None], dtype=object)
+        self.assertEqual(amounts.funding_amounts(funding).tolist()[0], 4000000.0)
+        self.assertTrue(amounts.funding_amounts(funding).iloc[1:].isna().all())
+
+    def test_climate_funds_total_funding(self):
+        command = CollectionCommand(stdout=StringIO())
+        df = pd.DataFrame([
+            {'Fund Name': 'Fonds A', 'Pledge (USD mn)': 382.34, 'Approval (USD mn)': 298.38, 'Disbursement (USD mn)': '-'},
+            {'Fund Name': 'Fonds B', 'Pledge (USD mn)': '-', 'Approval (USD mn)': '-', 'Disbursement (USD mn)': '-'},
+        ])
+        df = command.extract_funding_amount(command.process_climate_funds_data(df))
+        self.assertEqual(df['total_funding'].tolist(), ['USD 382.34 Million', ''])
+        self.assertEqual(df['funding_amount'].iloc[0], 382340000.0)
+        self.assertTrue(math.isnan(df['funding_amount'].iloc[1]))
+        self.assertEqual(df['currency'].tolist(), ['USD', 'USD'])
+
+    def test_reparse_command_fixes_stored_amounts(self):
+        client_user = CustomUser.objects.create_user(username='client', password='x', role='client')
+        project = ScrapedProject.objects.create(
+            title='Projet GEF', source='GEF', unique_hash='h-gef', total_funding='161,450',
+            funding_amount=Decimal('161.45'), data_completeness_score=50
+        )
+        alert = ProjectAlert.build_from_scraped_project(project)
+        alert.save()
+        self.assertEqual(alert.priority_level, 'low')
+        project_request = ProjectRequest.objects.create(client=client_user, message='Demande')
+        project_request.projects.set([project])
+
+        alerts_etag = get_cached_stats('project_alerts')[1]
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('reparse_funding_amounts', stdout=StringIO())
+        self.assertNotEqual(get_cached_stats('project_alerts')[1], alerts_etag)
+
+        project.refresh_from_db()
+        alert.refresh_from_db()
+        project_request.refresh_from_db()
+        self.assertEqual(project.funding_amount, Decimal('161450'))
+        self.assertEqual(alert.funding_amount, Decimal('161450'))
+        self.assertEqual(alert.priority_level, 'medium')
+        self.assertEqual(project_request.total_funding_requested, Decimal('161450'))
+
+
+class PrepareDataframeTests(TestCase):
+    """Les versions par colonnes de la collection rendent exactement les résultats ligne à ligne"""
+
+    def setUp(self):
+        self.command = CollectionCommand(stdout=StringIO())
+
+    def test_funding_amounts_match_row_wise_parser(self):
+        funding = pd.Series([
+            'USD 12.5 million', '3,5 M USD', '$ 250', 'USD 1,234,567', '1.234.567 MILLION ou USD 5',
+            '1,2,3 MILLION 4.5 M USD', 'Total: 7 M EUR', '45 MUS', 'N/A', 'NaN', '', None, math.nan, 0, 12.0,
+        ], dtype=object)
+
+        expected = funding.map(self.command.parse_funding_amount).astype(float)
+        pd.testing.assert_series_equal(self.command.parse_funding_amounts(funding), expected)
+        self.assertEqual(expected.iloc[3], 1234567.0)  # séparateurs de milliers, plus des décimales
+        self.assertEqual(expected.iloc[4], 1234567000000.0)
+        self.assertEqual(expected.iloc[6], 7560000.0)  # EUR converti en USD
+
+        nothing = pd.Series(['N/A', None], dtype=object)
+        self.assertTrue(self.command.parse_funding_amounts(nothing).isna().all())
+
+    def test_scores_review_and_hashes_match_row_wise_versions(self):
+        df = pd.DataFrame({
+            'title': ['Adaptation climatique au Sahel', '  test solaire ', 'Projet', None, 'Résilience côtière — Nouakchott!!'],
+            'description': ['Projet de résilience', '', None, 'abcd', ' ab '],
+            'organization': ['UNDP', 'UN', None, math.nan, ' FAO '],
+            'source': ['GEF', 'OTHER', 'CLIMATE_FUND', 'GCF', 'CLIMATE_FUND'],
+            'total_funding': ['USD 5 M ', '', 12.0, None, '1,234,567'],
+            'project_type': ['Report', '', None, 'Project', ''],
+            'source_url': ['thegef.org', None, '', 'oecd.org', ''],
+            'additional_links': ['https://example.org/' + 'a' * 150, '', None, math.nan, 'https://example.org/b'],
+        })
+
+        scores = self.command.completeness_scores(df)
+        pd.testing.assert_series_equal(scores, df.apply(self.command.calculate_completeness_score, axis=1))
+        df['data_completeness_score'] = scores
+        pd.testing.assert_series_equal(
+            self.command.needs_review_flags(df), df.apply(self.command.needs_review_check, axis=1)
+        )
+        pd.testing.assert_series_equal(
+            self.command.smart_hashes(df), df.apply(self.command.generate_smart_hash, axis=1)
+        )
+
+        # Sans champ obligatoire rempli, la version ligne à ligne donne des entiers
+        short = pd.DataFrame({'title': ['x'], 'source': ['GEF']})
+        pd.testing.assert_series_equal(
+            self.command.completeness_scores(short), short.apply(self.command.calculate_completeness_score, axis=1)
+        )
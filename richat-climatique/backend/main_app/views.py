@@ -2,6 +2,8 @@
 # FICHIER: main_app/views.py - SYNTAXE CORRIGÉE
 #            
 from datetime import timedelta
+import csv
+import json
 import os
 from django.forms import ValidationError
 from rest_framework import viewsets, status
@@ -9,21 +11,27 @@ from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.authtoken.models import Token
+from rest_framework.authentication import BaseAuthentication, SessionAuthentication, TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.renderers import BaseRenderer
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
 from django.db import models
 from django.core.management import call_command
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
 
 from django.utils import timezone
+from django.utils.http import parse_etags
 from django.contrib.auth import authenticate
 import logging
 from .models import ProjectAlert
 from .serializers import ChangePasswordSerializer, DocumentActionSerializer, ProfilePictureSerializer, ProjectAlertSerializer
 
 from .models import (
-    CustomUser, Project, Document, DocumentType, Notification,
+    CustomUser, Project, Document, DocumentType, Notification, NotificationCounter,
     ScrapedProject, ScrapingSession, ProjectRequest
 )
 from .serializers import (
@@ -32,11 +40,31 @@ from .serializers import (
     NotificationSerializer, ScrapedProjectSerializer, ScrapingSessionSerializer,
     ScrapedProjectCreateProjectSerializer, DashboardStatsSerializer,
     ScrapedProjectStatsSerializer, UserRegistrationSerializer, UserLoginSerializer,
-    ProjectRequestSerializer, ProjectRequestCreateSerializer
+    ProjectRequestSerializer, ProjectRequestCreateSerializer, ScrapedProjectListSerializer
 )
+from .pagination import (
+    DocumentCursorPagination, ScrapedProjectCursorPagination, StandardPageNumberPagination, iter_by_keyset
+)
+from .search import FullTextSearchFilter, RelevanceOrderingFilter
+from .stats import compute_processing_time_stats, get_cached_stats
+from . import realtime
+from .notifications import notify_admins
 
 logger = logging.getLogger(__name__)
 
+
+def cached_stats_response(request, name):
+    """
+    Réponse d'un endpoint de statistiques servie depuis le cache, avec ETag :
+    si le client renvoie l'ETag courant (If-None-Match), on répond 304 sans corps.
+    """
+    data, etag = get_cached_stats(name)
+    etag = f'"{etag}"'
+    headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(data, headers=headers)
+
 #            
 # VUES D'AUTHENTIFICATION
 #            
@@ -258,50 +286,77 @@ class ConsultantViewSet(viewsets.ReadOnlyModelViewSet):
 # VIEWSETS POUR LES PROJETS SCRAPÉS
 #            
 class ScrapedProjectViewSet(viewsets.ModelViewSet):
- 
-    """ViewSet pour les projets scrapés - SANS PAGINATION"""
-    queryset = ScrapedProject.objects.all()
-    serializer_class = ScrapedProjectSerializer
-    permission_classes = [AllowAny]
- 
-    """ViewSet pour les projets scrapés - VERSION CORRIGÉE"""
-    queryset = ScrapedProject.objects.all()
+    """
+    ViewSet pour les projets scrapés.
+
+    Pagination:
+    - par défaut, par numéro de page (?page=, ?page_size=) ;
+    - par curseur sur (-scraped_at, id) avec ?pagination=cursor puis ?cursor=
+      (coût constant quelle que soit la taille de la table).
+
+    En liste, ?compact=true (implicite en mode curseur) renvoie un jeu de champs
+    réduit, et ?fields=id,title,... ne renvoie que les champs demandés.
+
+    ?search= interroge l'index plein texte (main_app/search.py) : résultats
+    classés par pertinence, sauf ?ordering= explicite. Le mode curseur, dont
+    l'ordre est fixe, est refusé avec ?search= (400).
+    """
+    queryset = ScrapedProject.objects.select_related('linked_project')
     serializer_class = ScrapedProjectSerializer
     permission_classes = [AllowAny]
     authentication_classes = []
- 
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter, RelevanceOrderingFilter]
     filterset_fields = ['source', 'is_relevant_for_mauritania', 'needs_review', 'linked_project']
     search_fields = ['title', 'organization', 'description']
     ordering_fields = ['scraped_at', 'data_completeness_score', 'funding_amount']
-    ordering = ['-scraped_at']
-    
- 
-    # ✅ DÉSACTIVER COMPLÈTEMENT LA PAGINATION
-    pagination_class = None
-    
+    ordering = ['-scraped_at', 'id']
+
+    def uses_cursor_pagination(self):
+        params = self.request.query_params
+        return params.get('pagination') == 'cursor' or 'cursor' in params
+
+    @property
+    def paginator(self):
+        """Choisit la pagination (numéro de page ou curseur) selon la requête"""
+        if not hasattr(self, '_paginator'):
+            if self.request is not None and self.uses_cursor_pagination():
+                self._paginator = ScrapedProjectCursorPagination()
+            else:
+                self._paginator = StandardPageNumberPagination()
+        return self._paginator
+
+    def get_serializer_class(self):
+        if self.action == 'list':
+            compact = self.request.query_params.get('compact', '').lower() in ['1', 'true', 'yes']
+            if compact or self.uses_cursor_pagination():
+                return ScrapedProjectListSerializer
+        return ScrapedProjectSerializer
+
     def list(self, request, *args, **kwargs):
-        """Override complet pour retourner TOUS les projets"""
-        print(f"🔍 API appelée avec paramètres: {request.query_params}")
-        
-        # Appliquer les filtres
-        queryset = self.filter_queryset(self.get_queryset())
-        
-        # Compter le total
-        total_count = queryset.count()
-        print(f"📊 Total en base après filtres: {total_count}")
-        
-        # RETOURNER TOUS LES PROJETS SANS PAGINATION
-        serializer = self.get_serializer(queryset, many=True)
-        
-        print(f"✅ Retour de {len(serializer.data)} projets")
-        
-        return Response({
-            'count': total_count,
-            'next': None,
-            'previous': None,
-            'results': serializer.data
-        })
+        """Liste paginée des projets scrapés"""
+        if self.uses_cursor_pagination() and request.query_params.get('search', '').strip():
+            # Le curseur impose l'ordre (-scraped_at, id) : l'ordre de pertinence serait perdu
+            return Response({
+                'error': 'La pagination par curseur ne peut pas être combinée avec ?search='
+            }, status=400)
+
+        try:
+            queryset = self.filter_queryset(self.get_queryset())
+            
+            page = self.paginate_queryset(queryset)
+            if page is not None:
+                serializer = self.get_serializer(page, many=True)
+                return self.get_paginated_response(serializer.data)
+            
+            serializer = self.get_serializer(queryset, many=True)
+            return Response(serializer.data)
+            
+        except Exception as e:
+            logger.error(f"Error in ScrapedProject list: {e}")
+            return Response({
+                'error': 'Internal server error',
+                'details': str(e)
+            }, status=500)
  
     @action(detail=True, methods=['get'])
     def full_details(self, request, pk=None):
@@ -352,84 +407,11 @@ class ScrapedProjectViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
-    def list(self, request, *args, **kwargs):
-        """Override list method for debugging"""
-        try:
-            logger.info(f"ScrapedProject list called by user: {request.user}")
-            
-            queryset = self.filter_queryset(self.get_queryset())
-            
-            page = self.paginate_queryset(queryset)
-            if page is not None:
-                serializer = self.get_serializer(page, many=True)
-                return self.get_paginated_response(serializer.data)
-            
-            serializer = self.get_serializer(queryset, many=True)
-            return Response(serializer.data)
-            
-        except Exception as e:
-            logger.error(f"Error in ScrapedProject list: {e}")
-            return Response({
-                'error': 'Internal server error',
-                'details': str(e)
-            }, status=500)
-    
     @action(detail=False, methods=['get'], permission_classes=[AllowAny])
     def stats(self, request):
-        """Statistiques des projets scrapés"""
+        """Statistiques des projets scrapés (une requête agrégée)"""
         try:
-            total_scraped = ScrapedProject.objects.count()
-            
-            # Par source
-            by_source = {}
-            for source_code, source_name in ScrapedProject.SOURCE_CHOICES:
-                count = ScrapedProject.objects.filter(source=source_code).count()
-                by_source[source_code] = count
-            
-            # Par score de complétude
-            by_completeness_score = {
-                'excellent': ScrapedProject.objects.filter(data_completeness_score__gte=90).count(),
-                'good': ScrapedProject.objects.filter(
-                    data_completeness_score__gte=70, 
-                    data_completeness_score__lt=90
-                ).count(),
-                'fair': ScrapedProject.objects.filter(
-                    data_completeness_score__gte=50, 
-                    data_completeness_score__lt=70
-                ).count(),
-                'poor': ScrapedProject.objects.filter(data_completeness_score__lt=50).count(),
-            }
-            
-            # Autres statistiques
-            ready_projects = ScrapedProject.objects.filter(
-                linked_project__isnull=True,
-                is_relevant_for_mauritania=True,
-                data_completeness_score__gte=60
-            ).count()
-            
-            linked_projects = ScrapedProject.objects.filter(linked_project__isnull=False).count()
-            needs_review = ScrapedProject.objects.filter(needs_review=True).count()
-            
-            # Score moyen de complétude
-            avg_completeness = ScrapedProject.objects.aggregate(
-                avg_score=models.Avg('data_completeness_score')
-            )['avg_score'] or 0
-            
-            # Sessions récentes
-            recent_sessions = ScrapingSession.objects.all()[:5]
-            
-            stats_data = {
-                'total_scraped': total_scraped,
-                'by_source': by_source,
-                'by_completeness_score': by_completeness_score,
-                'ready_projects': ready_projects,
-                'linked_projects': linked_projects,
-                'needs_review': needs_review,
-                'avg_completeness_score': round(avg_completeness, 2),
-                'recent_sessions': ScrapingSessionSerializer(recent_sessions, many=True).data
-            }
-            
-            return Response(stats_data)
+            return cached_stats_response(request, 'scraped_projects')
             
         except Exception as e:
             logger.error(f"Erreur stats projets scrapés: {e}")
@@ -446,12 +428,33 @@ class ProjectViewSet(viewsets.ModelViewSet):
     queryset = Project.objects.all().select_related('consultant').prefetch_related('documents')
     serializer_class = ProjectSerializer
     permission_classes = [AllowAny]  # Temporaire pour debug
+    pagination_class = StandardPageNumberPagination
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     filterset_fields = ['status', 'type_project', 'fund', 'consultant', 'is_from_scraping', 'original_source']
     search_fields = ['name', 'description', 'contact_name']
     ordering_fields = ['created_at', 'date_echeance', 'score_viabilite']
     ordering = ['-created_at']
     
+    def get_queryset(self):
+        """
+        Projets avec tout ce que ProjectSerializer lit déjà chargé : source scrapée,
+        documents (et leurs relations) préchargés, documents obligatoires soumis annotés
+        """
+        documents = Document.objects.select_related(
+            'uploaded_by', 'traite_par', 'document_type', 'scraped_project'
+        )
+        return Project.objects.select_related('consultant', 'scraped_source').prefetch_related(
+            models.Prefetch('documents', queryset=documents)
+        ).annotate(
+            submitted_mandatory_count=models.Count(
+                'documents',
+                filter=models.Q(
+                    documents__document_type__obligatoire=True,
+                    documents__status__in=['submitted', 'approved']
+                )
+            )
+        )
+
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
             return ProjectCreateUpdateSerializer
@@ -461,41 +464,7 @@ class ProjectViewSet(viewsets.ModelViewSet):
     def dashboard_stats(self, request):
         """Statistiques complètes pour le tableau de bord"""
         try:
-            # Statistiques des projets Django
-            total_projects = Project.objects.count()
-            ready_projects = Project.objects.filter(status='ready').count()
-            pending_projects = Project.objects.filter(status='progress').count()
-            avg_score = Project.objects.aggregate(avg_score=models.Avg('score_viabilite'))['avg_score'] or 0
-            total_amount = Project.objects.aggregate(total=models.Sum('montant_demande'))['total'] or 0
-            
-            # Statistiques des projets scrapés
-            total_scraped = ScrapedProject.objects.count()
-            scraped_by_source = {}
-            for source_code, _ in ScrapedProject.SOURCE_CHOICES:
-                scraped_by_source[source_code] = ScrapedProject.objects.filter(source=source_code).count()
-            
-            ready_for_conversion = ScrapedProject.objects.filter(
-                linked_project__isnull=True,
-                is_relevant_for_mauritania=True,
-                data_completeness_score__gte=60
-            ).count()
-            
-            # Sessions de scraping récentes
-            recent_sessions = ScrapingSession.objects.all()[:3]
-            
-            stats = {
-                'total_projects': total_projects,
-                'ready_projects': ready_projects,
-                'pending_projects': pending_projects,
-                'avg_score': round(avg_score, 2),
-                'total_amount': total_amount,
-                'total_scraped': total_scraped,
-                'scraped_by_source': scraped_by_source,
-                'ready_for_conversion': ready_for_conversion,
-                'recent_scraping_sessions': ScrapingSessionSerializer(recent_sessions, many=True).data
-            }
-            
-            return Response(stats)
+            return cached_stats_response(request, 'dashboard')
             
         except Exception as e:
             logger.error(f"Erreur dashboard stats: {e}")
@@ -503,7 +472,6 @@ class ProjectViewSet(viewsets.ModelViewSet):
                 'error': 'Erreur lors du calcul des statistiques'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-<<<<<<< HEAD
 class ChangePasswordView(APIView):
     """Vue pour changer le mot de passe"""
     permission_classes = [IsAuthenticated]
@@ -626,11 +594,39 @@ class UploadProfilePictureView(APIView):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 # =============================================================================
-=======
-#            
->>>>>>> c364c7e71f3977ed97e3213d2055219f56934eac
 # VIEWSETS POUR LES NOTIFICATIONS
 #            
+class StreamTokenAuthentication(BaseAuthentication):
+    """
+    Jeton de flux passé en paramètre ?stream_token= (EventSource ne peut pas
+    envoyer d'en-tête Authorization) : signé, de courte durée et accepté
+    uniquement par le flux SSE, contrairement au jeton DRF
+    """
+
+    def authenticate(self, request):
+        token = request.query_params.get('stream_token')
+        if not token:
+            return None
+        user_id = realtime.read_stream_token(token)
+        user = CustomUser.objects.filter(pk=user_id, is_active=True).first() if user_id else None
+        if user is None:
+            raise AuthenticationFailed('Jeton de flux invalide ou expiré')
+        return (user, None)
+
+    def authenticate_header(self, request):
+        return 'StreamToken'
+
+
+class EventStreamRenderer(BaseRenderer):
+    """Renderer text/event-stream : le flux lui-même est une StreamingHttpResponse"""
+    media_type = 'text/event-stream'
+    format = 'sse'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # Seules les réponses d'erreur passent par ici
+        return json.dumps(data).encode('utf-8')
+
+
 class NotificationViewSet(viewsets.ModelViewSet):
     serializer_class = NotificationSerializer
     permission_classes = [AllowAny]  # Temporaire pour debug
@@ -640,6 +636,15 @@ class NotificationViewSet(viewsets.ModelViewSet):
         if not self.request.user.is_authenticated:
             return Notification.objects.none()
         return Notification.objects.filter(consultant=self.request.user).select_related('project')
+
+    def perform_update(self, serializer):
+        """Répercute un changement du champ read sur le compteur de non lues"""
+        was_read = serializer.instance.read
+        notification = serializer.save()
+        if notification.read and not was_read:
+            NotificationCounter.remove(notification.consultant_id)
+        elif was_read and not notification.read:
+            NotificationCounter.add({notification.consultant_id: 1})
     
     @action(detail=False, methods=['get'])
     def unread_count(self, request):
@@ -647,29 +652,83 @@ class NotificationViewSet(viewsets.ModelViewSet):
         if not request.user.is_authenticated:
            return Response({'unread_count': 0, 'alerts_count': 0})
     
-        # Notifications non lues
-        notifications_count = self.get_queryset().filter(read=False).count()
+        return Response(self.unread_counts(request.user))
+
+    def unread_counts(self, user):
+        """Notifications non lues (compteur dénormalisé) et alertes actives (si l'utilisateur est admin)"""
+        notifications_count = NotificationCounter.unread_for(user.pk)
     
-       # Alertes actives (si l'utilisateur est admin)
         alerts_count = 0
-        if request.user.role == 'admin':
+        if user.role == 'admin':
           try:
-            alerts_count = ProjectAlert.objects.filter(status='active').count()
+            # Statistiques des alertes en cache, invalidées à chaque écriture
+            alerts_count = get_cached_stats('project_alerts')[0]['active_alerts']
           except Exception:
             alerts_count = 0
     
-        return Response({
+        return {
            'unread_count': notifications_count,
            'alerts_count': alerts_count
+        }
+
+    @action(detail=False, methods=['post'])
+    def stream_token(self, request):
+        """Jeton de courte durée pour ouvrir le flux SSE (?stream_token=)"""
+        if not request.user.is_authenticated:
+            return Response({'error': 'Authentification requise'}, status=status.HTTP_401_UNAUTHORIZED)
+        return Response({
+            'token': realtime.make_stream_token(request.user),
+            'expires_in': realtime.stream_token_max_age(),
         })
 
+    @action(
+        detail=False,
+        methods=['get'],
+        renderer_classes=[EventStreamRenderer],
+        authentication_classes=[StreamTokenAuthentication, TokenAuthentication, SessionAuthentication],
+    )
+    def stream(self, request):
+        """
+        Flux Server-Sent Events de l'utilisateur (remplace le polling de unread_count) :
+        compteurs initiaux, puis notification.created, alert.created (admins) et request.status
+        """
+        if not request.user.is_authenticated:
+            return Response({'error': 'Authentification requise'}, status=status.HTTP_401_UNAUTHORIZED)
+        if not realtime.stream_allowed(request._request):
+            # Worker WSGI synchrone : le client garde le polling
+            return Response(
+                {'error': 'Flux temps réel indisponible sur ce serveur'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+
+        channels = [realtime.user_channel(request.user.pk)]
+        if request.user.role == 'admin':
+            channels.append(realtime.ADMINS_CHANNEL)
+
+        # Abonnement avant le calcul des compteurs : aucun événement perdu entre les deux
+        subscription = realtime.get_broker().subscribe(channels)
+        try:
+            counts = self.unread_counts(request.user)
+        except Exception:
+            subscription.close()
+            raise
+
+        response = StreamingHttpResponse(
+            realtime.stream_for(request._request, subscription, initial=counts),
+            content_type='text/event-stream'
+        )
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'  # Pas de mise en tampon par nginx
+        return response
+
     @action(detail=True, methods=['post'])
     def mark_read(self, request, pk=None):
         """Marquer une notification comme lue"""
         try:
             notification = self.get_object()
-            notification.read = True
-            notification.save()
+            # UPDATE conditionnel : le compteur ne baisse qu'une fois même en cas de double clic
+            if Notification.objects.filter(pk=notification.pk, read=False).update(read=True):
+                NotificationCounter.remove(request.user.pk)
             return Response({'message': 'Notification marquée comme lue'})
         except Exception as e:
             return Response({'error': 'Erreur lors du marquage'}, status=400)
@@ -678,7 +737,8 @@ class NotificationViewSet(viewsets.ModelViewSet):
     def mark_all_read(self, request):
         """Marquer toutes les notifications comme lues"""
         try:
-            self.get_queryset().update(read=True)
+            updated = self.get_queryset().filter(read=False).update(read=True)
+            NotificationCounter.remove(request.user.pk, updated)
             return Response({'message': 'Toutes les notifications marquées comme lues'})
         except Exception as e:
             return Response({'error': 'Erreur lors du marquage'}, status=400)
@@ -713,17 +773,17 @@ class ScrapingSessionViewSet(viewsets.ReadOnlyModelViewSet):
     ordering = ['-started_at']
 class ProjectAlertStatsView(APIView):
     def get(self, request):
-        stats = {
-            'active_alerts': ProjectAlert.objects.filter(status='active').count(),
-            'high_priority_alerts': ProjectAlert.objects.filter(
-                status='active', 
-                priority_level__in=['high', 'urgent']
-            ).count(),
-            'new_this_week': ProjectAlert.objects.filter(
-                created_at__gte=timezone.now() - timedelta(days=7)
-            ).count(),
-            'total_funding': "€2.5M+"  # À remplacer par un calcul réel
-        }
+        active = models.Q(status='active')
+        stats = ProjectAlert.objects.aggregate(
+            active_alerts=models.Count('pk', filter=active),
+            high_priority_alerts=models.Count(
+                'pk', filter=active & models.Q(priority_level__in=['high', 'urgent'])
+            ),
+            new_this_week=models.Count(
+                'pk', filter=models.Q(alert_created_at__gte=timezone.now() - timedelta(days=7))
+            ),
+        )
+        stats['total_funding'] = "€2.5M+"  # À remplacer par un calcul réel
         return Response(stats)
 #            
 # VIEWSETS POUR LES DEMANDES DE PROJETS
@@ -799,25 +859,7 @@ class ProjectRequestViewSet(viewsets.ModelViewSet):
     def stats(self, request):
         """Statistiques des demandes"""
         try:
-            total_requests = ProjectRequest.objects.count()
-            pending_requests = ProjectRequest.objects.filter(status='pending').count()
-            approved_requests = ProjectRequest.objects.filter(status='approved').count()
-            rejected_requests = ProjectRequest.objects.filter(status='rejected').count()
-            
-            # Demandes par priorité
-            high_priority = ProjectRequest.objects.filter(
-                status='pending',
-                priority_score__gte=70
-            ).count()
-            
-            return Response({
-                'total_requests': total_requests,
-                'pending_requests': pending_requests,
-                'approved_requests': approved_requests,
-                'rejected_requests': rejected_requests,
-                'high_priority_pending': high_priority,
-                'avg_processing_time': '2.5 jours',  # À calculer dynamiquement
-            })
+            return cached_stats_response(request, 'project_requests')
         except Exception as e:
             logger.error(f"Erreur stats demandes: {e}")
             return Response({'error': 'Erreur lors du calcul des statistiques'}, status=500)
@@ -837,7 +879,8 @@ class ProjectAlertViewSet(viewsets.ModelViewSet):
     queryset = ProjectAlert.objects.all().select_related('scraped_project')
     serializer_class = ProjectAlertSerializer
     permission_classes = [AllowAny]  # À adapter selon vos besoins
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    # ?search= : index plein texte, résultats classés par pertinence
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter, RelevanceOrderingFilter]
     filterset_fields = ['status', 'priority_level', 'source', 'is_featured', 'is_new_this_week']
     search_fields = ['title', 'organization', 'description']
     ordering_fields = ['alert_created_at', 'priority_level', 'data_completeness_score']
@@ -890,44 +933,7 @@ class ProjectAlertViewSet(viewsets.ModelViewSet):
     def stats(self, request):
         """Statistiques des alertes"""
         try:
-            total_alerts = ProjectAlert.objects.count()
-            active_alerts = ProjectAlert.objects.filter(status='active').count()
-            
-            # Alertes par priorité
-            high_priority_alerts = ProjectAlert.objects.filter(
-                status='active',
-                priority_level__in=['high', 'urgent']
-            ).count()
-            
-            new_this_week = ProjectAlert.objects.filter(
-                is_new_this_week=True,
-                status='active'
-            ).count()
-            
-            # Par source
-            by_source = {}
-            for source_code, _ in ProjectAlert._meta.get_field('source').choices:
-                by_source[source_code] = ProjectAlert.objects.filter(
-                    source=source_code,
-                    status='active'
-                ).count()
-            
-            # Par priorité
-            by_priority = {}
-            for priority_code, _ in ProjectAlert._meta.get_field('priority_level').choices:
-                by_priority[priority_code] = ProjectAlert.objects.filter(
-                    priority_level=priority_code,
-                    status='active'
-                ).count()
-            
-            return Response({
-                'total_alerts': total_alerts,
-                'active_alerts': active_alerts,
-                'high_priority_alerts': high_priority_alerts,
-                'new_this_week': new_this_week,
-                'by_source': by_source,
-                'by_priority': by_priority,
-            })
+            return cached_stats_response(request, 'project_alerts')
         except Exception as e:
             logger.error(f"Erreur stats alertes: {e}")
             return Response({'error': 'Erreur lors du calcul des statistiques'}, status=500)
@@ -975,117 +981,6 @@ from .serializers import ScrapedProjectSerializer, ScrapingSessionSerializer
 
 logger = logging.getLogger(__name__)
 
-class ScrapedProjectViewSet(viewsets.ModelViewSet):
-    """ViewSet pour les projets scrapés - FIXED VERSION"""
-    queryset = ScrapedProject.objects.all()
-    serializer_class = ScrapedProjectSerializer
-    permission_classes = [AllowAny]  # Explicitly allow any access
-    authentication_classes = []  # Disable authentication temporarily for debugging
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
-    filterset_fields = ['source', 'is_relevant_for_mauritania', 'needs_review', 'linked_project']
-    search_fields = ['title', 'organization', 'description']
-    ordering_fields = ['scraped_at', 'data_completeness_score', 'funding_amount']
-    ordering = ['-scraped_at']
-    
-    def list(self, request, *args, **kwargs):
-        """Override list method for debugging"""
-        try:
-            logger.info(f"ScrapedProject list called by user: {request.user}")
-            logger.info(f"Authentication: {request.user.is_authenticated}")
-            logger.info(f"Permissions: {self.permission_classes}")
-            
-            # Force the queryset
-            queryset = self.filter_queryset(self.get_queryset())
-            
-            # Pagination
-            page = self.paginate_queryset(queryset)
-            if page is not None:
-                serializer = self.get_serializer(page, many=True)
-                return self.get_paginated_response(serializer.data)
-            
-            serializer = self.get_serializer(queryset, many=True)
-            return Response(serializer.data)
-            
-        except Exception as e:
-            logger.error(f"Error in ScrapedProject list: {e}")
-            return Response({
-                'error': 'Internal server error',
-                'details': str(e)
-            }, status=500)
-    
-    @action(detail=False, methods=['get'], permission_classes=[AllowAny])
-    def stats(self, request):
-        """Statistiques des projets scrapés - FIXED"""
-        try:
-            logger.info(f"Stats endpoint called by: {request.user}")
-            
-            total_scraped = ScrapedProject.objects.count()
-            
-            # Par source
-            by_source = {}
-            for source_code, source_name in ScrapedProject.SOURCE_CHOICES:
-                count = ScrapedProject.objects.filter(source=source_code).count()
-                by_source[source_code] = count
-            
-            # Par score de complétude
-            by_completeness_score = {
-                'excellent': ScrapedProject.objects.filter(data_completeness_score__gte=90).count(),
-                'good': ScrapedProject.objects.filter(
-                    data_completeness_score__gte=70, 
-                    data_completeness_score__lt=90
-                ).count(),
-                'fair': ScrapedProject.objects.filter(
-                    data_completeness_score__gte=50, 
-                    data_completeness_score__lt=70
-                ).count(),
-                'poor': ScrapedProject.objects.filter(data_completeness_score__lt=50).count(),
-            }
-            
-            # Autres statistiques
-            ready_projects = ScrapedProject.objects.filter(
-                linked_project__isnull=True,
-                is_relevant_for_mauritania=True,
-                data_completeness_score__gte=60
-            ).count()
-            
-            linked_projects = ScrapedProject.objects.filter(linked_project__isnull=False).count()
-            needs_review = ScrapedProject.objects.filter(needs_review=True).count()
-            
-            # Score moyen de complétude
-            avg_completeness = ScrapedProject.objects.aggregate(
-                avg_score=models.Avg('data_completeness_score')
-            )['avg_score'] or 0
-            
-            # Sessions récentes
-            recent_sessions = ScrapingSession.objects.all()[:5]
-            
-            stats_data = {
-                'total_scraped': total_scraped,
-                'by_source': by_source,
-                'by_completeness_score': by_completeness_score,
-                'ready_projects': ready_projects,
-                'linked_projects': linked_projects,
-                'needs_review': needs_review,
-                'avg_completeness_score': round(avg_completeness, 2),
-                'recent_sessions': ScrapingSessionSerializer(recent_sessions, many=True).data
-            }
-            
-            logger.info(f"Stats calculated successfully: {stats_data}")
-            return Response(stats_data)
-            
-        except Exception as e:
-            logger.error(f"Erreur stats projets scrapés: {e}")
-            return Response({
-                'error': 'Erreur lors du calcul des statistiques',
-                'details': str(e)
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-    
-    def get_permissions(self):
-        """Override to ensure AllowAny is always applied"""
-        return [AllowAny()]
-    
-
-
 import logging
 from django.db import transaction
 from django.utils import timezone
@@ -1268,15 +1163,13 @@ class DocumentViewSet(viewsets.ModelViewSet):
                     consultant=request.user
                 )
 
-                # Notifier les admins
-                admins = CustomUser.objects.filter(role='admin', actif=True)
-                for admin in admins:
-                    Notification.objects.create(
-                        type='document',
-                        title=f'🔔 Nouveaux documents reçus',
-                        message=f'{request.user.full_name} a soumis {len(created_docs)} document(s) pour "{scraped_project.title[:50]}..."\n\nMessage du client: {message[:150]}{"..." if len(message) > 150 else ""}',
-                        consultant=admin
-                    )
+                # Notifier les admins (en arrière-plan, après le commit)
+                notify_admins(
+                    'document',
+                    f'🔔 Nouveaux documents reçus',
+                    f'{request.user.full_name} a soumis {len(created_docs)} document(s) pour "{scraped_project.title[:50]}..."\n\nMessage du client: {message[:150]}{"..." if len(message) > 150 else ""}',
+                    defer=True
+                )
 
                 return Response({
                     'message': f'{len(created_docs)} document(s) soumis avec succès',
@@ -1407,18 +1300,76 @@ class DocumentViewSet(viewsets.ModelViewSet):
             logger.exception("Stack trace complet:")
             return Response({'error': f'Erreur lors du traitement: {str(e)}'}, status=500)
 
+    # Colonnes de l'export CSV (champs à plat de DocumentSerializer)
+    EXPORT_CSV_FIELDS = [
+        'id', 'name', 'status', 'file_name', 'file_size', 'file_type', 'checksum',
+        'uploaded_at', 'uploaded_by_name', 'uploaded_by_email', 'uploaded_by_company',
+        'project_title', 'scraped_project_title', 'document_type_name',
+        'date_soumission', 'reviewed_at', 'traite_par_name', 'motif_rejet'
+    ]
+    EXPORT_CHUNK_SIZE = 500
+
+    def documents_response(self, request, documents):
+        """
+        Réponse commune de all_documents_admin et my_documents:
+        - ?export_format=ndjson|csv : export complet en streaming ;
+        - ?pagination=cursor puis ?cursor= : pages keyset sur (-uploaded_at, id) ;
+        - sinon la liste complète (format historique {'results', 'count'}).
+        """
+        export_format = request.query_params.get('export_format')
+        if export_format in ['ndjson', 'csv']:
+            return self.stream_documents(documents, export_format)
+
+        if request.query_params.get('pagination') == 'cursor' or 'cursor' in request.query_params:
+            paginator = DocumentCursorPagination()
+            page = paginator.paginate_queryset(documents, request, view=self)
+            return paginator.get_paginated_response(DocumentSerializer(page, many=True).data)
+
+        results = DocumentSerializer(documents, many=True).data
+        return Response({
+            'results': results,
+            'count': len(results)
+        })
+
+    def stream_documents(self, documents, export_format):
+        """Export en streaming: les documents sont lus et sérialisés par lots"""
+        rows = (
+            DocumentSerializer(document).data
+            for document in iter_by_keyset(documents, 'uploaded_at', self.EXPORT_CHUNK_SIZE)
+        )
+
+        if export_format == 'csv':
+            class Echo:
+                def write(self, value):
+                    return value
+
+            writer = csv.writer(Echo())
+
+            def csv_lines():
+                yield writer.writerow(self.EXPORT_CSV_FIELDS)
+                for data in rows:
+                    yield writer.writerow([data.get(field, '') for field in self.EXPORT_CSV_FIELDS])
+
+            response = StreamingHttpResponse(csv_lines(), content_type='text/csv; charset=utf-8')
+            response['Content-Disposition'] = 'attachment; filename="documents.csv"'
+            return response
+
+        response = StreamingHttpResponse(
+            (json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n' for data in rows),
+            content_type='application/x-ndjson; charset=utf-8'
+        )
+        response['Content-Disposition'] = 'attachment; filename="documents.ndjson"'
+        return response
+
     @action(detail=False, methods=['get'])
     def all_documents_admin(self, request):
-        """Récupérer tous les documents pour les administrateurs"""
+        """Récupérer tous les documents pour les administrateurs (liste, pages ou export)"""
         try:
             documents = Document.objects.all().select_related(
                 'project', 'scraped_project', 'uploaded_by', 'document_type', 'traite_par'
             ).order_by('-uploaded_at')
 
-            return Response({
-                'results': DocumentSerializer(documents, many=True).data,
-                'count': documents.count()
-            })
+            return self.documents_response(request, documents)
 
         except Exception as e:
             logger.error(f"Erreur récupération tous documents: {str(e)}")
@@ -1429,7 +1380,7 @@ class DocumentViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'])
     def my_documents(self, request):
-        """Récupérer les documents de l'utilisateur connecté"""
+        """Récupérer les documents de l'utilisateur connecté (liste, pages ou export)"""
         try:
             if not hasattr(request, 'user') or not request.user.is_authenticated:
                 return Response(
@@ -1438,13 +1389,10 @@ class DocumentViewSet(viewsets.ModelViewSet):
                 )
 
             documents = Document.objects.filter(uploaded_by=request.user).select_related(
-                'project', 'scraped_project', 'document_type', 'traite_par'
+                'project', 'scraped_project', 'uploaded_by', 'document_type', 'traite_par'
             ).order_by('-uploaded_at')
 
-            return Response({
-                'results': DocumentSerializer(documents, many=True).data,
-                'count': documents.count()
-            })
+            return self.documents_response(request, documents)
 
         except Exception as e:
             logger.error(f"Erreur récupération documents: {str(e)}")
@@ -1556,25 +1504,11 @@ class DocumentViewSet(viewsets.ModelViewSet):
                 count=Count('id')
             ).order_by('date')
             
-            # Temps moyen de traitement
-            processed_docs = Document.objects.filter(
-                reviewed_at__isnull=False,
-                date_soumission__isnull=False
+            # Temps de traitement (moyenne, médiane, p90), calculés par la base
+            processing_time = compute_processing_time_stats(
+                exact=request.query_params.get('exact', '').lower() in ('1', 'true', 'yes')
             )
-            
-            avg_processing_time = None
-            if processed_docs.exists():
-                # Calculer la différence moyenne en heures
-                total_time = 0
-                count = 0
-                for doc in processed_docs:
-                    if doc.reviewed_at and doc.date_soumission:
-                        diff = doc.reviewed_at - doc.date_soumission
-                        total_time += diff.total_seconds() / 3600  # Convertir en heures
-                        count += 1
-                
-                if count > 0:
-                    avg_processing_time = round(total_time / count, 2)
+            avg_processing_time = processing_time['overall']['avg_hours'] if processing_time['overall'] else None
             
             # Top des clients les plus actifs
             top_clients = CustomUser.objects.filter(
@@ -1593,6 +1527,7 @@ class DocumentViewSet(viewsets.ModelViewSet):
                 'stats_by_status': list(stats_by_status),
                 'daily_submissions': list(daily_stats),
                 'avg_processing_time_hours': avg_processing_time,
+                'processing_time': processing_time,
                 'top_clients': top_clients_data,
                 'total_documents': Document.objects.count(),
                 'documents_with_messages': Document.objects.exclude(
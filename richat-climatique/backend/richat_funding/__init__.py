@@ -1,2 +1,11 @@
 import pymysql 
 pymysql.install_as_MySQLdb() 
+
+# Application Celery chargée avec Django (optionnelle : sans Celery, les
+# tâches s'exécutent dans un pool de threads, voir main_app/background.py)
+try:
+    from .celery import app as celery_app
+except ImportError:
+    celery_app = None
+
+__all__ = ('celery_app',)
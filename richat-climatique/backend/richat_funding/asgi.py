@@ -3,6 +3,10 @@ ASGI config for richat_funding project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Recommended for the Server-Sent Events stream (/api/notifications/stream/),
+which is served by an async generator here instead of holding a worker, e.g.
+``uvicorn richat_funding.asgi:application``.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 """
@@ -0,0 +1,42 @@
+"""
+Application Celery de richat_funding
+
+Lancer un worker :  celery -A richat_funding worker -l info
+Tâches planifiées : celery -A richat_funding beat -l info
+(planning construit à partir de SCHEDULED_JOBS, voir main_app/jobs.py)
+
+Les tâches sont déclarées dans main_app/tasks.py avec @background_task, qui
+les enregistre aussi auprès de Celery (voir main_app/background.py).
+"""
+import os
+
+from celery import Celery
+from celery.schedules import crontab
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'richat_funding.settings')
+
+app = Celery('richat_funding')
+
+# Réglages CELERY_* de settings.py
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
+
+
+def beat_schedule(jobs):
+    """Planning beat équivalent à SCHEDULED_JOBS : chaque entrée passe par run_job (verrou, session)"""
+    schedule = {}
+    for name, job in jobs.items():
+        if 'at' in job:
+            hour, minute = job['at'].split(':')
+            when = crontab(hour=int(hour), minute=int(minute))
+        else:
+            when = job['every']
+        schedule[name] = {'task': 'main_app.tasks.run_scheduled_job', 'schedule': when, 'args': [name]}
+    return schedule
+
+
+@app.on_after_configure.connect
+def setup_beat_schedule(sender, **kwargs):
+    from django.conf import settings
+
+    sender.conf.beat_schedule = beat_schedule(getattr(settings, 'SCHEDULED_JOBS', {}))
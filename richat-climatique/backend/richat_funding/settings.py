@@ -103,6 +103,94 @@ DATABASES = {
     }
 }
 
+# Cache (statistiques des tableaux de bord): mémoire locale par défaut,
+# Redis si REDIS_URL est défini (nécessite le paquet redis). Avec plusieurs
+# workers, Redis est nécessaire pour que l'invalidation soit partagée.
+REDIS_URL = config('REDIS_URL', default='')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'richat-funding',
+        }
+    }
+
+# Durée de vie maximale des statistiques en cache (secondes), en plus de l'invalidation
+STATS_CACHE_TIMEOUT = config('STATS_CACHE_TIMEOUT', default=300, cast=int)
+
+# Événements temps réel (SSE, /api/notifications/stream/) : broker en mémoire
+# par défaut, Redis pub/sub si REDIS_URL est défini (voir main_app/realtime.py).
+# Chaque flux est fermé au bout de REALTIME_STREAM_MAX_SECONDS ; le navigateur
+# se reconnecte automatiquement. Déploiement recommandé : ASGI
+# (richat_funding.asgi:application sous uvicorn/daphne), où le flux est
+# asynchrone. Sous WSGI, le flux bloque un thread : il n'est servi que par un
+# serveur multi-thread (gunicorn --threads N) ou, avec des workers gevent /
+# eventlet, si REALTIME_WSGI_STREAMS est activé ; sinon il répond 503 et le
+# frontend continue le polling. Le flux s'ouvre avec un jeton signé valable
+# REALTIME_STREAM_TOKEN_SECONDS (POST /api/notifications/stream_token/).
+REALTIME_BROKER = config('REALTIME_BROKER', default='')
+REALTIME_HEARTBEAT_SECONDS = config('REALTIME_HEARTBEAT_SECONDS', default=15, cast=int)
+REALTIME_STREAM_MAX_SECONDS = config('REALTIME_STREAM_MAX_SECONDS', default=300, cast=int)
+REALTIME_STREAM_TOKEN_SECONDS = config('REALTIME_STREAM_TOKEN_SECONDS', default=60, cast=int)
+REALTIME_POLL_SECONDS = config('REALTIME_POLL_SECONDS', default=0.5, cast=float)
+REALTIME_WSGI_STREAMS = config('REALTIME_WSGI_STREAMS', default=False, cast=bool)
+
+# Recherche plein texte (?search=, main_app/search.py) : 'mysql' (FULLTEXT),
+# 'fts5' (SQLite) ou 'like' ; par défaut selon la base de données.
+SEARCH_BACKEND = config('SEARCH_BACKEND', default='')
+
+# Montants de financement (main_app/amounts.py) : funding_amount est enregistré
+# dans la devise de référence, avec ces taux statiques (1 unité -> USD)
+FUNDING_BASE_CURRENCY = 'USD'
+FUNDING_FX_RATES = {'USD': 1, 'EUR': 1.08, 'XOF': 0.00165, 'MRU': 0.025}
+
+# Tâches en arrière-plan (main_app/background.py) : 'celery', 'thread' ou
+# 'eager' ; par défaut Celery si CELERY_BROKER_URL est défini explicitement
+# (REDIS_URL seul, utilisé par le cache et le temps réel, ne suffit pas :
+# sans worker Celery lancé, les tâches resteraient en file), sinon un pool de
+# threads dans le processus web.
+BACKGROUND_TASKS_BACKEND = config('BACKGROUND_TASKS_BACKEND', default='')
+BACKGROUND_TASKS_THREADS = config('BACKGROUND_TASKS_THREADS', default=2, cast=int)
+
+# Celery
+CELERY_BROKER_URL = config('CELERY_BROKER_URL', default='')
+CELERY_TASK_ACKS_LATE = True
+CELERY_TASK_SERIALIZER = 'json'
+CELERY_ACCEPT_CONTENT = ['json']
+
+# Tâches planifiées (main_app/jobs.py), lancées par "manage.py run_scheduler"
+# ou par Celery beat. 'at' : heure quotidienne "HH:MM" (heure locale) ou
+# 'every' : intervalle en secondes. 'lock_timeout' : durée maximale d'une
+# exécution, après laquelle le verrou d'une exécution interrompue est repris.
+SCHEDULED_JOBS = {
+    'scraping': {
+        'command': 'scraping',
+        'options': {'headless': True, 'incremental': True, 'sink': 'db'},
+        'at': config('SCRAPING_AT', default='02:00'),
+        'lock_timeout': 6 * 60 * 60,
+    },
+    'collection': {
+        'command': 'collection',
+        'at': config('COLLECTION_AT', default='05:00'),
+        'lock_timeout': 2 * 60 * 60,
+    },
+    'cleanup_old_alerts': {
+        'task': 'main_app.tasks.cleanup_old_alerts',
+        'at': '03:30',
+    },
+    'rollup_document_stats': {
+        'task': 'main_app.tasks.rollup_document_stats',
+        'every': 60 * 60,
+    },
+}
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -0,0 +1,21 @@
+@echo off
+title Planificateur des tâches
+:: Répertoire du script (backend), quel que soit l'emplacement du projet
+cd /d "%~dp0"
+:: Vérification de l'environnement
+if not exist "manage.py" (
+    echo Fichier manage.py introuvable
+    pause
+    exit /b 1
+)
+
+:: Scraping, collection et maintenance des alertes selon SCHEDULED_JOBS
+echo Démarrage du planificateur...
+echo Appuyez sur Ctrl+C pour arrêter
+
+call venv\Scripts\activate.bat
+python manage.py run_scheduler
+
+:: En cas d'arrêt inattendu
+echo Le planificateur s'est arrêté
+timeout /t 3 >nul
\ No newline at end of file
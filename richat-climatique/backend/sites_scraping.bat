@@ -1,6 +1,7 @@
 @echo off
-title Service de Notification des Interactions
-cd /d C:\Users\Lenovo2\Downloads\Projets-Verst\richat-climatique\backend
+title Scraping des sites
+:: Répertoire du script (backend), quel que soit l'emplacement du projet
+cd /d "%~dp0"
 :: Vérification de l'environnement
 if not exist "manage.py" (
     echo Fichier manage.py introuvable
@@ -8,13 +9,11 @@ if not exist "manage.py" (
     exit /b 1
 )
 
-:: Démarrer le service
-echo Démarrage du service de notification...
-echo Appuyez sur Ctrl+C pour arrêter
-
+:: Exécution sous verrou, enregistrée dans les sessions de scraping
+echo Démarrage du scraping...
 call venv\Scripts\activate.bat
-python manage.py scraping
+python manage.py run_scheduler --run scraping
 
-:: En cas d'arrêt inattendu
-echo Le service de notification s'est arrêté
+:: Fin de l'exécution
+echo Le scraping est terminé
 timeout /t 3 >nul
\ No newline at end of file
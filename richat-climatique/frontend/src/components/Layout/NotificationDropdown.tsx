@@ -15,6 +15,7 @@ import { useQuery, useMutation } from "@tanstack/react-query";
 import notificationService from "@/services/notificationService";
 import { useNavigate } from "react-router-dom";
 import { useAuth } from "@/contexts/AuthContext";
+import { useRealtimeEvents } from "@/hooks/useRealtimeEvents";
 
 interface ProjectAlert {
   id: number;
@@ -35,6 +36,8 @@ interface ProjectAlert {
 const NotificationDropdown = () => {
   const navigate = useNavigate();
   const { backendConnected } = useAuth();
+  // Flux temps réel : le polling ne sert plus que de secours s'il est coupé
+  const realtimeConnected = useRealtimeEvents(backendConnected);
   
   // Mutation pour marquer une alerte comme lue
   const markAsReadMutation = useMutation({
@@ -57,7 +60,7 @@ const NotificationDropdown = () => {
       status: 'active',
       page_size: 50
     }),
-    refetchInterval: 10000,
+    refetchInterval: realtimeConnected ? false : 10000,
     enabled: backendConnected,
   });
 
@@ -68,7 +71,7 @@ const NotificationDropdown = () => {
   } = useQuery({
     queryKey: ['project-alerts-stats-dropdown'],
     queryFn: () => notificationService.getProjectAlertsStats(),
-    refetchInterval: 30000,
+    refetchInterval: realtimeConnected ? false : 30000,
     enabled: backendConnected,
   });
 
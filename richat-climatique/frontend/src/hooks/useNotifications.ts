@@ -1,5 +1,6 @@
 import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query';
 import notificationService from '../services/notificationService';
+import { useRealtimeEvents } from './useRealtimeEvents';
 
 export const useNotifications = () => {
   return useQuery({
@@ -9,10 +10,11 @@ export const useNotifications = () => {
 };
 
 export const useUnreadCount = () => {
+  const realtimeConnected = useRealtimeEvents();
   return useQuery({
     queryKey: ['unread-count'],
     queryFn: () => notificationService.getUnreadCount(),
-    refetchInterval: 30000, // Actualiser toutes les 30 secondes
+    refetchInterval: realtimeConnected ? false : 30000, // Actualiser toutes les 30 secondes
   });
 };
 
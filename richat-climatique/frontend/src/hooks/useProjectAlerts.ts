@@ -2,6 +2,7 @@
 
 import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query';
 import notificationService, { ProjectAlert } from '../services/notificationService';
+import { useRealtimeEvents } from './useRealtimeEvents';
 
 interface UseProjectAlertsParams {
   status?: 'active' | 'read' | 'archived' | 'dismissed' | 'all';
@@ -15,6 +16,7 @@ interface UseProjectAlertsParams {
 }
 
 export const useProjectAlerts = (params?: UseProjectAlertsParams) => {
+  const realtimeConnected = useRealtimeEvents();
   return useQuery({
     queryKey: ['project-alerts', params],
     queryFn: async () => {
@@ -34,19 +36,21 @@ export const useProjectAlerts = (params?: UseProjectAlertsParams) => {
       
       return result;
     },
-    refetchInterval: 30000, // Actualiser toutes les 30 secondes
+    refetchInterval: realtimeConnected ? false : 30000, // Actualiser toutes les 30 secondes
   });
 };
 
 export const useProjectAlertsStats = () => {
+  const realtimeConnected = useRealtimeEvents();
   return useQuery({
     queryKey: ['project-alerts-stats'],
     queryFn: () => notificationService.getProjectAlertsStats(),
-    refetchInterval: 60000, // Actualiser toutes les minutes
+    refetchInterval: realtimeConnected ? false : 60000, // Actualiser toutes les minutes
   });
 };
 
 export const useNewProjectAlerts = () => {
+  const realtimeConnected = useRealtimeEvents();
   return useQuery({
     queryKey: ['new-project-alerts'],
     queryFn: async () => {
@@ -71,7 +75,7 @@ export const useNewProjectAlerts = () => {
         count: recentAlerts.length
       };
     },
-    refetchInterval: 30000,
+    refetchInterval: realtimeConnected ? false : 30000,
   });
 };
 
@@ -4,22 +4,25 @@
 import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query';
 import notificationService, { ProjectRequest, ProjectRequestStats } from '../services/notificationService';
 import { toast } from 'sonner';
+import { useRealtimeEvents } from './useRealtimeEvents';
 
 // ========== HOOKS POUR ADMIN ==========
 
 export const useProjectRequests = (status?: string) => {
+  const realtimeConnected = useRealtimeEvents();
   return useQuery({
     queryKey: ['project-requests', status],
     queryFn: () => notificationService.getProjectRequests(status),
-    refetchInterval: 30000, // Actualiser toutes les 30 secondes
+    refetchInterval: realtimeConnected ? false : 30000, // Actualiser toutes les 30 secondes
   });
 };
 
 export const useProjectRequestStats = () => {
+  const realtimeConnected = useRealtimeEvents();
   return useQuery({
     queryKey: ['project-request-stats'],
     queryFn: () => notificationService.getProjectRequestStats(),
-    refetchInterval: 60000, // Actualiser toutes les minutes
+    refetchInterval: realtimeConnected ? false : 60000, // Actualiser toutes les minutes
   });
 };
 
@@ -99,11 +102,12 @@ export const useSubmitProjectRequest = () => {
 };
 
 export const useMyProjectRequests = (clientId: number) => {
+  const realtimeConnected = useRealtimeEvents();
   return useQuery({
     queryKey: ['my-project-requests', clientId],
     queryFn: () => notificationService.getMyProjectRequests(clientId),
     enabled: !!clientId,
-    refetchInterval: 60000, // Actualiser toutes les minutes
+    refetchInterval: realtimeConnected ? false : 60000, // Actualiser toutes les minutes
   });
 };
 
@@ -125,10 +129,11 @@ export const useScrapedProjects = (params?: {
 // ========== HOOKS POUR STATISTIQUES GLOBALES ==========
 
 export const useDashboardStats = () => {
+  const realtimeConnected = useRealtimeEvents();
   return useQuery({
     queryKey: ['dashboard-stats'],
     queryFn: () => notificationService.getDashboardStats(),
-    refetchInterval: 120000, // Actualiser toutes les 2 minutes
+    refetchInterval: realtimeConnected ? false : 120000, // Actualiser toutes les 2 minutes
   });
 };
 
@@ -0,0 +1,141 @@
+// =============================================================================
+// HOOK TEMPS RÉEL : FLUX SERVER-SENT EVENTS DES NOTIFICATIONS
+// =============================================================================
+import { useEffect, useState } from 'react';
+import { QueryClient, useQueryClient } from '@tanstack/react-query';
+import { apiClient } from '../services/api';
+
+const STREAM_URL = 'http://127.0.0.1:8000/api/notifications/stream/';
+
+// Délai avant reconnexion, doublé à chaque échec (serveur sans flux : 503)
+const RETRY_MIN_DELAY = 1000;
+const RETRY_MAX_DELAY = 5 * 60 * 1000;
+
+// Requêtes à rafraîchir pour chaque type d'événement poussé par le serveur :
+// tant que le flux est connecté, les hooks qui interrogent ces clés ne pollent plus
+const INVALIDATED_QUERIES: Record<string, string[][]> = {
+  counts: [['unread-count']],
+  'notification.created': [['notifications'], ['unread-count']],
+  'alert.created': [
+    ['project-alerts'],
+    ['project-alerts-dropdown'],
+    ['project-alerts-stats'],
+    ['project-alerts-stats-dropdown'],
+    ['new-project-alerts'],
+    ['dashboard-stats'],
+  ],
+  'request.created': [['project-requests'], ['project-request-stats'], ['dashboard-stats']],
+  'request.status': [
+    ['project-requests'],
+    ['project-request-stats'],
+    ['my-project-requests'],
+    ['dashboard-stats'],
+  ],
+};
+
+// Une seule connexion pour toute l'application, partagée par les hooks
+const stream = {
+  source: null as EventSource | null,
+  subscribers: 0,
+  connected: false,
+  retryDelay: RETRY_MIN_DELAY,
+  retryTimer: null as ReturnType<typeof setTimeout> | null,
+  queryClient: null as QueryClient | null,
+  listeners: new Set<(connected: boolean) => void>(),
+};
+
+const setConnected = (connected: boolean) => {
+  stream.connected = connected;
+  stream.listeners.forEach((listener) => listener(connected));
+};
+
+const scheduleReconnect = () => {
+  if (stream.subscribers === 0 || stream.retryTimer) return;
+  stream.retryTimer = setTimeout(() => {
+    stream.retryTimer = null;
+    connect();
+  }, stream.retryDelay);
+  stream.retryDelay = Math.min(stream.retryDelay * 2, RETRY_MAX_DELAY);
+};
+
+const connect = async () => {
+  if (stream.source || stream.subscribers === 0) return;
+
+  // EventSource ne permet pas d'envoyer l'en-tête Authorization : jeton de flux
+  // de courte durée plutôt que le jeton d'authentification dans l'URL
+  let token: string;
+  try {
+    token = (await apiClient.post<{ token: string }>('/notifications/stream_token/')).token;
+  } catch {
+    scheduleReconnect();
+    return;
+  }
+  if (stream.source || stream.subscribers === 0) return;
+
+  const source = new EventSource(`${STREAM_URL}?stream_token=${encodeURIComponent(token)}`);
+  stream.source = source;
+
+  source.onopen = () => {
+    stream.retryDelay = RETRY_MIN_DELAY;
+    setConnected(true);
+  };
+  // Le jeton a expiré entre-temps : nouvelle connexion avec un nouveau jeton,
+  // le polling reprend en attendant
+  source.onerror = () => {
+    source.close();
+    stream.source = null;
+    setConnected(false);
+    scheduleReconnect();
+  };
+
+  Object.entries(INVALIDATED_QUERIES).forEach(([eventName, queryKeys]) => {
+    source.addEventListener(eventName, () => {
+      queryKeys.forEach((queryKey) => stream.queryClient?.invalidateQueries({ queryKey }));
+    });
+  });
+};
+
+const disconnect = () => {
+  if (stream.retryTimer) {
+    clearTimeout(stream.retryTimer);
+    stream.retryTimer = null;
+  }
+  stream.source?.close();
+  stream.source = null;
+  stream.retryDelay = RETRY_MIN_DELAY;
+  setConnected(false);
+};
+
+/**
+ * Ouvre (une seule fois pour tous les composants) le flux /notifications/stream/
+ * et rafraîchit les requêtes concernées à chaque événement. Retourne true tant
+ * que le flux est connecté : les hooks peuvent alors désactiver leur polling.
+ */
+export const useRealtimeEvents = (enabled: boolean = true) => {
+  const queryClient = useQueryClient();
+  const [connected, setLocalConnected] = useState(stream.connected);
+
+  useEffect(() => {
+    const token = localStorage.getItem('authToken');
+    if (!enabled || !token || typeof EventSource === 'undefined') {
+      return;
+    }
+
+    stream.queryClient = queryClient;
+    stream.listeners.add(setLocalConnected);
+    setLocalConnected(stream.connected);
+    stream.subscribers += 1;
+    connect();
+
+    return () => {
+      stream.listeners.delete(setLocalConnected);
+      setLocalConnected(false);
+      stream.subscribers -= 1;
+      if (stream.subscribers === 0) {
+        disconnect();
+      }
+    };
+  }, [enabled, queryClient]);
+
+  return connected;
+};